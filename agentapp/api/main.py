@@ -4,7 +4,9 @@ from fastapi import FastAPI, Request
 from fastapi.responses import JSONResponse, HTMLResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
+from starlette.concurrency import run_in_threadpool
 from typing import List, Dict
+from contextlib import asynccontextmanager
 import logging
 
 # ensure project root imports
@@ -12,16 +14,44 @@ ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
 if ROOT not in sys.path:
     sys.path.insert(0, ROOT)
 
-from agentapp.ingestion.scrapers import scrape_buildersmart, scrape_indiamart
+from agentapp.ingestion.sources import collect, enabled_sources, fan_out_many, submit_scrapes
+from agentapp.ingestion.http_client import get_http_client
+from agentapp.ingestion.page_cache import get_page_cache
+from agentapp.ingestion.scrape_cache import get_scrape_cache
+from agentapp.feature_engine import DEFAULT_FEATURES
 from agentapp.features import build_latest_features
-from agentapp.prediction import predict_trend
-from agentapp.reasoning.groq import groq_reasoning
+from agentapp.prediction import predict_trend, predict_trend_batch
+from agentapp.model_registry import get_model_registry
+from agentapp.forecast_table import get_forecast_table
+from agentapp.forecasting import forecast_table
+from agentapp.features import latest_row
+from agentapp.reasoning.groq import groq_reasoning, llm_configured
+from agentapp.deadline import PREDICT_BUDGET_SECONDS, Deadline, settle, submit
 from agentapp.visualizations import create_comprehensive_visualization, create_multi_material_comparison
-from agentapp.product_matcher import find_matching_product
+from agentapp.price_index import get_price_store
+from agentapp.suggest import get_suggest_index
 from services.climate import rainfall_risk_tn
 from services.confidence import confidence_score
 from agentapp.ingestion.scrapers import get_available_categories
-app = FastAPI()
+
+CSV_PATH = os.path.join(ROOT, 'data', 'price_index.csv')
+MAX_BATCH_PRODUCTS = 500
+CLIMATE_UNKNOWN = (0.5, 'Unknown')  # neutral risk when the climate API misses the deadline
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # parse the price index once at startup instead of on every request
+    get_price_store(CSV_PATH)
+    get_suggest_index(CSV_PATH)
+    get_model_registry()
+    forecasts = get_forecast_table(CSV_PATH)
+    forecasts.start()
+    yield
+    forecasts.stop()
+
+
+app = FastAPI(lifespan=lifespan)
 app.mount("/static", StaticFiles(directory=os.path.join(os.path.dirname(__file__), '..', 'web', 'static')), name="static")
 templates = Jinja2Templates(directory=os.path.join(os.path.dirname(__file__), '..', 'web', 'templates'))
 
@@ -48,18 +78,34 @@ if os.getenv('SUPPRESS_ACCESS_LOGS', '1') == '1':
 
 @app.get('/', response_class=HTMLResponse)
 async def index(request: Request):
-    # load materials for dropdown from CSV
-    import pandas as pd
-    csv_path = os.path.join(ROOT, 'data', 'price_index.csv')
-    df = pd.read_csv(csv_path)
-    materials = sorted(df['comm_name'].unique())
-    return templates.TemplateResponse('index.html', {'request': request, 'materials': materials})
+    # product choices come from /api/suggest as the user types
+    return templates.TemplateResponse(request, 'index.html')
 
 @app.get('/api/categories')
 async def categories():
     return get_available_categories()
 
 
+@app.get('/api/suggest')
+async def suggest(q: str = '', limit: int = 10):
+    """Autocomplete over commodities, aliases, crawler classes and categories"""
+    limit = max(1, min(limit, 50))
+    return {'query': q, 'suggestions': get_suggest_index(CSV_PATH).suggest(q, limit)}
+
+
+@app.get('/api/metrics')
+async def metrics():
+    store = get_price_store(CSV_PATH)
+    return {
+        'model': get_model_registry().stats(),
+        'forecasts': get_forecast_table(CSV_PATH).stats(),
+        'price_index': {'version': store.version, 'source': store.source},
+        'http': get_http_client().stats(),
+        'scrape_cache': get_scrape_cache().stats(),
+        'page_cache': get_page_cache().stats(),
+    }
+
+
 @app.get('/api/test-viz')
 async def test_visualization():
     """Test endpoint to verify visualizations work"""
@@ -107,34 +153,63 @@ async def test_visualization():
 
 @app.post('/api/predict')
 async def predict(request: Request):
+    # one budget for the whole request, from arrival: waiting for a worker thread counts against it
+    deadline = Deadline(PREDICT_BUDGET_SECONDS)
     payload = await request.json()
     product = payload.get('product')
     if not product:
         return JSONResponse({'error': 'product required'}, status_code=400)
+    # the stages block (thread pools, HTTP, the LLM), so they run off the event loop
+    return await run_in_threadpool(_predict, product, deadline)
 
-    csv_path = os.path.join(ROOT, 'data', 'price_index.csv')
 
-    # 1. features
-    try:
-        X_latest = build_latest_features(csv_path, product, ['price_index', 'lag_1', 'lag_3_mean'])
-    except Exception as e:
-        return JSONResponse({'error': f'Feature error: {str(e)}'}, status_code=400)
+def _predict(product: str, deadline: Deadline) -> JSONResponse:
+    csv_path = CSV_PATH
+    # stages that miss the deadline are named in `degraded`
+    degraded = []
 
-    # 2. predict
-    try:
-        trend, prob, model_status = predict_trend(X_latest)
-    except Exception as e:
-        trend, prob, model_status = 'STABLE', 0.5, 'error'
+    # 1-2. precomputed trend for the commodity; features + model only on a miss
+    loaded = get_model_registry().current()
+    cached = get_forecast_table(csv_path).lookup(product, loaded)
+    if cached is not None:
+        trend, prob, model_status = cached['trend'], cached['trend_prob'], cached['model_status']
+        model_version = cached['model_version'] if model_status == 'model_loaded' else None
+        latest_price = cached['price_index']
+        outlook = cached['forecast']
+    else:
+        try:
+            # the loaded model's features, plus the base set the fallback rule and price read from
+            features = list(dict.fromkeys((loaded.features if loaded is not None else []) + DEFAULT_FEATURES))
+            X_latest = build_latest_features(csv_path, product, features)
+        except Exception as e:
+            return JSONResponse({'error': f'Feature error: {str(e)}'}, status_code=400)
 
-    # 3. climate
-    climate_score, climate_label = rainfall_risk_tn()
+        # pin the model so the reported version is the one that scored
+        try:
+            trend, prob, model_status = predict_trend(X_latest, loaded)
+        except Exception as e:
+            trend, prob, model_status = 'STABLE', 0.5, 'error'
+        model_version = loaded.version if loaded is not None and model_status == 'model_loaded' else None
+        latest_price = float(X_latest['price_index'].iloc[0])
+        store = get_price_store(csv_path)
+        table = store.table
+        outlook = forecast_table(table, [latest_row(store, table, product, features)]).row(0)
 
-    # 4. scrape multiple sources
-    sources = []
-    b = scrape_buildersmart(product)
-    sources.append(b)
-    im = scrape_indiamart(product)
-    sources.append(im)
+    # 3-4. climate and every enabled marketplace concurrently, for whatever is left of the budget
+    # (scrapes are cached; stale entries are served while they refresh, late ones still fill the cache.
+    # They run on their own pool, so a backlog of slow marketplaces cannot hold up climate.)
+    market_sources = enabled_sources()
+    stages = submit_scrapes(product, market_sources, deadline)
+    stages.update(submit({'climate': lambda: rainfall_risk_tn(deadline)}))
+    done, _ = settle(deadline, stages)
+    if 'climate' in done:
+        climate_score, climate_label = done['climate']
+    else:
+        climate_score, climate_label = CLIMATE_UNKNOWN
+        degraded.append('climate')
+    scraper_results, late = collect(done, market_sources)
+    sources = list(scraper_results.values())
+    degraded.extend(f'market.{name}' for name in late)
 
     # aggregate market prices across sources
     all_prices = []
@@ -142,7 +217,8 @@ async def predict(request: Request):
     for s in sources:
         evidence.append({
             'label': s.get('label', 'unknown'),
-            'source_url': s.get('source_url')
+            'source_url': s.get('source_url'),
+            'cache_age_seconds': s.get('cache', {}).get('age_seconds'),
         })
         if s.get('status') == 'available':
             all_prices.extend(s.get('prices', []))
@@ -158,7 +234,8 @@ async def predict(request: Request):
             'median': int(np.median(arr)),
             'variance': float(np.var(arr) / (np.mean(arr) ** 2)),
             'unit': 'INR',
-            'sources': [s for s in sources if s.get('status') == 'available']
+            'sources': [s for s in sources if s.get('status') == 'available'],
+            'cache_age_seconds': max(s.get('cache', {}).get('age_seconds') or 0.0 for s in sources),
         }
 
     # 5. confidence
@@ -177,109 +254,135 @@ async def predict(request: Request):
         'evidence_list': '\n'.join([f"{i+1}. {e['label']} - {e['source_url']}" for i, e in enumerate(evidence)])
     }
 
-    llm_text = groq_reasoning(reason_payload)
+    llm_text = groq_reasoning(reason_payload, deadline)
+    if deadline.expired() and llm_configured():
+        degraded.append('llm')  # rule-based reasoning stood in for the model
 
     # 7. Generate visualizations
-    visualizations = {'line_graph': None, 'bar_graph': None}
-    try:
-        import pandas as pd
-        # Get historical data for line graph
-        df = pd.read_csv(csv_path)
-        
-        # Use improved product matching
-        mask = find_matching_product(df, product, 'comm_name')
+    if deadline.expired():
+        visualizations = {'line_graph': None, 'bar_graph': None, 'error': 'Skipped: request deadline exceeded'}
+        degraded.append('visualizations')
+    else:
+        try:
+            # Get historical data for line graph from the shared store (no CSV re-read)
+            store = get_price_store(csv_path)
+            rows = store.match(product)
         
-        if mask.sum() > 0:
-            sub = df[mask]
-            index_cols = [c for c in sub.columns if c.startswith('indx')]
-            df_long = sub.melt(id_vars=['comm_name','comm_code','comm_wt'], 
-                              value_vars=index_cols,
-                              var_name='month', value_name='price_index')
-            df_long['month'] = df_long['month'].str.replace('indx','', regex=False)
-            df_long['date'] = pd.to_datetime(df_long['month'], format='%m%Y', errors='coerce')
-            df_long = df_long.dropna(subset=['date']).sort_values('date').tail(12)  # Last 12 months
+            if len(rows) > 0:
+                df_long = store.history(rows).tail(12)  # Last 12 months
             
-            if not df_long.empty:
-                prediction_dict = {
-                    'trend': trend,
-                    'probability': prob,
-                    'predicted_value': float(X_latest['price_index'].iloc[0])
-                }
+                if not df_long.empty:
+                    prediction_dict = {
+                        'trend': trend,
+                        'probability': prob,
+                        'predicted_value': outlook[1]['value'] if 1 in outlook else latest_price,
+                        'forecast': outlook,
+                    }
                 
-                scraper_results = {
-                    'buildersmart': b,
-                    'indiamart': im
-                }
-                
-                visualizations = create_comprehensive_visualization(
-                    df_long, prediction_dict, scraper_results, product
-                )
+                    visualizations = create_comprehensive_visualization(
+                        df_long, prediction_dict, scraper_results, product
+                    )
+                else:
+                    visualizations = {'line_graph': None, 'bar_graph': None, 'error': 'No historical data available'}
             else:
-                visualizations = {'line_graph': None, 'bar_graph': None, 'error': 'No historical data available'}
-        else:
-            visualizations = {'line_graph': None, 'bar_graph': None, 'error': 'Product not found in CSV'}
-    except Exception as e:
-        import traceback
-        visualizations = {
-            'line_graph': None, 
-            'bar_graph': None, 
-            'error': f'{str(e)}',
-            'traceback': traceback.format_exc()
-        }
+                visualizations = {'line_graph': None, 'bar_graph': None, 'error': 'Product not found in CSV'}
+        except Exception as e:
+            import traceback
+            visualizations = {
+                'line_graph': None, 
+                'bar_graph': None, 
+                'error': f'{str(e)}',
+                'traceback': traceback.format_exc()
+            }
 
     response = {
         'product': product,
         'trend': trend,
         'trend_prob': prob,
         'model_status': model_status,
+        'model_version': model_version,
+        'price_index': latest_price,
+        'forecast': outlook,
         'climate': {'score': climate_score, 'label': climate_label},
         'market': market,
         'confidence': {'score': conf_score, 'label': conf_label},
         'evidence': evidence,
         'llm': llm_text,
-        'visualizations': visualizations
+        'visualizations': visualizations,
+        'degraded': degraded,
+        'budget': {'seconds': deadline.budget, 'elapsed_seconds': round(deadline.elapsed(), 3)},
     }
 
     return JSONResponse(response)
 
 
+@app.post('/api/predict/batch')
+async def predict_batch(request: Request):
+    """Trend predictions for a list of materials in one round trip (no scraping or LLM)"""
+    payload = await request.json()
+    products = payload.get('products')
+    if not isinstance(products, list) or not products or not all(isinstance(p, str) for p in products):
+        return JSONResponse({'error': 'products must be a non-empty list of names'}, status_code=400)
+    if len(products) > MAX_BATCH_PRODUCTS:
+        return JSONResponse({'error': f'at most {MAX_BATCH_PRODUCTS} products per request'}, status_code=400)
+
+    # model reload checks, matrix work and possibly a store reload or partition load: keep them off the event loop
+    loaded = await run_in_threadpool(get_model_registry().current)
+    results = await run_in_threadpool(predict_trend_batch, products, CSV_PATH, loaded)
+    return JSONResponse({
+        'model_version': loaded.version if loaded is not None else None,
+        'results': results,
+    })
+
+
 @app.post('/api/visualize')
 async def visualize(request: Request):
     """Generate visualizations for materials"""
+    # one budget for every material's scrapes, from arrival (like /api/predict)
+    deadline = Deadline(PREDICT_BUDGET_SECONDS)
     payload = await request.json()
     materials = payload.get('materials', [])
     
     if not materials:
         return JSONResponse({'error': 'materials list required'}, status_code=400)
-    
-    csv_path = os.path.join(ROOT, 'data', 'price_index.csv')
+    return await run_in_threadpool(_visualize, materials, deadline)
+
+
+def _visualize(materials: List[str], deadline: Deadline) -> JSONResponse:
+    # one feature gather and one predict_proba for all materials
+    predictions = predict_trend_batch(materials, CSV_PATH)
+    found = [pred['product'] for pred in predictions if 'error' not in pred]
+    # scrape every material from every enabled source at once, all under the one deadline
+    try:
+        scrapes = dict(zip(found, fan_out_many(found, deadline)))
+        scrape_error = None
+    except Exception as e:
+        scrapes, scrape_error = {}, str(e)
     results = []
-    
-    for product in materials:
-        try:
-            # Get latest features
-            X_latest = build_latest_features(csv_path, product, ['price_index', 'lag_1', 'lag_3_mean'])
-            trend, prob, _ = predict_trend(X_latest)
-            
-            # Scrape prices
-            b = scrape_buildersmart(product)
-            im = scrape_indiamart(product)
-            
-            results.append({
-                'name': product,
-                'model_price': float(X_latest['price_index'].iloc[0]),
-                'indiamart_price': im.get('median') if im.get('status') == 'available' else None,
-                'buildersmart_price': b.get('median') if b.get('status') == 'available' else None,
-                'trend': trend
-            })
-        except Exception as e:
+
+    for pred in predictions:
+        product = pred['product']
+        if 'error' in pred or scrape_error is not None:
             results.append({
                 'name': product,
                 'model_price': None,
                 'indiamart_price': None,
                 'buildersmart_price': None,
-                'error': str(e)
+                'error': pred.get('error', scrape_error)
             })
+            continue
+        scraped, late = scrapes[product]
+        b = scraped.get('buildersmart', {})
+        im = scraped.get('indiamart', {})
+        
+        results.append({
+            'name': product,
+            'model_price': pred['price_index'],
+            'indiamart_price': im.get('median') if im.get('status') == 'available' else None,
+            'buildersmart_price': b.get('median') if b.get('status') == 'available' else None,
+            'trend': pred['trend'],
+            'degraded': [f'market.{name}' for name in late],
+        })
     
     # Create multi-material comparison
     try:
@@ -289,7 +392,8 @@ async def visualize(request: Request):
     
     return JSONResponse({
         'materials': results,
-        'comparison_chart': comparison_chart
+        'comparison_chart': comparison_chart,
+        'budget': {'seconds': deadline.budget, 'elapsed_seconds': round(deadline.elapsed(), 3)},
     })
 
 
@@ -0,0 +1,198 @@
+"""
+Walk-forward backtesting for the trend model
+Replays every month of the price index, retraining each candidate on the data known at the time
+
+Each test month t is scored for every commodity with a model fitted only on samples
+whose label was already observable at t. Folds are fanned out over a process pool.
+
+Usage:
+    python -m agentapp.backtest [--candidates logreg,logreg_scaled,majority] [--start 2018-01]
+                                [--horizon 1] [--retrain-every 1] [--workers 4] [--features price_index,lag_1,...]
+                                [--json report.json]
+"""
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from agentapp.feature_engine import DEFAULT_FEATURES, FEATURES
+from agentapp.price_index import DEFAULT_CSV_PATH, PriceIndexStore
+from agentapp.training.candidates import CANDIDATES, DEFAULT_CANDIDATES, proba_by_class, register_candidate  # noqa: F401
+from agentapp.training.dataset import CLASSES, THRESHOLD, build_dataset, trend_labels  # noqa: F401
+
+
+# per-worker data, set once by the pool initializer instead of pickled per task
+_DATA: Dict[str, np.ndarray] = {}
+
+
+def _init_worker(X: np.ndarray, y: np.ndarray, valid: np.ndarray, horizon: int) -> None:
+    _DATA.update(X=X, y=y, valid=valid, horizon=horizon)
+    # import scikit-learn up front so it is not billed to the first candidate's wall time
+    import sklearn.linear_model  # noqa: F401
+
+
+def _run_folds(candidate: str, months: Sequence[int], retrain_every: int) -> Tuple[str, List[Tuple[int, np.ndarray, np.ndarray]], float]:
+    """Score `months` for every commodity; returns (candidate, [(month, rows, proba)], cpu seconds)"""
+    start = time.process_time()
+    X, y, valid, horizon = _DATA['X'], _DATA['y'], _DATA['valid'], _DATA['horizon']
+    results, model, fitted_at = [], None, None
+    for t in months:
+        if model is None or t - fitted_at >= retrain_every:
+            # labels at month s are observed at s + horizon, so only s <= t - horizon is known at t
+            train = valid[:, :max(t - horizon + 1, 0)]
+            if not train.any():
+                continue
+            model = CANDIDATES[candidate]()
+            model.fit(X[:, :train.shape[1]][train], y[:, :train.shape[1]][train].astype(int))
+            fitted_at = t
+        rows = np.flatnonzero(valid[:, t])
+        if len(rows):
+            results.append((t, rows, proba_by_class(model, X[rows, t])))
+    return candidate, results, time.process_time() - start
+
+
+def calibration(confidence: np.ndarray, correct: np.ndarray, bins: int = 10) -> Tuple[float, List[Dict]]:
+    """Expected calibration error of the top-class probability and the reliability table"""
+    edges = np.linspace(0, 1, bins + 1)
+    idx = np.clip(np.digitize(confidence, edges[1:-1]), 0, bins - 1)
+    table, ece = [], 0.0
+    for b in range(bins):
+        sel = idx == b
+        if not sel.any():
+            continue
+        conf, acc = float(confidence[sel].mean()), float(correct[sel].mean())
+        ece += sel.mean() * abs(conf - acc)
+        table.append({'bin': f"{edges[b]:.1f}-{edges[b + 1]:.1f}", 'count': int(sel.sum()),
+                      'confidence': conf, 'accuracy': acc})
+    return float(ece), table
+
+
+def _score(y_true: np.ndarray, proba: np.ndarray) -> Dict[str, float]:
+    pred = CLASSES[proba.argmax(axis=1)]
+    onehot = (y_true[:, None] == CLASSES[None, :]).astype(float)
+    p_true = np.clip((proba * onehot).sum(axis=1), 1e-15, 1)
+    ece, reliability = calibration(proba.max(axis=1), pred == y_true)
+    recalls = [float((pred[y_true == c] == c).mean()) for c in CLASSES if (y_true == c).any()]
+    return {
+        'samples': int(len(y_true)),
+        'accuracy': float((pred == y_true).mean()),
+        'balanced_accuracy': float(np.mean(recalls)),
+        'log_loss': float(-np.log(p_true).mean()),
+        'brier': float(((proba - onehot) ** 2).sum(axis=1).mean()),
+        'ece': ece,
+        'reliability': reliability,
+    }
+
+
+def run_backtest(values: np.ndarray, names: Sequence[str], months: np.ndarray,
+                 candidates: Sequence[str] = DEFAULT_CANDIDATES, start: Optional[str] = None,
+                 horizon: int = 1, retrain_every: int = 1, workers: Optional[int] = None,
+                 feature_names: Sequence[str] = DEFAULT_FEATURES) -> Dict[str, Dict]:
+    """Walk-forward backtest of each candidate over every month from `start`.
+
+    Args:
+        values: Price index matrix, shape (commodities, months)
+        names: Commodity names (for the per-commodity breakdown)
+        months: datetime64[M] month of each column
+        candidates: Names in CANDIDATES
+        start: First test month ('YYYY-MM'; default: after the first 60% of months)
+        horizon: Months ahead the trend label looks
+        retrain_every: Refit every this many test months (1 = every month)
+        workers: Process pool size (default: CPU count)
+        feature_names: Model features from the feature engine
+
+    Returns:
+        {candidate: metrics dict with accuracy, balanced_accuracy, log_loss, brier, ece,
+         reliability, per_commodity accuracy, wall_seconds and cpu_seconds}
+    """
+    unknown = [c for c in candidates if c not in CANDIDATES]
+    if unknown:
+        raise KeyError(f"Unknown candidate(s): {unknown}")
+    X, y, valid = build_dataset(values, feature_names, horizon, months=months)
+    n_months = values.shape[1]
+    first = int(np.searchsorted(months, np.datetime64(start, 'M'))) if start else int(n_months * 0.6)
+    test_months = [t for t in range(max(first, 1), n_months) if valid[:, t].any()]
+
+    workers = workers or os.cpu_count() or 1
+    # contiguous chunks so each task retrains on its own schedule without gaps
+    n_chunks = max(1, min(len(test_months), workers * 2))
+    chunks = [list(c) for c in np.array_split(test_months, n_chunks) if len(c)]
+
+    report: Dict[str, Dict] = {}
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(X, y, valid, horizon)) as pool:
+        list(pool.map(time.sleep, [0.01] * workers))  # start the workers before timing
+        for candidate in candidates:
+            started = time.perf_counter()
+            outputs = list(pool.map(_run_folds, [candidate] * len(chunks), chunks, [retrain_every] * len(chunks)))
+            wall = time.perf_counter() - started
+            scored = [r for _, results, _ in outputs for r in results]
+            if not scored:
+                report[candidate] = {'samples': 0, 'wall_seconds': wall}
+                continue
+            rows = np.concatenate([r for _, r, _ in scored])
+            cols = np.concatenate([np.full(len(r), t) for t, r, _ in scored])
+            proba = np.concatenate([p for _, _, p in scored])
+            y_true = y[rows, cols].astype(int)
+            metrics = _score(y_true, proba)
+            pred = CLASSES[proba.argmax(axis=1)]
+            metrics['per_commodity'] = {
+                str(names[i]): float((pred[rows == i] == y_true[rows == i]).mean())
+                for i in np.unique(rows)
+            }
+            metrics['test_months'] = [str(months[test_months[0]]), str(months[test_months[-1]])]
+            metrics['wall_seconds'] = wall
+            metrics['cpu_seconds'] = float(sum(cpu for _, _, cpu in outputs))
+            report[candidate] = metrics
+    return report
+
+
+def backtest_csv(csv_path: str = DEFAULT_CSV_PATH, **kwargs) -> Dict[str, Dict]:
+    """run_backtest over every commodity of a price index CSV"""
+    table = PriceIndexStore(csv_path).table
+    rows = np.arange(len(table.names))
+    return run_backtest(table.row_values(rows), table.names, table.months, **kwargs)
+
+
+def format_report(report: Dict[str, Dict]) -> str:
+    lines = [f"{'candidate':<20}{'samples':>8}{'acc':>8}{'bal_acc':>9}{'logloss':>9}{'brier':>8}{'ece':>7}"
+             f"{'wall s':>9}{'cpu s':>8}"]
+    for name, m in report.items():
+        if not m.get('samples'):
+            lines.append(f"{name:<20}{0:>8}")
+            continue
+        lines.append(f"{name:<20}{m['samples']:>8}{m['accuracy']:>8.3f}{m['balanced_accuracy']:>9.3f}"
+                     f"{m['log_loss']:>9.3f}{m['brier']:>8.3f}{m['ece']:>7.3f}{m['wall_seconds']:>9.2f}"
+                     f"{m['cpu_seconds']:>8.2f}")
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Walk-forward backtest of trend model candidates')
+    parser.add_argument('--csv', default=DEFAULT_CSV_PATH)
+    parser.add_argument('--candidates', default=','.join(DEFAULT_CANDIDATES),
+                        help=f"comma-separated, from: {', '.join(CANDIDATES)}")
+    parser.add_argument('--start', default=None, help='first test month YYYY-MM (default: after 60%% of history)')
+    parser.add_argument('--horizon', type=int, default=1)
+    parser.add_argument('--retrain-every', type=int, default=1)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--features', default=','.join(DEFAULT_FEATURES),
+                        help=f"comma-separated, from: {', '.join(FEATURES)}")
+    parser.add_argument('--json', default=None, help='write the full report (incl. reliability tables) here')
+    args = parser.parse_args(argv)
+
+    report = backtest_csv(args.csv, candidates=args.candidates.split(','), start=args.start,
+                          horizon=args.horizon, retrain_every=args.retrain_every, workers=args.workers,
+                          feature_names=args.features.split(','))
+    print(format_report(report))
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+"""
+Request deadlines: one latency budget shared by every stage of a request
+Stages run against the time left; whatever misses the deadline is reported as degraded instead of awaited
+"""
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+PREDICT_BUDGET_SECONDS = float(os.getenv('PREDICT_BUDGET_SECONDS', '3'))
+STAGE_WORKERS = int(os.getenv('PREDICT_STAGE_WORKERS', '8'))
+
+Timeout = Union[float, Tuple[float, float]]
+
+
+class DeadlineExceeded(TimeoutError):
+    """A stage gave up because its request's deadline passed"""
+
+
+class Deadline:
+    """A point in time by which a request must answer."""
+
+    def __init__(self, seconds: float, clock: Callable[[], float] = time.monotonic):
+        self.budget = seconds
+        self.clock = clock
+        self.start = clock()
+        self.at = self.start + seconds
+
+    def remaining(self) -> float:
+        return max(0.0, self.at - self.clock())
+
+    def elapsed(self) -> float:
+        return self.clock() - self.start
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0.0
+
+    def timeout(self, default: Timeout) -> Timeout:
+        """`default` (a requests-style timeout) shortened to the time left"""
+        left = max(self.remaining(), 0.001)  # 0 would mean "no timeout" to some clients
+        if isinstance(default, tuple):
+            return tuple(min(t, left) for t in default)
+        return min(default, left)
+
+
+_POOLS: Dict[str, ThreadPoolExecutor] = {}
+_POOLS_LOCK = threading.Lock()
+
+
+def stage_pool(name: str = 'stage', workers: int = STAGE_WORKERS) -> ThreadPoolExecutor:
+    """Process-wide pool `name`; a slow stage group gets its own so it cannot starve cheap stages"""
+    pool = _POOLS.get(name)
+    if pool is None:
+        with _POOLS_LOCK:
+            pool = _POOLS.get(name)
+            if pool is None:
+                pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=name)
+                _POOLS[name] = pool
+    return pool
+
+
+def submit(stages: Dict[str, Callable[[], Any]], pool: Optional[ThreadPoolExecutor] = None) -> Dict[str, Future]:
+    """Start independent stages on `pool` (default: the shared stage pool); settle() them later"""
+    pool = pool or stage_pool()
+    return {name: pool.submit(fn) for name, fn in stages.items()}
+
+
+def settle(deadline: Deadline, futures: Dict[str, Future]) -> Tuple[Dict[str, Any], List[str]]:
+    """Wait for submitted stages until they finish or the deadline passes.
+
+    Stages still queued when time is up are cancelled. One that is already
+    running keeps going in the background (a scrape then still lands in its
+    cache for the next request) but is not waited for.
+
+    Args:
+        deadline: Budget for the whole group
+        futures: Stage name -> future, from submit()
+
+    Returns:
+        (results of the stages that finished, names of stages that timed out or raised)
+    """
+    wait(futures.values(), timeout=deadline.remaining())
+    results, degraded = {}, []
+    for name, future in futures.items():
+        if future.done() and not future.cancelled() and future.exception() is None:
+            results[name] = future.result()
+        else:
+            future.cancel()
+            degraded.append(name)
+    return results, degraded
+
+
+def gather(deadline: Deadline, stages: Dict[str, Callable[[], Any]],
+           pool: Optional[ThreadPoolExecutor] = None) -> Tuple[Dict[str, Any], List[str]]:
+    """Run independent stages concurrently until they finish or the deadline passes; see settle()"""
+    return settle(deadline, submit(stages, pool))
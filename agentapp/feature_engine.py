@@ -0,0 +1,223 @@
+"""
+Vectorized feature engine for Material Wise
+Computes model features for every commodity and month in one NumPy pass
+"""
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+
+def lag(values: np.ndarray, k: int) -> np.ndarray:
+    """Shift each commodity row right by `k` months (NaN-padded)"""
+    out = np.full(values.shape, np.nan, dtype=np.float64)
+    if k < values.shape[1]:
+        out[:, k:] = values[:, :values.shape[1] - k]
+    return out
+
+
+def rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    """Trailing mean over `window` months; NaN until the window is full (like pandas rolling)"""
+    out = np.full(values.shape, np.nan, dtype=np.float64)
+    if window <= values.shape[1]:
+        windows = np.lib.stride_tricks.sliding_window_view(values, window, axis=1)
+        out[:, window - 1:] = windows.mean(axis=-1)
+    return out
+
+
+def rolling_std(values: np.ndarray, window: int) -> np.ndarray:
+    """Trailing sample standard deviation over `window` months (ddof=1, like pandas rolling)"""
+    out = np.full(values.shape, np.nan, dtype=np.float64)
+    if 1 < window <= values.shape[1]:
+        windows = np.lib.stride_tricks.sliding_window_view(values, window, axis=1)
+        out[:, window - 1:] = windows.std(axis=-1, ddof=1)
+    return out
+
+
+def pct_change(values: np.ndarray, k: int = 1) -> np.ndarray:
+    """Relative change over `k` months (NaN where either end is missing)"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return values / lag(values, k) - 1
+
+
+def volatility(values: np.ndarray, window: int) -> np.ndarray:
+    """Rolling std of monthly changes; needs window + 1 months of history"""
+    return rolling_std(pct_change(values, 1), window)
+
+
+def momentum(values: np.ndarray, window: int) -> np.ndarray:
+    """Index relative to its trailing `window`-month mean"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return values / rolling_mean(values, window) - 1
+
+
+def month_of_year(months: np.ndarray) -> np.ndarray:
+    """Calendar month 1-12 of each datetime64[M] column"""
+    return months.astype('datetime64[M]').astype(np.int64) % 12 + 1
+
+
+# name -> (function over the commodities x months matrix, months of history it needs)
+# Features must be trailing (causal): column j may only use columns j-lookback..j,
+# which is what lets FeatureMatrix.updated() recompute just the tail after an append.
+FEATURES: Dict[str, tuple] = {
+    'price_index': (lambda v: v.astype(np.float64, copy=True), 0),
+    'lag_1': (lambda v: lag(v, 1), 1),
+    'lag_3_mean': (lambda v: rolling_mean(v, 3), 2),
+    'volatility_6': (lambda v: volatility(v, 6), 6),
+    'volatility_12': (lambda v: volatility(v, 12), 12),
+    'momentum_6': (lambda v: momentum(v, 6), 5),
+    'momentum_12': (lambda v: momentum(v, 12), 11),
+    'yoy_change': (lambda v: pct_change(v, 12), 12),
+}
+
+# name -> function of the datetime64[M] month axis; broadcast to every commodity
+CALENDAR_FEATURES: Dict[str, Callable[[np.ndarray], np.ndarray]] = {}
+
+DEFAULT_FEATURES = ['price_index', 'lag_1', 'lag_3_mean']
+
+
+def register_feature(name: str, func: Callable[[np.ndarray], np.ndarray], lookback: int) -> None:
+    """Add a feature computed from the commodities x months value matrix"""
+    FEATURES[name] = (func, lookback)
+    CALENDAR_FEATURES.pop(name, None)
+
+
+def register_calendar_feature(name: str, func: Callable[[np.ndarray], np.ndarray]) -> None:
+    """Add a feature computed from the month axis alone (seasonality encodings)"""
+    FEATURES[name] = (None, 0)
+    CALENDAR_FEATURES[name] = func
+
+
+register_calendar_feature('month_sin', lambda m: np.sin(2 * np.pi * (month_of_year(m) - 1) / 12))
+register_calendar_feature('month_cos', lambda m: np.cos(2 * np.pi * (month_of_year(m) - 1) / 12))
+
+
+def compute_features(values: np.ndarray, feature_names: Optional[Sequence[str]] = None,
+                     months: Optional[np.ndarray] = None) -> np.ndarray:
+    """Compute features for all commodities and months.
+
+    Args:
+        values: Price index matrix, shape (commodities, months)
+        feature_names: Features to compute (default: all registered)
+        months: datetime64[M] month of each column; calendar features are NaN without it
+
+    Returns:
+        Array of shape (features, commodities, months)
+    """
+    names = list(feature_names or FEATURES)
+    unknown = [n for n in names if n not in FEATURES]
+    if unknown:
+        raise KeyError(f"Unknown feature(s): {unknown}")
+    out = np.empty((len(names),) + values.shape, dtype=np.float64)
+    for i, name in enumerate(names):
+        if name in CALENDAR_FEATURES:
+            out[i] = CALENDAR_FEATURES[name](np.asarray(months))[None, :] if months is not None else np.nan
+        else:
+            out[i] = FEATURES[name][0](values)
+    return out
+
+
+def as_float64(arr: np.ndarray) -> np.ndarray:
+    # for index values only: float32 snapshots carry representation noise (136.7 -> 136.699997)
+    # and index data has 1-2 decimals. Features are stored as float64 and never rounded.
+    if arr.dtype == np.float32:
+        return arr.astype(np.float64).round(4)
+    return arr.astype(np.float64)
+
+
+class FeatureMatrix:
+    """Precomputed features plus the latest usable month for every commodity.
+
+    `latest_col` is the last month where the DEFAULT_FEATURES are all defined,
+    so adding longer-lookback features to the library does not move it. Other
+    feature sets get their own latest month, computed once per matrix on first use.
+    """
+
+    def __init__(self, names: List[str], data: np.ndarray, latest_col: Optional[np.ndarray] = None):
+        self.names = list(names)
+        self.data = data
+        self._pos = {n: i for i, n in enumerate(self.names)}
+        self.required = [n for n in self.names if n in DEFAULT_FEATURES] or list(self.names)
+        self._required_pos = [self._pos[n] for n in self.required]
+        self.latest_col = self._latest_valid_columns(data[self._required_pos]) if latest_col is None else latest_col
+        self._latest_for: Dict[frozenset, np.ndarray] = {}
+
+    @classmethod
+    def from_values(cls, values: np.ndarray, feature_names: Optional[Sequence[str]] = None,
+                    months: Optional[np.ndarray] = None) -> 'FeatureMatrix':
+        names = list(feature_names or FEATURES)
+        return cls(names, compute_features(values, names, months))
+
+    @staticmethod
+    def _latest_valid_columns(data: np.ndarray) -> np.ndarray:
+        # a month is usable once every feature is defined (the dropna() of the old pipeline)
+        valid = np.isfinite(data).all(axis=0)
+        if valid.shape[1] == 0:
+            return np.full(valid.shape[0], -1, dtype=np.intp)
+        last = valid.shape[1] - 1 - np.argmax(valid[:, ::-1], axis=1)
+        return np.where(valid.any(axis=1), last, -1).astype(np.intp)
+
+    def latest_cols(self, feature_names: Optional[Sequence[str]] = None) -> np.ndarray:
+        """Latest month where every feature in `feature_names` is defined (default: the required set)"""
+        if feature_names is None or set(feature_names) <= set(self.required):
+            return self.latest_col
+        key = frozenset(feature_names)
+        cols = self._latest_for.get(key)
+        if cols is None:
+            cols = self._latest_valid_columns(self.data[sorted(self.positions(feature_names))])
+            self._latest_for[key] = cols
+        return cols
+
+    def updated(self, values: np.ndarray, start_col: int, months: Optional[np.ndarray] = None) -> 'FeatureMatrix':
+        """Features for `values` where only columns >= start_col changed.
+
+        Columns before start_col are reused; the tail is recomputed from
+        `lookback` months of history, so appending a month costs one column.
+        """
+        lookback = max(FEATURES[n][1] for n in self.names)
+        lo = max(0, start_col - lookback)
+        tail = compute_features(values[:, lo:], self.names, None if months is None else months[lo:])[:, :, start_col - lo:]
+        head = np.array(self.data[:, :, :start_col], dtype=np.float64)
+        data = np.concatenate([head, tail], axis=2)
+
+        valid_tail = np.isfinite(tail[self._required_pos]).all(axis=0)
+        has_tail = valid_tail.any(axis=1) if valid_tail.shape[1] else np.zeros(len(values), dtype=bool)
+        latest = np.where(self.latest_col < start_col, self.latest_col, -1)
+        if valid_tail.shape[1]:
+            last_in_tail = start_col + valid_tail.shape[1] - 1 - np.argmax(valid_tail[:, ::-1], axis=1)
+            latest = np.where(has_tail, last_in_tail, latest)
+        # rows whose old latest month was in the (now invalid) tail need a rescan of the head
+        stale = ~has_tail & (self.latest_col >= start_col)
+        if stale.any():
+            latest[stale] = self._latest_valid_columns(head[self._required_pos][:, stale])
+        return FeatureMatrix(self.names, data, latest_col=latest.astype(np.intp))
+
+    def positions(self, feature_names: Sequence[str]) -> List[int]:
+        missing = [n for n in feature_names if n not in self._pos]
+        if missing:
+            raise KeyError(f"Feature(s) not computed: {missing}")
+        return [self._pos[n] for n in feature_names]
+
+    def latest(self, row: int, feature_names: Sequence[str]) -> np.ndarray:
+        """O(1) lookup of the latest feature vector for one commodity
+
+        Raises:
+            ValueError: The commodity has no month where every feature is defined
+        """
+        col = self.latest_cols(feature_names)[row]
+        if col < 0:
+            raise ValueError(f"Not enough history to compute {list(feature_names)} for row {row}")
+        return np.array(self.data[self.positions(feature_names), row, col], dtype=np.float64)
+
+    def latest_matrix(self, rows: Sequence[int], feature_names: Sequence[str]) -> np.ndarray:
+        """Latest feature vectors for several commodities, shape (len(rows), len(feature_names))
+
+        Rows without enough history for every feature (latest_cols() < 0) come back
+        all-NaN rather than picking up another month; callers filter them out first.
+        """
+        rows = np.asarray(rows, dtype=np.intp)
+        pos = np.asarray(self.positions(feature_names), dtype=np.intp)
+        cols = self.latest_cols(feature_names)[rows]
+        out = np.array(self.data[pos[:, None], rows[None, :], np.maximum(cols, 0)[None, :]].T, dtype=np.float64)
+        out[cols < 0] = np.nan
+        return out
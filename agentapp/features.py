@@ -1,38 +1,60 @@
+from typing import List, Dict, Optional, Sequence, Tuple
+import numpy as np
 import pandas as pd
-from typing import List, Dict
-from agentapp.product_matcher import find_matching_product, MATERIAL_KEYWORDS
+from agentapp.product_matcher import MATERIAL_KEYWORDS
+from agentapp.price_index import get_price_store
 
 KEYWORDS = MATERIAL_KEYWORDS  # For backward compatibility
 
 
+def latest_row(store, table, product: str, feature_names: Optional[Sequence[str]] = None) -> int:
+    """Row of the matched commodity with the most recent month where `feature_names` are defined"""
+    # Use improved product matching
+    rows = store.match(product, table)
+
+    if len(rows) == 0:
+        # below the fuzzy threshold; still point at the closest names
+        close = [table.names[i] for i, _ in table.product_index.fuzzy(product, 3)]
+        hint = f" Closest: {', '.join(close)}." if close else ""
+        raise ValueError(f"No material match found for '{product}' in CSV indices.{hint}")
+
+    row = table.pick_latest(rows, feature_names)
+    if row is None:
+        raise ValueError(f"Not enough historical data to compute features for '{product}'")
+    return row
+
+
 def build_latest_features(csv_path: str, product: str, feature_names: List[str]):
     """Return latest features for specified product as DataFrame-like row.
     Matches `comm_name` that contains product (case-insensitive).
+    Features are precomputed for all commodities when the store loads, so this is a lookup.
     """
-    df = pd.read_csv(csv_path)
+    store = get_price_store(csv_path)
+    table = store.table
+    return table.latest_frame(latest_row(store, table, product, feature_names), feature_names)
 
-    # Use improved product matching
-    mask = find_matching_product(df, product, 'comm_name')
-
-    if mask.sum() == 0:
-        raise ValueError(f"No material match found for '{product}' in CSV indices.")
-
-    sub = df[mask]
 
-    # index cols that start with 'indx'
-    index_cols = [c for c in sub.columns if c.startswith('indx')]
-    df_long = sub.melt(id_vars=['comm_name','comm_code','comm_wt'], value_vars=index_cols,
-                       var_name='month', value_name='price_index')
-    df_long['month'] = df_long['month'].str.replace('indx','')
-    df_long['date'] = pd.to_datetime(df_long['month'], format='%m%Y')
-    df_long = df_long.sort_values('date')
+def build_latest_feature_matrix(csv_path: str, products: Sequence[str],
+                                feature_names: List[str]) -> Tuple[pd.DataFrame, Dict[str, str]]:
+    """Latest features for many products in one gather.
 
-    df_long['lag_1'] = df_long.groupby('comm_name')['price_index'].shift(1)
-    df_long['lag_3_mean'] = df_long.groupby('comm_name')['price_index'].rolling(3).mean().reset_index(level=0, drop=True)
+    Args:
+        csv_path: Path to price_index.csv
+        products: Product names, resolved like build_latest_features
+        feature_names: Feature columns to return
 
-    df_long = df_long.dropna()
-    if df_long.empty:
-        raise ValueError(f"Not enough historical data to compute features for '{product}'")
-
-    latest = df_long.sort_values('date').iloc[[-1]]
-    return latest[feature_names]
+    Returns:
+        (DataFrame with one row per resolved product, indexed by product in input order,
+         {product: error message} for products that could not be resolved)
+    """
+    store = get_price_store(csv_path)
+    table = store.table  # one table for the whole batch
+    found, rows, errors = [], [], {}
+    for product in products:
+        try:
+            rows.append(latest_row(store, table, product, feature_names))
+            found.append(product)
+        except ValueError as e:
+            errors[product] = str(e)
+    data = table.latest_features(np.array(rows, dtype=np.intp), feature_names)
+    return pd.DataFrame(data, columns=list(feature_names), index=pd.Index(found, name='product')), errors
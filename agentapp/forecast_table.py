@@ -0,0 +1,181 @@
+"""
+Precomputed trend table for Material Wise
+Scores every commodity once per data load (and on a schedule) so /api/predict is a lookup
+"""
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from agentapp.feature_engine import DEFAULT_FEATURES
+from agentapp.features import latest_row
+from agentapp.forecasting import forecast_table
+from agentapp.model_registry import LoadedModel, ModelRegistry, get_model_registry
+from agentapp.prediction import fallback_trend_matrix, predict_trend_matrix
+from agentapp.price_index import DEFAULT_CSV_PATH, PriceIndexStore, PriceIndexTable, get_price_store
+
+REFRESH_SECONDS = float(os.getenv('FORECAST_REFRESH_SECONDS', str(24 * 3600)))
+
+logger = logging.getLogger(__name__)
+
+
+class _Forecasts:
+    """One immutable scoring pass: the table and model it was computed from, keyed by row"""
+
+    def __init__(self, table: PriceIndexTable, model_version: Optional[str], features: List[str],
+                 entries: Dict[int, Tuple[str, float, str, float, Dict]]):
+        self.table = table
+        self.model_version = model_version
+        self.features = features
+        self.entries = entries
+        self.computed_at = time.time()
+
+
+class ForecastTable:
+    """Trend, probability, model version and multi-horizon forecast for every commodity.
+
+    Refreshed in the background whenever the store publishes a new table
+    (reload or appended month) or the model registry swaps in a new version,
+    and every REFRESH_SECONDS once started. Entries computed from an older
+    table or model are never served: lookups miss until the refresh lands.
+    """
+
+    def __init__(self, store: PriceIndexStore, registry: ModelRegistry):
+        self.store = store
+        self.registry = registry
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self._current: Optional[_Forecasts] = None
+        self._lock = threading.Lock()
+        self._refreshing = threading.Event()
+        self._dirty = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        # the store publishes under its lock on whichever request noticed the change: only mark us stale there
+        store.subscribe(lambda table, start_col: self._table_published())
+        self.refresh()
+
+    def refresh(self, table: Optional[PriceIndexTable] = None) -> _Forecasts:
+        """Score every commodity with history for all model features and swap the result in
+
+        Works one partition at a time (one predict_proba per partition), so on a
+        partitioned snapshot the scan neither maps everything at once nor evicts
+        the partitions requests are using.
+        """
+        # resolve the table before taking our lock: the store calls refresh() under its own
+        table = table or self.store.table
+        with self._lock:
+            # this table's registry, never the process-wide one predict_trend_matrix would fall back to
+            loaded = self.registry.current()
+            features = loaded.features if loaded is not None else DEFAULT_FEATURES
+            entries = {}
+            for rows, part in table.iter_partitions():
+                # commodities too short for a longer-lookback model feature are left out (a miss), not NaN-scored
+                local = np.flatnonzero(part.latest_cols(np.arange(len(rows)), features) >= 0)
+                X = pd.DataFrame(part.latest_features(local, features), columns=features)
+                prices = X['price_index'].tolist() if 'price_index' in X else [None] * len(local)
+                outlook = forecast_table(part, local)
+                scored = predict_trend_matrix(X, loaded) if loaded is not None else fallback_trend_matrix(X)
+                for i, (row, price, (trend, prob, status)) in enumerate(zip(rows[local], prices, scored)):
+                    entries[int(row)] = (trend, prob, status, price, outlook.row(i))
+            self._current = _Forecasts(table, loaded.version if loaded is not None else None, list(features), entries)
+            self.refreshes += 1
+            return self._current
+
+    def _table_published(self) -> None:
+        # a refresh already running may have read the previous table: it goes round once more
+        self._dirty.set()
+        self._refresh_in_background()
+
+    def _refresh_in_background(self) -> None:
+        if self._refreshing.is_set():
+            return
+        self._refreshing.set()
+
+        def run():
+            try:
+                self._dirty.clear()
+                self.refresh()
+                # another table published while scoring: go again rather than miss until the next lookup
+                while self._dirty.is_set():
+                    self._dirty.clear()
+                    self.refresh()
+            except Exception:
+                logger.exception('background forecast refresh failed')
+            finally:
+                self._refreshing.clear()
+        threading.Thread(target=run, name='forecast-refresh', daemon=True).start()
+
+    def lookup(self, product: str, loaded: Optional[LoadedModel] = None) -> Optional[Dict]:
+        """Precomputed prediction for `product`, or None on a miss (unknown product or stale table)"""
+        current = self._current
+        table = self.store.table
+        loaded = loaded or self.registry.current()
+        model_version = loaded.version if loaded is not None else None
+        if current is None or current.table is not table or current.model_version != model_version:
+            # new model (or a refresh that lost a race with a newer table): rescore off the request path
+            self.misses += 1
+            self._refresh_in_background()
+            return None
+        try:
+            entry = current.entries.get(latest_row(self.store, table, product, current.features))
+        except ValueError:
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        trend, prob, status, price, outlook = entry
+        return {'trend': trend, 'trend_prob': prob, 'model_status': status,
+                'model_version': current.model_version, 'price_index': price, 'forecast': outlook}
+
+    def start(self, interval: float = REFRESH_SECONDS) -> None:
+        """Refresh every `interval` seconds on a daemon thread (the nightly job)"""
+        if self._thread is not None:
+            return
+
+        def loop():
+            while not self._stop.wait(interval):
+                try:
+                    self.refresh()
+                except Exception:
+                    logger.exception('scheduled forecast refresh failed; serving forecasts from %s',
+                                     time.ctime(self._current.computed_at) if self._current else 'nowhere')
+        self._thread = threading.Thread(target=loop, name='forecast-schedule', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def stats(self) -> Dict[str, object]:
+        current = self._current
+        return {
+            'commodities': len(current.entries) if current else 0,
+            'model_version': current.model_version if current else None,
+            'computed_at': current.computed_at if current else None,
+            'refreshes': self.refreshes,
+            'hits': self.hits,
+            'misses': self.misses,
+        }
+
+
+_TABLES: Dict[str, ForecastTable] = {}
+_TABLES_LOCK = threading.Lock()
+
+
+def get_forecast_table(csv_path: str = DEFAULT_CSV_PATH) -> ForecastTable:
+    """Return the process-wide forecast table for `csv_path`, scoring it on first use"""
+    key = os.path.abspath(csv_path)
+    forecasts = _TABLES.get(key)
+    if forecasts is None:
+        with _TABLES_LOCK:
+            forecasts = _TABLES.get(key)
+            if forecasts is None:
+                forecasts = ForecastTable(get_price_store(key), get_model_registry())
+                _TABLES[key] = forecasts
+    return forecasts
@@ -1,9 +1,10 @@
 import re
-import requests
 from bs4 import BeautifulSoup
 from typing import List, Dict, Optional
 from urllib.parse import urljoin, urlparse
 
+from agentapp.ingestion.page_cache import get_page_cache
+
 
 def _extract_numbers(text: str) -> List[int]:
     s = text.replace(',', '').replace('\u20b9', '')
@@ -98,99 +99,108 @@ def find_best_link_for_material(material: str, site: str = 'buildersmart') -> Op
 
             return list(urls)
 
-    for url in search_urls:
-        try:
-            r = requests.get(url, headers=headers, timeout=10)
-            r.raise_for_status()
-            soup = BeautifulSoup(r.text, 'html.parser')
-
-            # domain hint to filter script URLs
-            domain_hint = None
-            if 'buildersmart' in url:
-                domain_hint = 'buildersmart.in'
-            if 'indiamart' in url:
-                domain_hint = 'indiamart.com'
-
-            # collect candidates from anchors, data-/onclick attributes, and aria/title attributes
-            for tag in soup.find_all(True):
-                # prefer anchor hrefs
-                cand = None
-                text = (tag.get_text(separator=' ', strip=True) or '')
-                # common data attributes
-                for attr in ('href', 'data-href', 'data-url', 'data-link', 'data-target', 'data-redirect'):
-                    val = tag.get(attr)
-                    if val:
-                        cand = val
-                        break
-
-                # onclick handlers may contain URLs
-                if not cand and tag.get('onclick'):
-                    c = _extract_url_from_onclick(tag.get('onclick'))
-                    if c:
-                        cand = c
-
-                # sometimes aria-label/title contain clearer category names and link is on parent
-                if not cand:
-                    for attr in ('data-category', 'data-cat', 'title', 'aria-label'):
-                        v = tag.get(attr)
-                        if v and any(tok in v.lower() for tok in tokens):
-                            # look for nearest anchor
-                            parent_a = tag.find_parent('a')
-                            if parent_a and parent_a.get('href'):
-                                cand = parent_a.get('href')
-                                break
-
-                if cand:
-                    # ignore fragments and javascript pseudo-links
-                    if cand.startswith('javascript:') or cand.startswith('#'):
-                        continue
-                    full = urljoin(url, cand)
-                    # reject static assets and CDN resources
-                    def _is_static(u: str) -> bool:
-                        low = u.lower()
-                        static_signs = ['.png', '.jpg', '.jpeg', '.gif', '.svg', '.ico', '.css', '.woff', '.woff2', '.ttf', 'fontawesome', 'cdn-media', '/static/', '/assets/', '/media/']
-                        for s in static_signs:
-                            if s in low:
-                                return True
-                        return False
-
-                    if _is_static(full):
-                        continue
-
-                    # domain hint enforcement
-                    try:
-                        p = urlparse(full)
-                    except Exception:
-                        p = None
+    def _best_in_page(url: str, html: str) -> List:
+        """[url, score] of the best candidate on one search page"""
+        page_best = [None, 0]
+        soup = BeautifulSoup(html, 'html.parser')
+
+        # domain hint to filter script URLs
+        domain_hint = None
+        if 'buildersmart' in url:
+            domain_hint = 'buildersmart.in'
+        if 'indiamart' in url:
+            domain_hint = 'indiamart.com'
+
+        # collect candidates from anchors, data-/onclick attributes, and aria/title attributes
+        for tag in soup.find_all(True):
+            # prefer anchor hrefs
+            cand = None
+            text = (tag.get_text(separator=' ', strip=True) or '')
+            # common data attributes
+            for attr in ('href', 'data-href', 'data-url', 'data-link', 'data-target', 'data-redirect'):
+                val = tag.get(attr)
+                if val:
+                    cand = val
+                    break
+
+            # onclick handlers may contain URLs
+            if not cand and tag.get('onclick'):
+                c = _extract_url_from_onclick(tag.get('onclick'))
+                if c:
+                    cand = c
+
+            # sometimes aria-label/title contain clearer category names and link is on parent
+            if not cand:
+                for attr in ('data-category', 'data-cat', 'title', 'aria-label'):
+                    v = tag.get(attr)
+                    if v and any(tok in v.lower() for tok in tokens):
+                        # look for nearest anchor
+                        parent_a = tag.find_parent('a')
+                        if parent_a and parent_a.get('href'):
+                            cand = parent_a.get('href')
+                            break
+
+            if cand:
+                # ignore fragments and javascript pseudo-links
+                if cand.startswith('javascript:') or cand.startswith('#'):
+                    continue
+                full = urljoin(url, cand)
+                # reject static assets and CDN resources
+                def _is_static(u: str) -> bool:
+                    low = u.lower()
+                    static_signs = ['.png', '.jpg', '.jpeg', '.gif', '.svg', '.ico', '.css', '.woff', '.woff2', '.ttf', 'fontawesome', 'cdn-media', '/static/', '/assets/', '/media/']
+                    for s in static_signs:
+                        if s in low:
+                            return True
+                    return False
+
+                if _is_static(full):
+                    continue
 
-                    if domain_hint and p and domain_hint not in (p.netloc or '') and domain_hint not in full:
-                        # if candidate is not on-site, deprioritize
-                        continue
+                # domain hint enforcement
+                try:
+                    p = urlparse(full)
+                except Exception:
+                    p = None
 
-                    surrounding = ''
-                    # include parent text as context
-                    if tag.parent:
-                        surrounding = tag.parent.get_text(separator=' ', strip=True)
-
-                    # boost score if path contains tokens
-                    path = (p.path if p else '') if p else ''
-                    path_score = 0
-                    for tok in tokens:
-                        if tok in path.lower():
-                            path_score += 3
-
-                    score = _score_match(text + ' ' + full + ' ' + surrounding, tokens) + path_score
-                    if score > best[1]:
-                        best = (full, score)
-
-            # also parse inline scripts for possible category JSON/url
-            for script_url in _find_urls_in_scripts(soup, domain_hint=domain_hint):
-                full = script_url
-                # use the script url string as context
-                score = _score_match(full, tokens)
-                if score > best[1]:
-                    best = (full, score)
+                if domain_hint and p and domain_hint not in (p.netloc or '') and domain_hint not in full:
+                    # if candidate is not on-site, deprioritize
+                    continue
 
+                surrounding = ''
+                # include parent text as context
+                if tag.parent:
+                    surrounding = tag.parent.get_text(separator=' ', strip=True)
+
+                # boost score if path contains tokens
+                path = (p.path if p else '') if p else ''
+                path_score = 0
+                for tok in tokens:
+                    if tok in path.lower():
+                        path_score += 3
+
+                score = _score_match(text + ' ' + full + ' ' + surrounding, tokens) + path_score
+                if score > page_best[1]:
+                    page_best = [full, score]
+
+        # also parse inline scripts for possible category JSON/url
+        for script_url in _find_urls_in_scripts(soup, domain_hint=domain_hint):
+            full = script_url
+            # use the script url string as context
+            score = _score_match(full, tokens)
+            if score > page_best[1]:
+                page_best = [full, score]
+
+        return page_best
+
+    cache = get_page_cache()
+    for url in search_urls:
+        try:
+            page = cache.fetch(url, headers=headers)
+            # parsing a search page dominates a crawl; reuse the result while the page is unchanged
+            cand, score = cache.derived(page, 'best_link:' + ' '.join(tokens), lambda html: _best_in_page(url, html))
+            if score > best[1]:
+                best = (cand, score)
         except Exception:
             continue
 
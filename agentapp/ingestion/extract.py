@@ -0,0 +1,138 @@
+"""
+Single-pass price extraction from marketplace HTML
+Parses with lxml, reads JSON-LD offers and price-marked nodes, and scans each text once with one regex
+"""
+import json
+import math
+import re
+from typing import Iterable, List, Optional
+
+import lxml.etree
+import lxml.html
+
+# a currency marker followed by an amount, optionally a range ("Rs. 420 - 450")
+PRICE_RE = re.compile(
+    r'(?:₹|\bRs\.?|\bINR)\s*(\d[\d,]*)(?:\.\d+)?'
+    r'(?:\s*(?:-|–|to)\s*(?:₹|\bRs\.?|\bINR)?\s*(\d[\d,]*)(?:\.\d+)?)?'
+)
+
+# nodes whose class, id or itemprop says they hold a price
+_PRICE_NODES = ("//*[contains(translate(@class, 'PRICE', 'price'), 'price')"
+                " or contains(translate(@id, 'PRICE', 'price'), 'price')"
+                " or @itemprop='price' or @itemprop='lowPrice' or @itemprop='highPrice']")
+_SKIP_TAGS = {'script', 'style', 'noscript', 'template'}
+_OFFER_KEYS = ('price', 'lowPrice', 'highPrice')
+
+
+def prices_in_text(text: str) -> List[int]:
+    """Amounts that follow a currency marker in `text`"""
+    out = []
+    for low, high in PRICE_RE.findall(text):
+        out.append(int(low.replace(',', '')))
+        if high:
+            out.append(int(high.replace(',', '')))
+    return out
+
+
+def _offer_prices(obj) -> Iterable[float]:
+    if isinstance(obj, list):
+        for item in obj:
+            yield from _offer_prices(item)
+    elif isinstance(obj, dict):
+        for key in _OFFER_KEYS:
+            if key in obj:
+                try:
+                    value = float(str(obj[key]).replace(',', ''))
+                except ValueError:
+                    continue
+                if math.isfinite(value):
+                    yield value
+        for key in ('offers', '@graph', 'itemListElement', 'item'):
+            if key in obj:
+                yield from _offer_prices(obj[key])
+
+
+def json_ld_prices(doc) -> List[int]:
+    """Offer prices from <script type="application/ld+json"> blocks (products, lists, @graph)"""
+    prices = []
+    for script in doc.xpath("//script[@type='application/ld+json']"):
+        try:
+            data = json.loads(script.text or '{}')
+        except ValueError:
+            continue
+        prices.extend(int(p) for p in _offer_prices(data))
+    return prices
+
+
+def _text(node) -> str:
+    """Text of a subtree in one walk, skipping scripts and comments"""
+    parts = []
+
+    def walk(el):
+        if el.text:
+            parts.append(el.text)
+        for child in el:
+            if isinstance(child.tag, str) and child.tag not in _SKIP_TAGS:
+                walk(child)
+            if child.tail:
+                parts.append(child.tail)
+    walk(node)
+    # separate text nodes so "₹" and "420" in sibling spans still read as one price
+    return ' '.join(parts)
+
+
+def marked_prices(doc) -> List[int]:
+    """Prices inside price-marked nodes, each subtree scanned once (outermost match only)"""
+    nodes = doc.xpath(_PRICE_NODES)
+    marked = set(nodes)
+    prices = []
+    for node in nodes:
+        if any(a in marked for a in node.iterancestors()):
+            continue  # already covered by an enclosing price node
+        content = node.get('content')
+        if content and node.get('itemprop'):
+            try:
+                prices.append(int(float(content.replace(',', ''))))
+                continue
+            except ValueError:
+                pass
+        prices.extend(prices_in_text(_text(node)))
+    return prices
+
+
+def extract_prices(html: str, doc=None) -> List[int]:
+    """Prices on a page, most specific source first.
+
+    JSON-LD offers win; otherwise price-marked nodes; otherwise every
+    currency-marked amount in the body text. Each piece of text is scanned
+    once, so nested containers no longer count the same price repeatedly.
+
+    Args:
+        html: Page source
+        doc: Already parsed lxml document (parsed from `html` when omitted)
+
+    Returns:
+        Integer prices in page order (unfiltered)
+    """
+    if doc is None:
+        doc = parse(html)
+        if doc is None:
+            return []
+    prices = json_ld_prices(doc)
+    if prices:
+        return prices
+    prices = marked_prices(doc)
+    if prices:
+        return prices
+    body = doc.find('body')
+    return prices_in_text(_text(body if body is not None else doc))
+
+
+def parse(html: str) -> Optional[object]:
+    """lxml document for `html`, or None for an empty/unparseable page"""
+    if not html or not html.strip():
+        return None
+    try:
+        return lxml.html.document_fromstring(html)
+    except (ValueError, lxml.etree.ParserError):
+        return None
@@ -0,0 +1,143 @@
+"""
+Shared HTTP client for every scraper and crawler
+One requests.Session per process: per-host keep-alive pools, one retry and timeout policy, per-host breakers and rate limits
+"""
+import os
+import threading
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from agentapp.deadline import Deadline
+from agentapp.ingestion.throttle import MAX_WAIT_SECONDS, HostGuard, host_limit
+
+CONNECT_TIMEOUT = float(os.getenv('HTTP_CONNECT_TIMEOUT_SECONDS', '5'))
+READ_TIMEOUT = float(os.getenv('HTTP_READ_TIMEOUT_SECONDS', '10'))
+POOL_HOSTS = int(os.getenv('HTTP_POOL_HOSTS', '16'))        # hosts with a pool kept open
+POOL_PER_HOST = int(os.getenv('HTTP_POOL_PER_HOST', '10'))  # idle keep-alive connections per host
+
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (compatible; material-wise-agent/1.0)",
+    "Accept-Language": "en-IN,en;q=0.9",
+}
+
+
+# deadline of the request this thread is sending, read by DeadlineRetry between attempts
+_active = threading.local()
+
+
+class DeadlineRetry(Retry):
+    """Retry policy that stops retrying (and backing off) once the request's deadline has passed"""
+
+    def is_exhausted(self) -> bool:
+        deadline = getattr(_active, 'deadline', None)
+        return super().is_exhausted() or (deadline is not None and deadline.expired())
+
+    def get_backoff_time(self) -> float:
+        deadline = getattr(_active, 'deadline', None)
+        backoff = super().get_backoff_time()
+        return backoff if deadline is None else min(backoff, deadline.remaining())
+
+
+def default_retry() -> Retry:
+    # idempotent methods only. 429 and Retry-After are left to the host's breaker and limiter:
+    # sleeping through them here held every candidate URL for minutes while a site throttled us
+    return DeadlineRetry(total=3, backoff_factor=0.6, status_forcelist=(500, 502, 503, 504),
+                 allowed_methods=frozenset({'GET', 'HEAD'}), raise_on_status=False,
+                 respect_retry_after_header=False)
+
+
+class HttpClient:
+    """Thread-safe pooled GET client.
+
+    Connections to a host are reused across calls and threads, so a scrape
+    that tries several candidate URLs on the same site pays for one TLS
+    handshake instead of one per URL. Each host also has a circuit breaker
+    and token bucket (agentapp.ingestion.throttle): while a host is failing
+    or throttling us, get() raises HostUnavailable at once.
+    """
+
+    def __init__(self, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT), retry: Optional[Retry] = None,
+                 pool_hosts: int = POOL_HOSTS, pool_per_host: int = POOL_PER_HOST,
+                 headers: Optional[Dict[str, str]] = None):
+        self.timeout = timeout
+        self.requests = 0
+        self.errors = 0
+        self.session = requests.Session()
+        self.session.headers.update(DEFAULT_HEADERS if headers is None else headers)
+        self._adapter = HTTPAdapter(max_retries=retry or default_retry(), pool_connections=pool_hosts,
+                                    pool_maxsize=pool_per_host, pool_block=False)
+        self.session.mount('https://', self._adapter)
+        self.session.mount('http://', self._adapter)
+        self._guards: Dict[str, HostGuard] = {}
+        self._guards_lock = threading.Lock()
+
+    def guard(self, url: str) -> HostGuard:
+        host = (urlsplit(url).hostname or '').lower()
+        guard = self._guards.get(host)
+        if guard is None:
+            with self._guards_lock:
+                guard = self._guards.get(host)
+                if guard is None:
+                    guard = self._guards[host] = HostGuard(host, *host_limit(host))
+        return guard
+
+    def get(self, url: str, timeout=None, deadline: Optional[Deadline] = None, **kwargs) -> requests.Response:
+        """requests.get with the shared pools, retries, default timeout and host guard
+
+        With a `deadline`, the timeout, the rate-limit wait and any retries are
+        all cut to the time left, so the call returns or raises by then.
+
+        Raises:
+            HostUnavailable: The host's breaker is open or its rate limit queue is too long
+        """
+        timeout = timeout or self.timeout
+        max_wait = MAX_WAIT_SECONDS
+        if deadline is not None:
+            timeout = deadline.timeout(timeout)
+            max_wait = min(max_wait, deadline.remaining())
+        guard = self.guard(url)
+        guard.before(max_wait)
+        self.requests += 1
+        response = None
+        _active.deadline = deadline
+        try:
+            response = self.session.get(url, timeout=timeout, **kwargs)
+            return response
+        except requests.RequestException:
+            self.errors += 1
+            raise
+        finally:
+            _active.deadline = None
+            guard.after(response)
+
+    def stats(self) -> Dict[str, object]:
+        pools = self._adapter.poolmanager.pools
+        hosts = {}
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is not None:
+                hosts[f"{key.key_scheme}://{key.key_host}:{key.key_port}"] = {
+                    'connections_opened': pool.num_connections, 'requests': pool.num_requests}
+        guards = {host: guard.stats() for host, guard in list(self._guards.items())}
+        return {'requests': self.requests, 'errors': self.errors, 'hosts': hosts, 'guards': guards}
+
+    def close(self) -> None:
+        self.session.close()
+
+
+_CLIENT: Optional[HttpClient] = None
+_CLIENT_LOCK = threading.Lock()
+
+
+def get_http_client() -> HttpClient:
+    """Return the process-wide HTTP client, creating it on first use"""
+    global _CLIENT
+    if _CLIENT is None:
+        with _CLIENT_LOCK:
+            if _CLIENT is None:
+                _CLIENT = HttpClient()
+    return _CLIENT
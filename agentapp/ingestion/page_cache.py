@@ -0,0 +1,244 @@
+"""
+On-disk cache of fetched marketplace pages with conditional GET
+Raw HTML is stored gzip-compressed next to its ETag/Last-Modified; unchanged pages are not re-parsed
+
+Layout (default data/page_cache/, PAGE_CACHE_DIR):
+    <sha256(url)[:2]>/<sha256(url)>.html.gz   page body as served
+    <sha256(url)[:2]>/<sha256(url)>.json      url, etag, last_modified, content_sha256, fetched_at,
+                                              and results derived from this exact content
+
+Bounded by PAGE_CACHE_MAX_MB (default 256) and PAGE_CACHE_MAX_AGE_DAYS (default 30): a write
+sweeps the directory (at most once a minute per process) and drops expired entries, then the
+least recently used ones until the cache fits. Every fetch rewrites the .json, so its mtime is the last use.
+"""
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from agentapp.ingestion.http_client import HttpClient, get_http_client
+
+CACHE_DIR = os.getenv('PAGE_CACHE_DIR', os.path.abspath(os.path.join(
+    os.path.dirname(__file__), '..', '..', 'data', 'page_cache')))
+MAX_BYTES = int(float(os.getenv('PAGE_CACHE_MAX_MB', '256')) * 1024 * 1024)
+MAX_AGE_SECONDS = float(os.getenv('PAGE_CACHE_MAX_AGE_DAYS', '30')) * 24 * 3600
+SWEEP_INTERVAL_SECONDS = 60.0
+
+
+class Page:
+    """A fetched page: `changed` is False when the server said 304 or sent identical content"""
+
+    def __init__(self, url: str, text: str, content_sha256: str, changed: bool, status: str, meta: Dict[str, Any]):
+        self.url = url
+        self.text = text
+        self.content_sha256 = content_sha256
+        self.changed = changed
+        self.status = status  # 'new', 'modified', 'unchanged' (200, same bytes) or 'not_modified' (304)
+        self.meta = meta
+
+
+def _atomic_write(path: str, data: bytes) -> None:
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+class PageCache:
+    """Conditional-GET fetcher backed by gzip files, shared by every worker on the host."""
+
+    def __init__(self, directory: str = CACHE_DIR, client: Optional[HttpClient] = None,
+                 max_bytes: int = MAX_BYTES, max_age: float = MAX_AGE_SECONDS,
+                 sweep_interval: float = SWEEP_INTERVAL_SECONDS):
+        self.directory = directory
+        self.client = client
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.sweep_interval = sweep_interval
+        self.fetches = 0
+        self.not_modified = 0
+        self.unchanged = 0
+        self.derived_hits = 0
+        self.evicted = 0
+        self._last_sweep: Optional[float] = None
+        self._sweep_lock = threading.Lock()
+
+    def _paths(self, url: str):
+        digest = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        base = os.path.join(self.directory, digest[:2], digest)
+        return base + '.json', base + '.html.gz'
+
+    def _load(self, url: str) -> Optional[Dict[str, Any]]:
+        meta_path, body_path = self._paths(url)
+        try:
+            with open(meta_path, encoding='utf-8') as f:
+                meta = json.load(f)
+            with gzip.open(body_path, 'rb') as f:
+                body = f.read()
+        except (OSError, ValueError, EOFError):
+            return None
+        if meta.get('url') != url or hashlib.sha256(body).hexdigest() != meta.get('content_sha256'):
+            return None  # torn or foreign entry: refetch unconditionally
+        meta['_body'] = body
+        return meta
+
+    def _save_meta(self, url: str, meta: Dict[str, Any]) -> None:
+        meta_path, _ = self._paths(url)
+        os.makedirs(os.path.dirname(meta_path), exist_ok=True)
+        _atomic_write(meta_path, json.dumps({k: v for k, v in meta.items() if k != '_body'}).encode('utf-8'))
+
+    def fetch(self, url: str, **kwargs) -> Page:
+        """GET `url`, revalidating a cached copy with If-None-Match / If-Modified-Since.
+
+        Raises:
+            requests.HTTPError: For error statuses, like response.raise_for_status()
+        """
+        client = self.client or get_http_client()
+        cached = self._load(url)
+        headers = dict(kwargs.pop('headers', None) or {})
+        if cached is not None:
+            if cached.get('etag'):
+                headers['If-None-Match'] = cached['etag']
+            if cached.get('last_modified'):
+                headers['If-Modified-Since'] = cached['last_modified']
+        self.fetches += 1
+        r = client.get(url, headers=headers, **kwargs)
+
+        if r.status_code == 304 and cached is not None:
+            self.not_modified += 1
+            cached['fetched_at'] = time.time()
+            self._save_meta(url, cached)
+            return self._page(url, cached, changed=False, status='not_modified')
+        r.raise_for_status()
+
+        body = r.content
+        digest = hashlib.sha256(body).hexdigest()
+        if cached is not None and digest == cached['content_sha256']:
+            # server ignores validators but the page did not change; keep derived results
+            self.unchanged += 1
+            cached.update(etag=r.headers.get('ETag') or cached.get('etag'),
+                          last_modified=r.headers.get('Last-Modified') or cached.get('last_modified'),
+                          fetched_at=time.time())
+            self._save_meta(url, cached)
+            return self._page(url, cached, changed=False, status='unchanged')
+
+        meta = {
+            'url': url,
+            'etag': r.headers.get('ETag'),
+            'last_modified': r.headers.get('Last-Modified'),
+            'encoding': r.encoding or r.apparent_encoding or 'utf-8',
+            'content_sha256': digest,
+            'fetched_at': time.time(),
+            'derived': {},
+            '_body': body,
+        }
+        meta_path, body_path = self._paths(url)
+        os.makedirs(os.path.dirname(body_path), exist_ok=True)
+        _atomic_write(body_path, gzip.compress(body, compresslevel=6))
+        self._save_meta(url, meta)
+        self._maybe_sweep()
+        return self._page(url, meta, changed=True, status='modified' if cached is not None else 'new')
+
+    def _maybe_sweep(self) -> None:
+        now = time.monotonic()
+        if self._last_sweep is not None and now - self._last_sweep < self.sweep_interval:
+            return
+        if not self._sweep_lock.acquire(blocking=False):
+            return  # another thread is sweeping
+        try:
+            self._last_sweep = now
+            self.sweep()
+        finally:
+            self._sweep_lock.release()
+
+    def _entries(self) -> List[Tuple[float, int, List[str]]]:
+        """(last use, bytes, paths) for every cached page"""
+        found: Dict[str, Dict[str, Any]] = {}
+        try:
+            shards = [d.path for d in os.scandir(self.directory) if d.is_dir()]
+        except OSError:
+            return []
+        for shard in shards:
+            try:
+                files = list(os.scandir(shard))
+            except OSError:
+                continue
+            for f in files:
+                digest, _, ext = f.name.partition('.')
+                if ext not in ('json', 'html.gz'):
+                    continue  # in-flight .tmp writes
+                try:
+                    st = f.stat()
+                except OSError:
+                    continue
+                entry = found.setdefault(digest, {'size': 0, 'paths': []})
+                entry[ext] = st.st_mtime
+                entry['size'] += st.st_size
+                entry['paths'].append(f.path)
+        # the .json is rewritten on every fetch; a body left without one is as old as itself
+        return [(e.get('json', e.get('html.gz')), e['size'], e['paths']) for e in found.values()]
+
+    def sweep(self) -> Dict[str, int]:
+        """Drop entries unused for max_age, then least recently used ones until under max_bytes"""
+        entries = sorted(self._entries())  # oldest first
+        total = sum(size for _, size, _ in entries)
+        cutoff = time.time() - self.max_age
+        removed = 0
+        for used, size, paths in entries:
+            if used >= cutoff and total <= self.max_bytes:
+                break
+            # meta first: a reader that still finds the body without it just refetches
+            for path in sorted(paths, key=lambda p: not p.endswith('.json')):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            total -= size
+            removed += 1
+        self.evicted += removed
+        return {'removed': removed, 'bytes': total}
+
+    @staticmethod
+    def _page(url: str, meta: Dict[str, Any], changed: bool, status: str) -> Page:
+        text = meta['_body'].decode(meta.get('encoding') or 'utf-8', errors='replace')
+        return Page(url, text, meta['content_sha256'], changed, status, meta)
+
+    def derived(self, page: Page, name: str, compute: Callable[[str], Any]) -> Any:
+        """`compute(page.text)`, reused while the page content is unchanged (must be JSON-serializable)"""
+        derived = page.meta.setdefault('derived', {})
+        entry = derived.get(name)
+        if entry is not None and entry.get('content_sha256') == page.content_sha256:
+            self.derived_hits += 1
+            return entry['value']
+        value = compute(page.text)
+        derived[name] = {'content_sha256': page.content_sha256, 'value': value}
+        self._save_meta(page.url, page.meta)
+        return value
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            'directory': self.directory,
+            'fetches': self.fetches,
+            'not_modified': self.not_modified,
+            'unchanged': self.unchanged,
+            'derived_hits': self.derived_hits,
+            'evicted': self.evicted,
+            'max_bytes': self.max_bytes,
+        }
+
+
+_CACHE: Optional[PageCache] = None
+_CACHE_LOCK = threading.Lock()
+
+
+def get_page_cache() -> PageCache:
+    """Return the process-wide page cache"""
+    global _CACHE
+    if _CACHE is None:
+        with _CACHE_LOCK:
+            if _CACHE is None:
+                _CACHE = PageCache()
+    return _CACHE
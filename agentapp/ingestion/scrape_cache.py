@@ -0,0 +1,172 @@
+"""
+Persistent cache of marketplace scrape results
+SQLite-backed so it survives restarts and is shared by every worker; stale entries are served while refreshing
+
+An entry younger than its TTL is served as is. An older one (up to MAX_STALE_SECONDS) is
+served immediately and re-scraped on a background thread; a lease column in the table
+makes sure only one worker refreshes a given entry at a time. Anything older, or missing,
+is scraped on the request path. Failed scrapes are cached for a shorter NEGATIVE_TTL and
+never replace a good entry.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from typing import Any, Callable, Dict, Optional, Tuple
+
+CACHE_PATH = os.getenv('SCRAPE_CACHE_PATH', os.path.abspath(os.path.join(
+    os.path.dirname(__file__), '..', '..', 'data', 'scrape_cache.sqlite3')))
+TTL_SECONDS = float(os.getenv('SCRAPE_CACHE_TTL_SECONDS', str(12 * 3600)))
+NEGATIVE_TTL_SECONDS = float(os.getenv('SCRAPE_CACHE_NEGATIVE_TTL_SECONDS', '900'))
+MAX_STALE_SECONDS = float(os.getenv('SCRAPE_CACHE_MAX_STALE_SECONDS', str(7 * 24 * 3600)))
+REFRESH_LEASE_SECONDS = 120  # a refresh that has not finished by then may be retried by another worker
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS scrape_cache (
+    source TEXT NOT NULL,
+    key TEXT NOT NULL,
+    result TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    refreshing_since REAL,
+    PRIMARY KEY (source, key)
+)
+"""
+
+
+def cache_key(product: str) -> str:
+    """Scrapes depend on the product text only up to case and spacing"""
+    return ' '.join(product.lower().split())
+
+
+class ScrapeCache:
+    """Stale-while-revalidate cache of scraper results keyed by (source, normalized product)."""
+
+    def __init__(self, path: str = CACHE_PATH, ttl: float = TTL_SECONDS,
+                 negative_ttl: float = NEGATIVE_TTL_SECONDS, max_stale: float = MAX_STALE_SECONDS):
+        self.path = path
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_stale = max_stale
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.execute('PRAGMA journal_mode=WAL')  # readers do not block the refreshing writer
+            conn.execute(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        # one short-lived connection per call: sqlite3 connections are not shared across threads
+        return sqlite3.connect(self.path, timeout=10, isolation_level=None)
+
+    def read(self, source: str, product: str) -> Optional[Tuple[Dict[str, Any], float]]:
+        """(result, fetched_at) for an entry regardless of age, or None"""
+        with closing(self._connect()) as conn:
+            row = conn.execute('SELECT result, fetched_at FROM scrape_cache WHERE source = ? AND key = ?',
+                               (source, cache_key(product))).fetchone()
+        return (json.loads(row[0]), row[1]) if row else None
+
+    def write(self, source: str, product: str, result: Dict[str, Any], fetched_at: Optional[float] = None) -> None:
+        with closing(self._connect()) as conn:
+            conn.execute('INSERT OR REPLACE INTO scrape_cache (source, key, result, fetched_at, refreshing_since) '
+                         'VALUES (?, ?, ?, ?, NULL)',
+                         (source, cache_key(product), json.dumps(result), time.time() if fetched_at is None else fetched_at))
+
+    def _claim(self, source: str, key: str) -> bool:
+        # atomic across workers: only the first UPDATE within the lease window matches
+        now = time.time()
+        with closing(self._connect()) as conn:
+            cur = conn.execute('UPDATE scrape_cache SET refreshing_since = ? WHERE source = ? AND key = ? '
+                               'AND (refreshing_since IS NULL OR refreshing_since < ?)',
+                               (now, source, key, now - REFRESH_LEASE_SECONDS))
+            return cur.rowcount == 1
+
+    def _release(self, source: str, key: str) -> None:
+        with closing(self._connect()) as conn:
+            conn.execute('UPDATE scrape_cache SET refreshing_since = NULL WHERE source = ? AND key = ?', (source, key))
+
+    def _revalidate(self, source: str, product: str, scrape: Callable[[str], Dict[str, Any]]) -> None:
+        key = cache_key(product)
+        with self._lock:
+            if (source, key) in self._refreshing:
+                return
+            self._refreshing.add((source, key))
+        if not self._claim(source, key):
+            with self._lock:
+                self._refreshing.discard((source, key))
+            return
+
+        def run():
+            try:
+                result = scrape(product)
+                previous = self.read(source, product)
+                if result.get('status') == 'available' or previous is None \
+                        or previous[0].get('status') != 'available':
+                    self.write(source, product, result)
+                    self.refreshes += 1
+                else:
+                    self._release(source, key)
+            except Exception:
+                self._release(source, key)
+            finally:
+                with self._lock:
+                    self._refreshing.discard((source, key))
+        threading.Thread(target=run, name=f'scrape-refresh-{source}', daemon=True).start()
+
+    def get(self, source: str, product: str, scrape: Callable[[str], Dict[str, Any]],
+            refresh: Optional[Callable[[str], Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """Cached `scrape(product)` with a `cache` entry: status (fresh/stale/miss) and age_seconds
+
+        `refresh` (default: `scrape`) re-scrapes a stale entry in the background, e.g. without the
+        request deadline `scrape` is bound to. A miss whose scrape raises is not cached.
+        """
+        entry = self.read(source, product)
+        if entry is not None:
+            result, fetched_at = entry
+            age = max(0.0, time.time() - fetched_at)
+            ttl = self.ttl if result.get('status') == 'available' else self.negative_ttl
+            if age < ttl:
+                self.hits += 1
+                return _annotate(result, 'fresh', age, fetched_at)
+            if age < self.max_stale:
+                self.stale_hits += 1
+                self._revalidate(source, product, refresh or scrape)
+                return _annotate(result, 'stale', age, fetched_at)
+        self.misses += 1
+        result = scrape(product)
+        fetched_at = time.time()
+        self.write(source, product, result, fetched_at)
+        return _annotate(result, 'miss', 0.0, fetched_at)
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            'path': self.path,
+            'ttl_seconds': self.ttl,
+            'hits': self.hits,
+            'stale_hits': self.stale_hits,
+            'misses': self.misses,
+            'refreshes': self.refreshes,
+        }
+
+
+def _annotate(result: Dict[str, Any], status: str, age: float, fetched_at: float) -> Dict[str, Any]:
+    return dict(result, cache={'status': status, 'age_seconds': round(age, 1), 'fetched_at': fetched_at})
+
+
+_CACHE: Optional[ScrapeCache] = None
+_CACHE_LOCK = threading.Lock()
+
+
+def get_scrape_cache() -> ScrapeCache:
+    """Return the process-wide scrape cache, opening the SQLite file on first use"""
+    global _CACHE
+    if _CACHE is None:
+        with _CACHE_LOCK:
+            if _CACHE is None:
+                _CACHE = ScrapeCache()
+    return _CACHE
@@ -1,18 +1,13 @@
+import os
 import re
-import json
-import requests
-from bs4 import BeautifulSoup
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 import numpy as np
-from typing import Dict, Any, List
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
+from typing import Callable, Dict, Any, List, Optional, Sequence, Tuple
 
-
-def _extract_numbers(text: str) -> List[int]:
-    # remove commas then find numbers of length >=3
-    s = text.replace(',', '')
-    nums = re.findall(r"\d{3,7}", s)
-    return [int(n) for n in nums]
+from agentapp.deadline import Deadline, DeadlineExceeded
+from agentapp.ingestion.extract import extract_prices
+from agentapp.ingestion.page_cache import Page, get_page_cache
 
 
 def _normalize_prices(prices: List[int]) -> List[int]:
@@ -20,29 +15,197 @@ def _normalize_prices(prices: List[int]) -> List[int]:
     return [p for p in prices if 300 <= p <= 500000]
 
 
-def _build_session():
-    session = requests.Session()
-    retries = Retry(total=3, backoff_factor=0.6, status_forcelist=(429, 500, 502, 503, 504))
-    session.mount('https://', HTTPAdapter(max_retries=retries))
-    session.headers.update({"User-Agent": "Mozilla/5.0 (compatible; material-wise-agent/1.0)", "Accept-Language": "en-IN,en;q=0.9"})
-    return session
+MIN_PRICE_POINTS = 3  # a candidate page is good enough once it yields this many prices
+SCRAPE_PARALLELISM = int(os.getenv('SCRAPE_PARALLELISM', '4'))  # candidate URLs in flight per scrape
 
+_POOL: Optional[ThreadPoolExecutor] = None
+_POOL_LOCK = threading.Lock()
 
-def scrape_buildersmart(product: str) -> Dict[str, Any]:
-    """Scrape BuildersMART for the given product using prioritized candidate URLs.
-    Returns structured dict with `source_url` indicating the canonical page used and `candidate_urls` tried.
+
+def _scrape_pool() -> ThreadPoolExecutor:
+    global _POOL
+    if _POOL is None:
+        with _POOL_LOCK:
+            if _POOL is None:
+                _POOL = ThreadPoolExecutor(max_workers=max(4, SCRAPE_PARALLELISM * 4), thread_name_prefix='scrape')
+    return _POOL
+
+
+def first_sufficient(candidates: Sequence[str], fetch: Callable[[str], List[int]],
+                     parallel: int = SCRAPE_PARALLELISM,
+                     enough: int = MIN_PRICE_POINTS,
+                     deadline: Optional[Deadline] = None) -> Tuple[Optional[int], List[int], Optional[Exception]]:
+    """Fetch candidates concurrently; return the first one, in priority order, with enough prices.
+
+    At most `parallel` candidates are in flight. A candidate wins only once every
+    higher-priority candidate has failed or come back short, so the result is the
+    same as trying them one by one. Once a winner is known, candidates after it
+    that have not started are cancelled and in-flight ones are no longer waited for.
+    The same happens when `deadline` passes, and no further candidate is started.
+
+    Returns:
+        (index of the winning candidate or None, its prices, last error in priority order)
+
+    Raises:
+        DeadlineExceeded: `deadline` passed before the result was known
+    """
+    pool = _scrape_pool()
+    outcomes: Dict[int, Tuple[List[int], Optional[Exception]]] = {}
+    running: Dict[Future, int] = {}
+    next_to_submit, next_to_resolve = 0, 0
+    best = len(candidates)  # lowest index known to be sufficient
+    try:
+        while next_to_resolve < len(candidates):
+            if deadline is not None and deadline.expired():
+                raise DeadlineExceeded(f'request deadline passed after {len(outcomes)} of {len(candidates)} candidates')
+            while next_to_submit < best and len(running) < parallel:
+                running[pool.submit(fetch, candidates[next_to_submit])] = next_to_submit
+                next_to_submit += 1
+            done, _ = wait(running, timeout=None if deadline is None else deadline.remaining(),
+                           return_when=FIRST_COMPLETED)
+            for future in done:
+                index = running.pop(future)
+                try:
+                    outcomes[index] = (future.result(), None)
+                except Exception as e:
+                    outcomes[index] = ([], e)
+                if len(outcomes[index][0]) >= enough:
+                    best = min(best, index)
+            while next_to_resolve in outcomes:
+                if next_to_resolve == best:
+                    return best, outcomes[best][0], _last_error(outcomes, best)
+                next_to_resolve += 1
+        if deadline is not None and deadline.expired():
+            # the failures may only be fetches cut short by the deadline: not a verdict to cache
+            raise DeadlineExceeded('request deadline passed before any candidate had enough prices')
+        return None, [], _last_error(outcomes, len(candidates))
+    finally:
+        for future in running:
+            future.cancel()
+
+
+def _last_error(outcomes: Dict[int, Tuple[List[int], Optional[Exception]]], stop: int) -> Optional[Exception]:
+    errors = [outcomes[i][1] for i in range(stop) if i in outcomes and outcomes[i][1] is not None]
+    return errors[-1] if errors else None
+
+
+def _price_result(label: str, candidates: List[str], winner: Optional[int], prices: List[int],
+                  last_exc: Optional[Exception], short_reason: str,
+                  tried: Optional[List[str]] = None) -> Dict[str, Any]:
+    # candidate_urls: the URLs actually fetched (succeeded or failed), in priority order
+    fetched = set(candidates if tried is None else tried)
+    tried = [c for c in candidates if c in fetched]
+    if winner is not None:
+        arr = np.array(prices)
+        return {
+            "status": "available",
+            "label": label,
+            "source_url": candidates[winner],
+            "candidate_urls": tried,
+            "prices": prices,
+            "min": int(arr.min()),
+            "max": int(arr.max()),
+            "median": int(np.median(arr)),
+            "variance": float(np.var(arr) / (np.mean(arr) ** 2)) if np.mean(arr) else 0.0,
+            "unit": "INR",
+        }
+    reason = short_reason
+    if last_exc:
+        reason = f"Scraping errors encountered; last: {str(last_exc)}"
+    return {
+        "status": "unavailable",
+        "reason": reason,
+        "source_url": candidates[0] if candidates else None,
+        "candidate_urls": tried,
+        "label": label,
+    }
+
+
+class MarketSource:
+    """Adapter for one marketplace: candidate pages, fetch, extract and aggregate.
+
+    Subclasses provide `name`, `label` and `candidates`; the other steps have
+    defaults that suit listing pages. Register an instance with
+    agentapp.ingestion.sources.register_source to include it in /api/predict.
     """
-    session = _build_session()
 
-    def _slugify(s: str) -> str:
-        s = s.strip().lower()
-        s = re.sub(r"[^a-z0-9\s-]", '', s)
-        s = re.sub(r"\s+", '-', s)
-        return s
+    name = ''   # scrape cache key and `degraded` entry (market.<name>)
+    label = ''  # shown in evidence and reasoning
+    short_reason = 'Insufficient numeric price points found across candidates.'
+
+    def candidates(self, product: str) -> List[str]:
+        """URLs to try for `product`, best first"""
+        raise NotImplementedError
+
+    def fetch(self, url: str, deadline: Optional[Deadline] = None) -> Page:
+        """The page at `url`, revalidated through the page cache (and given up on at `deadline`)"""
+        return get_page_cache().fetch(url, deadline=deadline)
+
+    def extract(self, html: str) -> List[int]:
+        """Prices on one page: JSON-LD offers, else price-marked nodes, else currency-marked text"""
+        return extract_prices(html)
+
+    def page_prices(self, url: str, deadline: Optional[Deadline] = None) -> List[int]:
+        page = self.fetch(url, deadline)
+        # parsed once per content hash; the name keeps adapters with their own extract() apart
+        return _normalize_prices(get_page_cache().derived(page, f'prices:{self.name}', self.extract))
+
+    def aggregate(self, candidates: List[str], winner: Optional[int], prices: List[int],
+                  last_exc: Optional[Exception], tried: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Result dict (status, min/max/median/variance or reason) for one scrape
+
+        `tried` lists the candidates that were fetched to completion; with
+        concurrent fetching that can include pages after the winner.
+        """
+        return _price_result(self.label, candidates, winner, prices, last_exc, self.short_reason, tried)
+
+    def scrape(self, product: str, deadline: Optional[Deadline] = None) -> Dict[str, Any]:
+        """Aggregated prices for `product`
+
+        Raises:
+            DeadlineExceeded: `deadline` passed first (nothing is cached for it)
+        """
+        candidates = self.candidates(product)
+        tried: List[str] = []
+
+        def fetch(url: str) -> List[int]:
+            try:
+                return self.page_prices(url, deadline)
+            finally:
+                tried.append(url)
+
+        winner, prices, last_exc = first_sufficient(candidates, fetch, deadline=deadline)
+        return self.aggregate(candidates, winner, prices, last_exc, list(tried))
 
-    def _candidates(prod: str) -> List[str]:
-        p = prod.strip().lower()
-        qs = prod.replace(' ', '+')
+    def unavailable(self, reason: str) -> Dict[str, Any]:
+        return {'status': 'unavailable', 'label': self.label, 'source_url': None, 'reason': reason}
+
+
+def _dedupe(urls: List[str]) -> List[str]:
+    seen = set()
+    out = []
+    for c in urls:
+        if c not in seen:
+            seen.add(c)
+            out.append(c)
+    return out
+
+
+class BuildersMartSource(MarketSource):
+    """BuildersMART category, product and search pages"""
+
+    name = 'buildersmart'
+    label = 'BuildersMART'
+
+    def candidates(self, product: str) -> List[str]:
+        def _slugify(s: str) -> str:
+            s = s.strip().lower()
+            s = re.sub(r"[^a-z0-9\s-]", '', s)
+            s = re.sub(r"\s+", '-', s)
+            return s
+
+        p = product.strip().lower()
+        qs = product.replace(' ', '+')
         mapping = {
             'ppc cement': '/buy-cement-online/ppc',
             'ppc': '/buy-cement-online/ppc',
@@ -65,161 +228,36 @@ def scrape_buildersmart(product: str) -> Dict[str, Any]:
             candidates.append('https://www.buildersmart.in/tmt-steel')
 
         candidates.append(f"https://www.buildersmart.in/catalogsearch/result?q={qs}")
+        return _dedupe(candidates)
 
-        seen = set()
-        out = []
-        for c in candidates:
-            if c not in seen:
-                seen.add(c)
-                out.append(c)
-        return out
-
-    candidates = _candidates(product)
-    last_exc = None
-    tried: List[str] = []
-    for candidate in candidates:
-        try:
-            r = session.get(candidate, timeout=10)
-            r.raise_for_status()
-            tried.append(candidate)
-            soup = BeautifulSoup(r.text, 'html.parser')
-
-            prices: List[int] = []
-            # JSON-LD first
-            for script in soup.find_all('script', type='application/ld+json'):
-                try:
-                    j = json.loads(script.string or '{}')
-                    if isinstance(j, dict) and 'offers' in j:
-                        off = j['offers']
-                        if isinstance(off, dict) and 'price' in off:
-                            try:
-                                prices.append(int(float(off['price'])))
-                            except Exception:
-                                pass
-                except Exception:
-                    pass
-
-            if not prices:
-                for tag in soup.find_all(['span', 'div', 'p', 'li']):
-                    text = tag.get_text(separator=' ', strip=True)
-                    if '₹' in text or 'Rs.' in text or 'INR' in text:
-                        prices.extend(_extract_numbers(text))
-
-            prices = _normalize_prices(prices)
-
-            if len(prices) >= 3:
-                arr = np.array(prices)
-                return {
-                    "status": "available",
-                    "label": "BuildersMART",
-                    "source_url": candidate,
-                    "candidate_urls": tried,
-                    "prices": prices,
-                    "min": int(arr.min()),
-                    "max": int(arr.max()),
-                    "median": int(np.median(arr)),
-                    "variance": float(np.var(arr) / (np.mean(arr) ** 2)) if np.mean(arr) else 0.0,
-                    "unit": "INR",
-                }
-
-        except Exception as e:
-            last_exc = e
-            tried.append(candidate)
-            continue
-
-    reason = "Insufficient numeric price points found across candidates."
-    if last_exc:
-        reason = f"Scraping errors encountered; last: {str(last_exc)}"
-    return {
-        "status": "unavailable",
-        "reason": reason,
-        "source_url": candidates[0] if candidates else None,
-        "candidate_urls": tried,
-        "label": "BuildersMART",
-    }
+
+class IndiaMartSource(MarketSource):
+    """IndiaMART directory and search pages"""
+
+    name = 'indiamart'
+    label = 'IndiaMART'
+    short_reason = 'Insufficient numeric price points found across IndiaMART candidates.'
+
+    def candidates(self, product: str) -> List[str]:
+        slug = re.sub(r"[^a-z0-9]+", '-', product.strip().lower()).strip('-')
+        return _dedupe([
+            f"https://dir.indiamart.com/impcat/{slug}.html",
+            f"https://dir.indiamart.com/indianexporters/{slug}.html",
+            f"https://dir.indiamart.com/search.mp?ss={product.replace(' ', '+')}",
+            f"https://dir.indiamart.com/search.mp?ss={slug}",
+        ])
+
+
+def scrape_buildersmart(product: str) -> Dict[str, Any]:
+    """Scrape BuildersMART for the given product using prioritized candidate URLs.
+    Returns structured dict with `source_url` indicating the canonical page used and `candidate_urls` tried.
+    """
+    return BuildersMartSource().scrape(product)
 
 
 def scrape_indiamart(product: str) -> Dict[str, Any]:
     """Lightweight IndiaMART scraping via prioritized directory and search pages."""
-    session = _build_session()
-
-    def _candidates_india(prod: str) -> List[str]:
-        slug = re.sub(r"[^a-z0-9]+", '-', prod.strip().lower()).strip('-')
-        candidates = []
-        candidates.append(f"https://dir.indiamart.com/impcat/{slug}.html")
-        candidates.append(f"https://dir.indiamart.com/indianexporters/{slug}.html")
-        candidates.append(f"https://dir.indiamart.com/search.mp?ss={prod.replace(' ', '+')}")
-        candidates.append(f"https://dir.indiamart.com/search.mp?ss={slug}")
-        seen = set()
-        out = []
-        for c in candidates:
-            if c not in seen:
-                seen.add(c)
-                out.append(c)
-        return out
-
-    candidates = _candidates_india(product)
-    last_exc = None
-    tried: List[str] = []
-    for candidate in candidates:
-        try:
-            r = session.get(candidate, timeout=10)
-            r.raise_for_status()
-            tried.append(candidate)
-            soup = BeautifulSoup(r.text, 'html.parser')
-
-            prices: List[int] = []
-            for script in soup.find_all('script', type='application/ld+json'):
-                try:
-                    j = json.loads(script.string or '{}')
-                    if isinstance(j, dict) and 'offers' in j and isinstance(j['offers'], dict):
-                        off = j['offers']
-                        if 'price' in off:
-                            try:
-                                prices.append(int(float(off['price'])))
-                            except Exception:
-                                pass
-                except Exception:
-                    pass
-
-            if not prices:
-                for tag in soup.find_all(['span', 'div', 'p']):
-                    text = tag.get_text(separator=' ', strip=True)
-                    if '₹' in text or 'Rs.' in text:
-                        prices.extend(_extract_numbers(text))
-
-            prices = _normalize_prices(prices)
-
-            if len(prices) >= 3:
-                arr = np.array(prices)
-                return {
-                    "status": "available",
-                    "label": "IndiaMART",
-                    "source_url": candidate,
-                    "candidate_urls": tried,
-                    "prices": prices,
-                    "min": int(arr.min()),
-                    "max": int(arr.max()),
-                    "median": int(np.median(arr)),
-                    "variance": float(np.var(arr) / (np.mean(arr) ** 2)) if np.mean(arr) else 0.0,
-                    "unit": "INR",
-                }
-
-        except Exception as e:
-            last_exc = e
-            tried.append(candidate)
-            continue
-
-    reason = "Insufficient numeric price points found across IndiaMART candidates."
-    if last_exc:
-        reason = f"Scraping errors encountered; last: {str(last_exc)}"
-    return {
-        "status": "unavailable",
-        "reason": reason,
-        "source_url": candidates[0] if candidates else None,
-        "candidate_urls": tried,
-        "label": "IndiaMART",
-    }
+    return IndiaMartSource().scrape(product)
 
 
 BUILDERMART_CATEGORIES = {
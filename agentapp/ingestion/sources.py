@@ -0,0 +1,101 @@
+"""
+Registry of marketplace source adapters and their concurrent fan-out
+Every enabled source is scraped at once under the request deadline, so a request costs the slowest source, not the sum
+"""
+import os
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from agentapp.deadline import Deadline, settle, stage_pool, submit
+from agentapp.ingestion.scrape_cache import get_scrape_cache
+from agentapp.ingestion.scrapers import BuildersMartSource, IndiaMartSource, MarketSource
+
+# scrapes run on their own pool: a burst of slow marketplaces must not queue ahead of the cheap stages
+MARKET_WORKERS = int(os.getenv('MARKET_SCRAPE_WORKERS', '8'))
+# multi-product fan-outs (/api/visualize) get a separate, smaller pool so a long material list cannot starve it
+BULK_WORKERS = int(os.getenv('BULK_SCRAPE_WORKERS', '4'))
+
+# name -> adapter, in evidence order
+SOURCES: Dict[str, MarketSource] = {}
+
+
+def register_source(source: MarketSource) -> None:
+    """Add (or replace) a marketplace adapter; it is scraped on every /api/predict"""
+    if not source.name:
+        raise ValueError('market source needs a name')
+    SOURCES[source.name] = source
+
+
+register_source(BuildersMartSource())
+register_source(IndiaMartSource())
+
+
+def enabled_sources() -> List[MarketSource]:
+    """Registered sources, restricted to MARKET_SOURCES (comma-separated names) when set"""
+    names = [n.strip() for n in os.getenv('MARKET_SOURCES', '').split(',') if n.strip()]
+    if not names:
+        return list(SOURCES.values())
+    unknown = [n for n in names if n not in SOURCES]
+    if unknown:
+        raise ValueError(f"unknown market sources in MARKET_SOURCES: {unknown}; known: {list(SOURCES)}")
+    return [SOURCES[n] for n in names]
+
+
+def source_stages(product: str, sources: Optional[List[MarketSource]] = None,
+                  deadline: Optional[Deadline] = None) -> Dict[str, Callable[[], Dict]]:
+    """One cached scrape per source, as stages for agentapp.deadline
+
+    A scrape on the request path gives up at `deadline`, so it frees its worker
+    by then; refreshing a stale entry in the background is not bound to it.
+    """
+    cache = get_scrape_cache()
+    return {s.name: (lambda s=s: cache.get(s.name, product, lambda p: s.scrape(p, deadline), refresh=s.scrape))
+            for s in (enabled_sources() if sources is None else sources)}
+
+
+def submit_scrapes(product: str, sources: Optional[List[MarketSource]] = None,
+                   deadline: Optional[Deadline] = None, pool: Optional[ThreadPoolExecutor] = None) -> Dict[str, Future]:
+    """Start every source's scrape on `pool` (default: the market pool); settle() them with the other stages"""
+    return submit(source_stages(product, sources, deadline), pool or stage_pool('market', MARKET_WORKERS))
+
+
+def collect(done: Dict[str, Dict], sources: List[MarketSource]) -> Tuple[Dict[str, Dict], List[str]]:
+    """Results in source order, with a placeholder for every source that missed the deadline
+
+    Returns:
+        (name -> result, names of the sources that did not finish)
+    """
+    results, late = {}, []
+    for s in sources:
+        if s.name in done:
+            results[s.name] = done[s.name]
+        else:
+            results[s.name] = s.unavailable('Request deadline exceeded before the scrape finished.')
+            late.append(s.name)
+    return results, late
+
+
+def fan_out(product: str, deadline: Deadline,
+            sources: Optional[List[MarketSource]] = None) -> Tuple[Dict[str, Dict], List[str]]:
+    """Scrape every enabled source concurrently until `deadline`; see collect() for the result"""
+    sources = enabled_sources() if sources is None else sources
+    done, _ = settle(deadline, submit_scrapes(product, sources, deadline))
+    return collect(done, sources)
+
+
+def fan_out_many(products: Sequence[str], deadline: Deadline,
+                 sources: Optional[List[MarketSource]] = None) -> List[Tuple[Dict[str, Dict], List[str]]]:
+    """fan_out() for several products under one deadline
+
+    Scrapes run on the bulk pool, not the market pool /api/predict uses, so
+    at most BULK_WORKERS of them are in flight and a long product list never
+    queues ahead of a prediction. Those still queued at the deadline are cancelled.
+
+    Returns:
+        One collect() result per product, in input order
+    """
+    sources = enabled_sources() if sources is None else sources
+    pool = stage_pool('bulk', BULK_WORKERS)
+    pending = [submit_scrapes(product, sources, deadline, pool) for product in products]
+    wait([f for futures in pending for f in futures.values()], timeout=deadline.remaining())
+    return [collect(settle(deadline, futures)[0], sources) for futures in pending]
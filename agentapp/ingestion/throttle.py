@@ -0,0 +1,170 @@
+"""
+Per-host circuit breakers and token-bucket rate limits for marketplace fetches
+Held by the shared HTTP client, so every scraper and crawler in the process draws on the same budget
+"""
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import requests
+
+BREAKER_FAILURES = int(os.getenv('HTTP_BREAKER_FAILURES', '5'))             # consecutive failures that open it
+BREAKER_RESET_SECONDS = float(os.getenv('HTTP_BREAKER_RESET_SECONDS', '30'))  # open period before a trial
+RATE_PER_SECOND = float(os.getenv('HTTP_HOST_RATE_PER_SECOND', '4'))
+BURST = int(os.getenv('HTTP_HOST_BURST', '8'))
+MAX_WAIT_SECONDS = float(os.getenv('HTTP_HOST_MAX_WAIT_SECONDS', '5'))      # longer queues fail fast instead
+MIN_RATE_FRACTION = 0.05  # throttling never slows a host below this share of its configured rate
+
+# (domain, requests per second, burst); a domain also covers its subdomains
+HOST_LIMITS: List[Tuple[str, float, int]] = []
+
+
+def register_host_limit(domain: str, rate: float, burst: int) -> None:
+    """Use `rate`/`burst` instead of the defaults for `domain` and its subdomains"""
+    HOST_LIMITS.insert(0, (domain.lower(), rate, burst))
+
+
+register_host_limit('indiamart.com', 1.0, 3)  # throttles with 429s well below the default rate
+
+
+class HostUnavailable(requests.ConnectionError):
+    """Raised without touching the network while a host's breaker is open or its queue is too long"""
+
+
+class CircuitBreaker:
+    """closed -> open after `failures` consecutive failures -> half-open single trial after `reset_seconds`."""
+
+    def __init__(self, failures: int = BREAKER_FAILURES, reset_seconds: float = BREAKER_RESET_SECONDS,
+                 clock: Callable[[], float] = time.monotonic):
+        self.threshold = failures
+        self.reset_seconds = reset_seconds
+        self.clock = clock
+        self.state = 'closed'
+        self.failures = 0
+        self.open_until = 0.0
+        self.rejected = 0
+        self._trial = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == 'open' and self.clock() >= self.open_until:
+                self.state = 'half_open'
+                self._trial = False
+            if self.state == 'closed' or (self.state == 'half_open' and not self._trial):
+                self._trial = self.state == 'half_open'
+                return True
+            self.rejected += 1
+            return False
+
+    def release_trial(self) -> None:
+        """Give back a half-open trial that was allowed but never sent"""
+        with self._lock:
+            self._trial = False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state, self.failures, self._trial = 'closed', 0, False
+
+    def record_failure(self, retry_after: Optional[float] = None) -> None:
+        with self._lock:
+            self.failures += 1
+            self._trial = False
+            if self.state == 'half_open' or self.failures >= self.threshold or retry_after:
+                # a server asking us to back off is obeyed at once, for at least as long as it asked
+                self.state = 'open'
+                self.open_until = self.clock() + max(self.reset_seconds, retry_after or 0.0)
+
+    def stats(self) -> Dict[str, object]:
+        return {'state': self.state, 'failures': self.failures, 'rejected': self.rejected}
+
+
+class TokenBucket:
+    """Token bucket whose rate halves on throttling and creeps back on success (AIMD)."""
+
+    def __init__(self, rate: float = RATE_PER_SECOND, burst: int = BURST,
+                 clock: Callable[[], float] = time.monotonic, sleep: Callable[[float], None] = time.sleep):
+        self.base_rate = rate
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self.sleep = sleep
+        self.tokens = float(burst)
+        self.updated = clock()
+        self.waited_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self, max_wait: float = MAX_WAIT_SECONDS) -> bool:
+        """Take a token, sleeping until one is due; False (and nothing taken) if that is over `max_wait`"""
+        with self._lock:
+            now = self.clock()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            wait = 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+            if wait > max_wait:
+                return False
+            self.tokens -= 1  # may go negative: a reservation the sleeping caller owns
+            self.waited_seconds += wait
+        if wait > 0:
+            self.sleep(wait)
+        return True
+
+    def throttle(self) -> None:
+        with self._lock:
+            self.rate = max(self.base_rate * MIN_RATE_FRACTION, self.rate / 2)
+
+    def recover(self) -> None:
+        with self._lock:
+            self.rate = min(self.base_rate, self.rate + self.base_rate / 10)
+
+    def stats(self) -> Dict[str, object]:
+        return {'rate_per_second': round(self.rate, 3), 'waited_seconds': round(self.waited_seconds, 3)}
+
+
+def _retry_after(response: requests.Response) -> Optional[float]:
+    value = response.headers.get('Retry-After')
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return None  # HTTP-date form: fall back to the breaker's own reset period
+
+
+class HostGuard:
+    """Breaker plus limiter for one host."""
+
+    def __init__(self, host: str, rate: float, burst: int):
+        self.host = host
+        self.breaker = CircuitBreaker()
+        self.bucket = TokenBucket(rate, burst)
+
+    def before(self, max_wait: float = MAX_WAIT_SECONDS) -> None:
+        if not self.breaker.allow():
+            raise HostUnavailable(f"{self.host} unavailable: circuit open after repeated failures")
+        if not self.bucket.acquire(max_wait):
+            self.breaker.release_trial()
+            raise HostUnavailable(f"{self.host} unavailable: rate limit queue longer than {max_wait:g}s")
+
+    def after(self, response: Optional[requests.Response]) -> None:
+        """Record an outcome; None means the request raised"""
+        if response is None or response.status_code >= 500:
+            self.breaker.record_failure()
+        elif response.status_code == 429:
+            self.bucket.throttle()
+            self.breaker.record_failure(_retry_after(response))
+        else:
+            self.bucket.recover()
+            self.breaker.record_success()
+
+    def stats(self) -> Dict[str, object]:
+        return dict(self.breaker.stats(), **self.bucket.stats())
+
+
+def host_limit(host: str) -> Tuple[float, int]:
+    host = host.lower()
+    for domain, rate, burst in HOST_LIMITS:
+        if host == domain or host.endswith('.' + domain):
+            return rate, burst
+    return RATE_PER_SECOND, BURST
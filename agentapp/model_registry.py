@@ -0,0 +1,298 @@
+"""
+Trend model registry for Material Wise
+Loads the model once per process, validates its feature schema and hot-swaps it when the files change
+
+Linear models can be exported to a small .npz (coefficients, intercepts, classes,
+feature order) and scored with NumPy alone, so workers never import scikit-learn:
+    python -m agentapp.model_registry export [--model models/trend_model.pkl] [--out models/trend_model.npz]
+"""
+import argparse
+import hashlib
+import io
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from agentapp.feature_engine import FEATURES
+
+MODELS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'models'))
+MODEL_PATH = os.path.join(MODELS_DIR, 'trend_model.pkl')
+FEATURES_PATH = os.path.join(MODELS_DIR, 'model_features.pkl')
+LINEAR_PATH = os.path.join(MODELS_DIR, 'trend_model.npz')
+LINKS = ('softmax', 'ovr', 'binary')
+
+
+class ModelSchemaError(ValueError):
+    """The model and its feature list do not agree, or the features cannot be computed"""
+
+
+class LoadedModel:
+    """A loaded model and its feature list; requests keep using theirs while a newer one is swapped in"""
+
+    def __init__(self, model, features: List[str], version: str):
+        self.model = model
+        self.features = list(features)
+        self.version = version
+        self.loaded_at = time.time()
+
+    @property
+    def classes(self) -> list:
+        return list(self.model.classes_)
+
+
+class NumpyLinearModel:
+    """predict_proba for an exported logistic regression using only NumPy.
+
+    Exposes the attributes the registry and predict_trend use (classes_,
+    feature_names_in_, n_features_in_), so it can stand in for the sklearn model.
+    """
+
+    def __init__(self, coef: np.ndarray, intercept: np.ndarray, classes: np.ndarray,
+                 features: List[str], link: str = 'softmax'):
+        if link not in LINKS:
+            raise ValueError(f"Unknown link {link!r}, expected one of {LINKS}")
+        self.coef_ = np.asarray(coef, dtype=np.float64)
+        self.intercept_ = np.asarray(intercept, dtype=np.float64)
+        self.classes_ = np.asarray(classes)
+        self.feature_names_in_ = np.asarray(features, dtype=object)
+        self.n_features_in_ = self.coef_.shape[1]
+        self.link = link
+
+    @classmethod
+    def load(cls, path: str) -> 'NumpyLinearModel':
+        with np.load(path, allow_pickle=False) as data:
+            return cls(data['coef'], data['intercept'], data['classes'],
+                       data['features'].tolist(), str(data['link']))
+
+    def decision_function(self, X) -> np.ndarray:
+        return np.asarray(X, dtype=np.float64) @ self.coef_.T + self.intercept_
+
+    def predict_proba(self, X) -> np.ndarray:
+        z = self.decision_function(X)
+        if self.link == 'binary':
+            p = 1.0 / (1.0 + np.exp(-z[:, 0]))
+            return np.column_stack([1.0 - p, p])
+        if self.link == 'ovr':
+            p = 1.0 / (1.0 + np.exp(-z))
+            return p / p.sum(axis=1, keepdims=True)
+        z = z - z.max(axis=1, keepdims=True)
+        e = np.exp(z)
+        return e / e.sum(axis=1, keepdims=True)
+
+    def predict(self, X) -> np.ndarray:
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
+
+
+def export_linear_model(model, features: List[str], out_path: str = LINEAR_PATH,
+                        version: Optional[str] = None, rtol: float = 1e-9) -> str:
+    """Write a fitted logistic regression to .npz and check NumPy scoring reproduces predict_proba.
+
+    Args:
+        model: Fitted sklearn LogisticRegression (anything with coef_/intercept_/classes_)
+        features: Feature order the model was fitted on
+        out_path: Destination .npz
+        version: Version recorded in the file (default: hash of the coefficients)
+        rtol: Tolerance for the predict_proba check on a probe matrix
+
+    Returns:
+        The link function that matched ('softmax', 'ovr' or 'binary')
+
+    Raises:
+        ModelSchemaError: If the model is not linear or no link reproduces predict_proba
+    """
+    features = validate_schema(model, features)
+    if not hasattr(model, 'coef_') or not hasattr(model, 'intercept_'):
+        raise ModelSchemaError(f"{type(model).__name__} is not a linear model; keep serving the pickle")
+
+    import pandas as pd
+    probe = pd.DataFrame(np.random.default_rng(0).normal(100, 20, (256, len(features))), columns=features)
+    expected = model.predict_proba(probe)
+    candidates = ['binary'] if len(model.classes_) == 2 else ['softmax', 'ovr']
+    for link in candidates:
+        scorer = NumpyLinearModel(model.coef_, model.intercept_, model.classes_, features, link)
+        if np.allclose(scorer.predict_proba(probe.to_numpy()), expected, rtol=rtol, atol=1e-12):
+            break
+    else:
+        raise ModelSchemaError("NumPy scoring does not reproduce predict_proba for this model")
+
+    if version is None:
+        version = hashlib.sha256(np.ascontiguousarray(model.coef_).tobytes()
+                                 + np.ascontiguousarray(model.intercept_).tobytes()).hexdigest()[:12]
+    tmp = out_path + '.tmp.npz'
+    np.savez(tmp, coef=model.coef_, intercept=model.intercept_, classes=model.classes_,
+             features=np.array(features, dtype=str), link=np.array(link), version=np.array(version))
+    os.replace(tmp, out_path)
+    return link
+
+
+def _signature(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def validate_schema(model, features) -> List[str]:
+    """Check that `features` is what `model` was fitted on and that the feature engine can build it.
+
+    Returns:
+        The feature names as a list
+
+    Raises:
+        ModelSchemaError: On any mismatch
+    """
+    if not isinstance(features, (list, tuple)) or not features or not all(isinstance(f, str) for f in features):
+        raise ModelSchemaError(f"model_features must be a non-empty list of names, got {features!r}")
+    features = list(features)
+    if not hasattr(model, 'predict_proba') or not hasattr(model, 'classes_'):
+        raise ModelSchemaError(f"{type(model).__name__} is not a fitted classifier with predict_proba")
+    n_in = getattr(model, 'n_features_in_', len(features))
+    if n_in != len(features):
+        raise ModelSchemaError(f"model expects {n_in} features, model_features lists {len(features)}")
+    fitted = getattr(model, 'feature_names_in_', None)
+    if fitted is not None and list(fitted) != features:
+        raise ModelSchemaError(f"model was fitted on {list(fitted)}, model_features lists {features}")
+    unknown = [f for f in features if f not in FEATURES]
+    if unknown:
+        raise ModelSchemaError(f"feature engine cannot compute {unknown}")
+    return features
+
+
+class ModelRegistry:
+    """Keeps the current LoadedModel resident and reloads it when either file changes on disk."""
+
+    def __init__(self, model_path: str = MODEL_PATH, features_path: str = FEATURES_PATH,
+                 linear_path: Optional[str] = None):
+        self.model_path = model_path
+        self.features_path = features_path
+        self.linear_path = linear_path or os.path.splitext(model_path)[0] + '.npz'
+        self.source: Optional[str] = None
+        self.loads = 0
+        self.failed_loads = 0
+        self.last_error: Optional[str] = None
+        self._lock = threading.RLock()
+        self._current: Optional[LoadedModel] = None
+        self._signature = None
+        self.reload()
+
+    def _current_signature(self):
+        return _signature(self.model_path), _signature(self.features_path), _signature(self.linear_path)
+
+    def _pickle_version(self) -> Optional[str]:
+        try:
+            with open(self.model_path, 'rb') as f:
+                return hashlib.sha256(f.read()).hexdigest()[:12]
+        except OSError:
+            return None
+
+    def _load_pickle(self) -> Tuple[object, List[str], str]:
+        import joblib  # only needed when there is no up-to-date NumPy export
+        with open(self.model_path, 'rb') as f:
+            data = f.read()
+        model = joblib.load(io.BytesIO(data))
+        return model, joblib.load(self.features_path), hashlib.sha256(data).hexdigest()[:12]
+
+    def _load_linear(self) -> Optional[Tuple[object, List[str], str]]:
+        """The NumPy export, or None if it is missing or was exported from a different pickle"""
+        try:
+            model = NumpyLinearModel.load(self.linear_path)
+            with np.load(self.linear_path, allow_pickle=False) as data:
+                version = str(data['version'])
+        except (OSError, KeyError, ValueError):
+            return None
+        pickle_version = self._pickle_version()
+        if pickle_version is not None and pickle_version != version:
+            return None
+        return model, model.feature_names_in_.tolist(), version
+
+    def reload(self) -> Optional[LoadedModel]:
+        """Load and validate the model and swap it in; on failure keep serving the previous model"""
+        with self._lock:
+            signature = self._current_signature()
+            # remembered even on failure, so a bad file is retried only once it changes again
+            self._signature = signature
+            try:
+                loaded = self._load_linear()
+                source = 'numpy'
+                if loaded is None:
+                    if None in signature[:2]:
+                        self.last_error = 'model files not found'
+                        return self._current
+                    loaded, source = self._load_pickle(), 'pickle'
+                model, features, version = loaded
+                features = validate_schema(model, features)
+            except Exception as e:
+                self.failed_loads += 1
+                self.last_error = f"{type(e).__name__}: {e}"
+                return self._current
+            self._current = LoadedModel(model, features, version)
+            self.source = source
+            self.loads += 1
+            self.last_error = None
+            return self._current
+
+    def current(self) -> Optional[LoadedModel]:
+        """The resident model (None if none could be loaded), reloading first if the files changed"""
+        if self._current_signature() != self._signature:
+            with self._lock:
+                if self._current_signature() != self._signature:
+                    self.reload()
+        return self._current
+
+    @property
+    def version(self) -> Optional[str]:
+        loaded = self.current()
+        return loaded.version if loaded else None
+
+    def stats(self) -> Dict[str, object]:
+        loaded = self.current()
+        return {
+            'version': loaded.version if loaded else None,
+            'loaded_at': loaded.loaded_at if loaded else None,
+            'features': loaded.features if loaded else None,
+            'source': self.source,
+            'loads': self.loads,
+            'failed_loads': self.failed_loads,
+            'last_error': self.last_error,
+        }
+
+
+_REGISTRY: Optional[ModelRegistry] = None
+_REGISTRY_LOCK = threading.Lock()
+
+
+def get_model_registry() -> ModelRegistry:
+    """Return the process-wide registry, loading the model on first use"""
+    global _REGISTRY
+    if _REGISTRY is None:
+        with _REGISTRY_LOCK:
+            if _REGISTRY is None:
+                _REGISTRY = ModelRegistry()
+    return _REGISTRY
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Trend model registry tools')
+    sub = parser.add_subparsers(dest='command', required=True)
+    export = sub.add_parser('export', help='export a linear model to .npz for NumPy-only serving')
+    export.add_argument('--model', default=MODEL_PATH)
+    export.add_argument('--features', default=FEATURES_PATH)
+    export.add_argument('--out', default=None, help='output .npz (default: next to the model)')
+    args = parser.parse_args(argv)
+
+    import joblib
+    with open(args.model, 'rb') as f:
+        data = f.read()
+    model = joblib.load(io.BytesIO(data))
+    out = args.out or os.path.splitext(args.model)[0] + '.npz'
+    link = export_linear_model(model, joblib.load(args.features), out,
+                               version=hashlib.sha256(data).hexdigest()[:12])
+    print(f"Exported {type(model).__name__} ({link}, {len(model.classes_)} classes) -> {out}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,41 +1,46 @@
-import os
-import joblib
 import numpy as np
-from typing import Tuple, Dict
+import pandas as pd
+from typing import Optional, Sequence, Tuple, Dict, List
 
-MODEL_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'models', 'trend_model.pkl'))
-FEATURES_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'models', 'model_features.pkl'))
+from agentapp.feature_engine import DEFAULT_FEATURES
+from agentapp.features import build_latest_feature_matrix
+from agentapp.model_registry import MODEL_PATH, FEATURES_PATH, LoadedModel, get_model_registry
+from agentapp.price_index import DEFAULT_CSV_PATH
+
+
+def _fallback_trend_matrix(price: np.ndarray, lag1: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Vectorized fallback rule: (trends, probabilities) from the relative change vs lag_1"""
+    price = np.asarray(price, dtype=np.float64)
+    lag1 = np.asarray(lag1, dtype=np.float64)
+    change = (price - lag1) / (lag1 + 1e-6)
+    up, down = change > 0.02, change < -0.02
+    trends = np.where(up, 'UP', np.where(down, 'DOWN', 'STABLE'))
+    probs = np.where(up, np.minimum(0.65, 0.5 + change), np.where(down, np.minimum(0.65, 0.5 - change), 0.5))
+    return trends, probs
 
 
 def _fallback_trend(X_row: dict) -> Tuple[str, float, str]:
     # Deterministic safe fallback: compute relative change between price_index and lag_1
     price = float(X_row.get('price_index', 0))
     lag1 = float(X_row.get('lag_1', price))
-    lag3 = float(X_row.get('lag_3_mean', price))
 
-    change = (price - lag1) / (lag1 + 1e-6)
-    if change > 0.02:
-        return 'UP', min(0.65, 0.5 + change), 'model_unavailable'
-    elif change < -0.02:
-        return 'DOWN', min(0.65, 0.5 - change), 'model_unavailable'
-    else:
-        return 'STABLE', 0.5, 'model_unavailable'
+    trends, probs = _fallback_trend_matrix([price], [lag1])
+    return str(trends[0]), float(probs[0]), 'model_unavailable'
 
 
-def predict_trend(X_latest) -> Tuple[str, float, str]:
+def predict_trend(X_latest, loaded: Optional[LoadedModel] = None) -> Tuple[str, float, str]:
     """Return (trend, probability, status).
-    Attempts to load a trained model from ../models; if unavailable, uses safe fallback.
+    Uses the resident model from the registry (or `loaded`, so a caller can report
+    the version it used); if no valid model is loaded, uses safe fallback.
     """
     try:
-        model = joblib.load(MODEL_PATH)
-        # model expects DataFrame-like ordering; support pandas DataFrame or dict
-        if hasattr(X_latest, 'values'):
-            probs = model.predict_proba(X_latest)[0]
-        else:
-            # assume dict
-            import pandas as pd
-            Xdf = pd.DataFrame([X_latest])
-            probs = model.predict_proba(Xdf)[0]
+        loaded = loaded or get_model_registry().current()
+        if loaded is None:
+            raise RuntimeError('no trend model loaded')
+        model = loaded.model
+        # columns in the order the model was fitted on; support pandas DataFrame or dict
+        Xdf = X_latest if hasattr(X_latest, 'columns') else pd.DataFrame([X_latest])
+        probs = model.predict_proba(Xdf[loaded.features])[0]
 
         idx = int(np.argmax(probs))
         classes = model.classes_
@@ -54,3 +59,57 @@ def predict_trend(X_latest) -> Tuple[str, float, str]:
             except Exception:
                 row = {}
         return _fallback_trend(row)
+
+
+def fallback_trend_matrix(X: pd.DataFrame) -> List[Tuple[str, float, str]]:
+    """The deterministic rule for every row of X (status 'model_unavailable')"""
+    price = X['price_index'].to_numpy(dtype=np.float64) if 'price_index' in X else np.zeros(len(X))
+    lag1 = X['lag_1'].to_numpy(dtype=np.float64) if 'lag_1' in X else price
+    trends, best = _fallback_trend_matrix(price, lag1)
+    return [(str(t), float(p), 'model_unavailable') for t, p in zip(trends, best)]
+
+
+def predict_trend_matrix(X: pd.DataFrame, loaded: Optional[LoadedModel] = None) -> List[Tuple[str, float, str]]:
+    """(trend, probability, status) for every row of X with a single predict_proba call"""
+    if len(X) == 0:
+        return []
+    try:
+        loaded = loaded or get_model_registry().current()
+        if loaded is None:
+            raise RuntimeError('no trend model loaded')
+        probs = loaded.model.predict_proba(X[loaded.features])
+        idx = probs.argmax(axis=1)
+        trends = np.asarray(loaded.model.classes_)[idx].astype(str)
+        best = probs[np.arange(len(idx)), idx]
+        return [(str(t), float(p), 'model_loaded') for t, p in zip(trends, best)]
+    except Exception:
+        return fallback_trend_matrix(X)
+
+
+def predict_trend_batch(products: Sequence[str], csv_path: str = DEFAULT_CSV_PATH,
+                        loaded: Optional[LoadedModel] = None) -> List[Dict]:
+    """Predict trends for many products with one feature gather and one predict_proba.
+
+    Args:
+        products: Product names (resolved like /api/predict)
+        csv_path: Path to price_index.csv
+        loaded: Model to score with (default: the registry's current model)
+
+    Returns:
+        One dict per product, in input order: product, trend, trend_prob, model_status
+        and price_index, or product and error if it could not be resolved
+    """
+    loaded = loaded or get_model_registry().current()
+    feature_names = loaded.features if loaded is not None else DEFAULT_FEATURES
+    X, errors = build_latest_feature_matrix(csv_path, products, feature_names)
+    scored = iter(zip(X.index, X['price_index'].tolist() if 'price_index' in X else [None] * len(X),
+                      predict_trend_matrix(X, loaded)))
+    results = []
+    for product in products:
+        if product in errors:
+            results.append({'product': product, 'error': errors[product]})
+            continue
+        _, price, (trend, prob, status) = next(scored)
+        results.append({'product': product, 'trend': trend, 'trend_prob': prob,
+                        'model_status': status, 'price_index': price})
+    return results
@@ -0,0 +1,626 @@
+"""
+Process-wide price index store for Material Wise
+Loads the wide `indxMMYYYY` table once and serves lookups from NumPy arrays.
+When a compiled snapshot (see agentapp.snapshot) is at least as new as the CSV,
+the arrays are memory-mapped from it instead of parsing the CSV.
+
+New or revised months are appended incrementally through a small update log
+next to the CSV (price_index.updates.jsonl); every worker tails that log and
+recomputes only the affected feature tail, so no restart or full reload is needed.
+The CSV and the log are read and rewritten under a lock file (price_index.lock), so
+a worker never pairs a compacted CSV with the log that was folded into it.
+
+Usage:
+    python -m agentapp.price_index append new_month.csv   # comm_code/comm_name + indxMMYYYY columns
+    python -m agentapp.price_index compact                 # fold the update log into the CSV
+"""
+import argparse
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from agentapp.feature_engine import FeatureMatrix, as_float64
+from agentapp.product_matcher import ProductIndex
+from agentapp import snapshot
+
+try:
+    import fcntl
+except ImportError:  # Windows: only threads within one process are serialized
+    fcntl = None
+
+
+DEFAULT_CSV_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'data', 'price_index.csv'))
+UPDATES_SUFFIX = '.updates.jsonl'
+LOCK_SUFFIX = '.lock'
+
+logger = logging.getLogger(__name__)
+
+ID_COLUMNS = ['comm_name', 'comm_code', 'comm_wt']
+INDEX_PREFIX = 'indx'
+
+
+def parse_index_column(column: str) -> np.datetime64:
+    """Convert an `indxMMYYYY` column name to a month (datetime64[M])"""
+    token = column[len(INDEX_PREFIX):]
+    return np.datetime64(f"{token[2:]}-{token[:2]}", 'M')
+
+
+def format_index_column(month) -> str:
+    """Convert a month (datetime64, Timestamp or 'YYYY-MM' string) back to `indxMMYYYY`"""
+    m = np.datetime64(month, 'M').astype(str)
+    return f"{INDEX_PREFIX}{m[5:7]}{m[:4]}"
+
+
+class CommodityCatalogue:
+    """Commodity dictionary shared by dense and partitioned tables (always resident)."""
+
+    def __init__(self, names: np.ndarray, codes: np.ndarray, weights: np.ndarray,
+                 months: np.ndarray, mtime: Optional[float] = None):
+        self.names = names
+        self.codes = codes
+        self.weights = weights
+        self.months = months
+        self.mtime = mtime
+        self.catalogue = pd.DataFrame({'comm_name': names, 'comm_code': codes, 'comm_wt': weights})
+        self.materials = sorted(set(names.tolist()))
+        self._row_of = {str(n).lower(): i for i, n in enumerate(names)}
+        self._row_of_code = {str(c): i for i, c in enumerate(codes)}
+        self._product_index: Optional[ProductIndex] = None
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return len(self.names), len(self.months)
+
+    @property
+    def product_index(self) -> ProductIndex:
+        """Token index over commodity names, built on first use"""
+        if self._product_index is None:
+            self._product_index = ProductIndex(self.names.tolist())
+        return self._product_index
+
+    def row_of(self, name: str) -> Optional[int]:
+        return self._row_of.get(name.lower().strip())
+
+    def row_of_key(self, key: str) -> Optional[int]:
+        """Resolve a comm_code (preferred) or commodity name to a row"""
+        row = self._row_of_code.get(str(key).strip())
+        return row if row is not None else self.row_of(str(key))
+
+    def month_slice(self, start=None, end=None) -> slice:
+        """Column slice covering months in [start, end] (inclusive, either may be None)"""
+        lo = 0 if start is None else int(np.searchsorted(self.months, np.datetime64(start, 'M'), side='left'))
+        hi = len(self.months) if end is None else int(np.searchsorted(self.months, np.datetime64(end, 'M'), side='right'))
+        return slice(lo, hi)
+
+    def _insert_month(self, month: np.datetime64) -> Tuple[np.ndarray, int, bool]:
+        pos = int(np.searchsorted(self.months, month))
+        exists = pos < len(self.months) and self.months[pos] == month
+        return (self.months if exists else np.insert(self.months, pos, month)), pos, exists
+
+    # Row-level accessors; consumers use these so they work on both table kinds
+
+    def row_values(self, rows, cols: slice = slice(None)) -> np.ndarray:
+        """Index values for `rows`, shape (len(rows), months in `cols`)"""
+        raise NotImplementedError
+
+    def latest_cols(self, rows, feature_names: Optional[Sequence[str]] = None) -> np.ndarray:
+        """Latest month (column) per row where every feature in `feature_names` (default:
+        the base set) is defined, -1 when a row has no such month"""
+        raise NotImplementedError
+
+    def latest_features(self, rows, feature_names: Sequence[str]) -> np.ndarray:
+        """Latest feature vectors, shape (len(rows), len(feature_names))"""
+        raise NotImplementedError
+
+    def pick_latest(self, rows, feature_names: Optional[Sequence[str]] = None) -> Optional[int]:
+        """Among `rows`, the commodity with the most recent usable month (last row wins ties)"""
+        rows = np.asarray(rows, dtype=np.intp)
+        if len(rows) == 0:
+            return None
+        cols = self.latest_cols(rows, feature_names)
+        best = cols.max()
+        if best < 0:
+            return None
+        return int(rows[np.flatnonzero(cols == best)[-1]])
+
+    def latest_frame(self, row: int, feature_names: Sequence[str]) -> pd.DataFrame:
+        """Latest features for one commodity as a single-row DataFrame"""
+        return pd.DataFrame(self.latest_features([row], feature_names), columns=list(feature_names))
+
+    def iter_partitions(self) -> Iterator[Tuple[np.ndarray, 'PriceIndexTable']]:
+        """(global rows, dense table whose local row i is global rows[i]) for every partition
+
+        For full scans (e.g. scoring every commodity): one partition is mapped at
+        a time and the scan does not disturb which partitions stay resident.
+        """
+        raise NotImplementedError
+
+
+class PriceIndexTable(CommodityCatalogue):
+    """Immutable commodities x months view of the price index.
+
+    Readers grab a reference to one table and keep using it, so a reload
+    swapping in a new table never changes data under an in-flight request.
+    Model features for every commodity and month are computed once here.
+    """
+
+    def __init__(self, names: np.ndarray, codes: np.ndarray, weights: np.ndarray,
+                 months: np.ndarray, values: np.ndarray, mtime: Optional[float] = None,
+                 features: Optional[FeatureMatrix] = None):
+        super().__init__(names, codes, weights, months, mtime)
+        self.values = values
+        self.features = features if features is not None else FeatureMatrix.from_values(values, months=months)
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, mtime: Optional[float] = None) -> 'PriceIndexTable':
+        index_cols = [c for c in df.columns if c.startswith(INDEX_PREFIX)]
+        months = np.array([parse_index_column(c) for c in index_cols], dtype='datetime64[M]')
+        order = np.argsort(months, kind='stable')
+        values = df[index_cols].to_numpy(dtype=np.float64)[:, order]
+        return cls(
+            names=df['comm_name'].astype(str).to_numpy(),
+            codes=df['comm_code'].astype(str).to_numpy(),
+            weights=pd.to_numeric(df['comm_wt'], errors='coerce').to_numpy(dtype=np.float64),
+            months=months[order],
+            values=values,
+            mtime=mtime,
+        )
+
+    def row_values(self, rows, cols: slice = slice(None)) -> np.ndarray:
+        return as_float64(self.values[np.asarray(rows, dtype=np.intp)][:, cols])
+
+    def latest_cols(self, rows, feature_names: Optional[Sequence[str]] = None) -> np.ndarray:
+        return self.features.latest_cols(feature_names)[np.asarray(rows, dtype=np.intp)]
+
+    def latest_features(self, rows, feature_names: Sequence[str]) -> np.ndarray:
+        return self.features.latest_matrix(rows, feature_names)
+
+    def iter_partitions(self) -> Iterator[Tuple[np.ndarray, 'PriceIndexTable']]:
+        yield np.arange(len(self.names)), self
+
+    def with_month(self, month, column: np.ndarray) -> Tuple['PriceIndexTable', int]:
+        """Return a new table with `month` added or revised, plus the first changed column.
+
+        NaN entries in `column` leave a revised month's existing value untouched.
+        Only the feature tail from the changed column onwards is recomputed.
+        """
+        month = np.datetime64(month, 'M')
+        column = np.asarray(column, dtype=np.float64)
+        months, pos, exists = self._insert_month(month)
+        if exists:
+            values = as_float64(self.values)  # private copy; snapshots are read-only float32 maps
+            values[:, pos] = np.where(np.isnan(column), values[:, pos], column)
+        else:
+            values = np.insert(as_float64(self.values), pos, column, axis=1)
+        table = PriceIndexTable(self.names, self.codes, self.weights, months, values,
+                                mtime=self.mtime, features=self.features.updated(values, pos, months))
+        table._product_index = self._product_index  # same catalogue, keep the warm index
+        return table, pos
+
+
+class PartitionedPriceIndexTable(CommodityCatalogue):
+    """Snapshot-backed table split into commodity-group partitions (comm_code prefix).
+
+    Only the catalogue is resident; a partition's values and features are
+    memory-mapped on first access and kept in an LRU capped at `max_resident`
+    partitions, so memory stays bounded as the catalogue grows. Months appended
+    since the snapshot was compiled are replayed onto each partition as it loads.
+    """
+
+    def __init__(self, names: np.ndarray, codes: np.ndarray, weights: np.ndarray,
+                 months: np.ndarray, partition_of: np.ndarray, local_row: np.ndarray,
+                 partition_keys: List[str], loader: Callable[[str], PriceIndexTable],
+                 max_resident: int = 32, mtime: Optional[float] = None,
+                 updates: Tuple[Tuple[np.datetime64, np.ndarray], ...] = ()):
+        super().__init__(names, codes, weights, months, mtime)
+        self.partition_of = partition_of
+        self.local_row = local_row
+        self.partition_keys = partition_keys
+        self.max_resident = max(1, int(max_resident))
+        self.updates = updates
+        self._loader = loader
+        self._members = {i: np.flatnonzero(partition_of == i) for i in range(len(partition_keys))}
+        self._resident: 'OrderedDict[int, PriceIndexTable]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def resident_partitions(self) -> List[str]:
+        return [self.partition_keys[i] for i in self._resident]
+
+    def partition(self, index: int) -> PriceIndexTable:
+        """Dense table for one partition, loading it (and evicting the LRU one) if needed"""
+        with self._lock:
+            part = self._resident.get(index)
+            if part is not None:
+                self._resident.move_to_end(index)
+                return part
+        part = self._load(index)
+        with self._lock:
+            self._resident[index] = part
+            self._resident.move_to_end(index)
+            while len(self._resident) > self.max_resident:
+                self._resident.popitem(last=False)
+        return part
+
+    def _load(self, index: int) -> PriceIndexTable:
+        part = self._loader(self.partition_keys[index])
+        members = self._members[index]
+        for month, column in self.updates:
+            part, _ = part.with_month(month, column[members])
+        return part
+
+    def iter_partitions(self) -> Iterator[Tuple[np.ndarray, PriceIndexTable]]:
+        for index in range(len(self.partition_keys)):
+            with self._lock:
+                part = self._resident.get(index)
+            # a partition that is not resident is mapped for this step only, not cached
+            yield self._members[index], part if part is not None else self._load(index)
+
+    def _gather(self, rows, fetch: Callable[[PriceIndexTable, np.ndarray], np.ndarray], width: int) -> np.ndarray:
+        rows = np.asarray(rows, dtype=np.intp)
+        out = None
+        for index in np.unique(self.partition_of[rows]):
+            sel = np.flatnonzero(self.partition_of[rows] == index)
+            block = fetch(self.partition(int(index)), self.local_row[rows[sel]])
+            if out is None:
+                out = np.empty((len(rows),) + block.shape[1:], dtype=block.dtype)
+            out[sel] = block
+        return out if out is not None else np.empty((0, width))
+
+    def row_values(self, rows, cols: slice = slice(None)) -> np.ndarray:
+        width = len(range(*cols.indices(len(self.months))))
+        return self._gather(rows, lambda part, local: part.row_values(local, cols), width)
+
+    def latest_cols(self, rows, feature_names: Optional[Sequence[str]] = None) -> np.ndarray:
+        return self._gather(rows, lambda part, local: part.latest_cols(local, feature_names), 0)
+
+    def latest_features(self, rows, feature_names: Sequence[str]) -> np.ndarray:
+        return self._gather(rows, lambda part, local: part.latest_features(local, feature_names), len(feature_names))
+
+    def with_month(self, month, column: np.ndarray) -> Tuple['PartitionedPriceIndexTable', int]:
+        """Record an appended/revised month; partitions apply it lazily when they load"""
+        month = np.datetime64(month, 'M')
+        months, pos, _ = self._insert_month(month)
+        table = PartitionedPriceIndexTable(
+            self.names, self.codes, self.weights, months, self.partition_of, self.local_row,
+            self.partition_keys, self._loader, max_resident=self.max_resident, mtime=self.mtime,
+            updates=self.updates + ((month, np.asarray(column, dtype=np.float64)),),
+        )
+        table._product_index = self._product_index
+        # carry resident partitions over, updated in place of a reload
+        for index, part in list(self._resident.items()):
+            table._resident[index], _ = part.with_month(month, table.updates[-1][1][self._members[index]])
+        return table, pos
+
+
+def _mtime(path: str) -> Optional[float]:
+    try:
+        return os.stat(path).st_mtime
+    except OSError:
+        return None
+
+
+class PriceIndexStore:
+    """Holds the price index in memory and reloads it when the CSV or snapshot mtime changes."""
+
+    def __init__(self, csv_path: str = DEFAULT_CSV_PATH, snapshot_dir: Optional[str] = None):
+        self.csv_path = os.path.abspath(csv_path)
+        self.snapshot_dir = snapshot_dir or snapshot.default_snapshot_path(self.csv_path)
+        self.updates_path = os.path.splitext(self.csv_path)[0] + UPDATES_SUFFIX
+        self.lock_path = os.path.splitext(self.csv_path)[0] + LOCK_SUFFIX
+        self.source: Optional[str] = None
+        self.version = 0
+        self._lock = threading.RLock()
+        self._table: Optional[PriceIndexTable] = None
+        self._signature = None
+        self._updates_offset = 0
+        self._listeners: List[Callable[[PriceIndexTable, int], None]] = []
+        self.reload()
+
+    def subscribe(self, listener: Callable[[PriceIndexTable, int], None]) -> None:
+        """Call `listener(table, first_changed_col)` after every reload or update.
+
+        Caches derived from the price index (predictions, forecasts) use this to
+        refresh only what changed; a full reload reports column 0.
+        """
+        self._listeners.append(listener)
+
+    def _publish(self, table: PriceIndexTable, start_col: int) -> None:
+        self._table = table
+        self.version += 1
+        for listener in list(self._listeners):
+            try:
+                listener(table, start_col)
+            except Exception:
+                # keep publishing to the other listeners, but a failed refresh must not go unnoticed
+                logger.exception('price index listener %r failed for table version %d', listener, self.version)
+
+    @contextmanager
+    def _file_lock(self, exclusive: bool = False):
+        """Cross-process lock over the CSV + update log pair: shared to read, exclusive to write"""
+        if fcntl is None:
+            yield
+            return
+        try:
+            f = open(self.lock_path, 'a')
+        except OSError:
+            yield  # read-only data directory: no process can rewrite the files either
+            return
+        with f:
+            fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _current_signature(self) -> Tuple[Optional[float], Optional[float]]:
+        return _mtime(self.csv_path), _mtime(os.path.join(self.snapshot_dir, snapshot.META_FILE))
+
+    def reload(self) -> PriceIndexTable:
+        """Load from the snapshot (if fresh) or the CSV and atomically swap in the new table"""
+        with self._lock, self._file_lock():
+            return self._reload()
+
+    def _reload(self) -> PriceIndexTable:
+        # caller holds both locks, so the CSV and the log are read as one version
+        signature = self._current_signature()
+        csv_mtime, snapshot_mtime = signature
+        meta = snapshot.read_meta(self.snapshot_dir) if snapshot_mtime is not None else None
+        if meta is not None and (csv_mtime is None or meta['source_mtime'] >= csv_mtime):
+            table = snapshot.load_snapshot(self.snapshot_dir, meta, mtime=csv_mtime)
+            self.source = 'snapshot'
+        else:
+            table = PriceIndexTable.from_frame(pd.read_csv(self.csv_path), mtime=csv_mtime)
+            self.source = 'csv'
+        self._signature = signature
+        # months appended since the CSV/snapshot was written are replayed from the log
+        self._updates_offset = 0
+        table, _ = self._replay_updates(table)
+        self._publish(table, 0)
+        return table
+
+    def _replay_updates(self, table: PriceIndexTable) -> Tuple[PriceIndexTable, Optional[int]]:
+        """Apply update-log lines past the current offset; returns (table, first changed col)"""
+        try:
+            with open(self.updates_path, 'rb') as f:
+                f.seek(self._updates_offset)
+                data = f.read()
+        except OSError:
+            return table, None
+        # only consume complete lines; a writer may be mid-append
+        end = data.rfind(b'\n') + 1
+        start_col = None
+        for line in data[:end].splitlines():
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            table, pos = table.with_month(entry['month'], self._column(table, entry['values']))
+            start_col = pos if start_col is None else min(start_col, pos)
+        self._updates_offset += end
+        return table, start_col
+
+    @staticmethod
+    def _column(table: PriceIndexTable, values: Dict[str, float]) -> np.ndarray:
+        column = np.full(len(table.names), np.nan)
+        unknown = []
+        for key, value in values.items():
+            row = table.row_of_key(key)
+            if row is None:
+                unknown.append(key)
+            elif value is not None:
+                column[row] = float(value)
+        if unknown:
+            raise KeyError(f"Unknown commodities in price index update: {unknown}")
+        return column
+
+    def _updates_pending(self) -> bool:
+        try:
+            return os.stat(self.updates_path).st_size > self._updates_offset
+        except OSError:
+            return False
+
+    def append_month(self, month, values: Dict[str, float], persist: bool = True) -> PriceIndexTable:
+        """Add a new month (or revise an existing one) without rebuilding the matrix.
+
+        Args:
+            month: Month to add or revise ('YYYY-MM', datetime64 or `indxMMYYYY`)
+            values: Mapping of comm_code (or comm_name) to index value
+            persist: Append to the update log so other workers pick the change up
+                (the log assumes a single writer, e.g. the monthly ingestion job)
+
+        Returns:
+            The new table
+        """
+        if isinstance(month, str) and month.startswith(INDEX_PREFIX):
+            month = parse_index_column(month)
+        month = np.datetime64(month, 'M')
+        with self._lock, self._file_lock(exclusive=True):
+            if self._current_signature() != self._signature:
+                self._reload()  # e.g. compacted since: our log offset no longer applies
+            table, _ = self._replay_updates(self._table)
+            table, pos = table.with_month(month, self._column(table, values))
+            if persist:
+                line = json.dumps({'month': str(month), 'values': values, 'at': time.time()}) + '\n'
+                with open(self.updates_path, 'a', encoding='utf-8') as f:
+                    f.write(line)
+                self._updates_offset += len(line.encode('utf-8'))
+            self._publish(table, pos)
+            return table
+
+    @property
+    def table(self) -> PriceIndexTable:
+        """Current table, reloading first if the CSV or snapshot changed on disk
+        and applying any months other workers appended to the update log."""
+        table = self._table
+        if self._current_signature() != self._signature:
+            with self._lock:
+                # another thread may have reloaded while we waited
+                if self._current_signature() == self._signature:
+                    return self._table
+            return self.reload()
+        if self._updates_pending():
+            with self._lock, self._file_lock():
+                if self._current_signature() != self._signature:
+                    return self._reload()  # compacted while we were waiting for the lock
+                table, start_col = self._replay_updates(self._table)
+                if start_col is not None:
+                    self._publish(table, start_col)
+                return self._table
+        return table
+
+    def materials(self) -> List[str]:
+        """Sorted commodity names (for dropdowns)"""
+        return self.table.materials
+
+    def match(self, product: str, table: Optional[PriceIndexTable] = None) -> np.ndarray:
+        """Row indices of commodities matching `product`, in CSV order"""
+        table = table or self.table
+        return np.array(table.product_index.resolve(product), dtype=np.intp)
+
+    def series(self, commodity, start=None, end=None) -> Tuple[np.ndarray, np.ndarray]:
+        """Return (months, values) for one commodity, given by row index or exact name.
+
+        Args:
+            commodity: Row index or commodity name (case-insensitive)
+            start: First month to include (e.g. '2020-01'), optional
+            end: Last month to include, optional
+
+        Returns:
+            Tuple of datetime64[M] months and float index values
+        """
+        table = self.table
+        row = commodity if isinstance(commodity, (int, np.integer)) else table.row_of(str(commodity))
+        if row is None:
+            raise KeyError(f"Unknown commodity '{commodity}'")
+        cols = table.month_slice(start, end)
+        return table.months[cols], table.row_values([row], cols)[0]
+
+    def history(self, rows, start=None, end=None) -> pd.DataFrame:
+        """Long-format history for the given rows, sorted by date.
+
+        Produces the same columns as melting the CSV
+        (comm_name, comm_code, comm_wt, month, price_index, date).
+        """
+        table = self.table
+        rows = np.asarray(rows, dtype=np.intp)
+        cols = table.month_slice(start, end)
+        months = table.months[cols]
+        n_rows, n_months = len(rows), len(months)
+
+        # month-major order, matching melt() followed by a stable sort on date
+        row_idx = np.tile(rows, n_months)
+        month_idx = np.repeat(np.arange(n_months), n_rows)
+        dates = months[month_idx]
+        return pd.DataFrame({
+            'comm_name': table.names[row_idx],
+            'comm_code': table.codes[row_idx],
+            'comm_wt': table.weights[row_idx],
+            'month': [format_index_column(m)[len(INDEX_PREFIX):] for m in dates],
+            'price_index': table.row_values(rows, cols).T.reshape(-1),
+            'date': pd.to_datetime(dates.astype('datetime64[ns]')),
+        })
+
+
+_STORES: Dict[str, PriceIndexStore] = {}
+_STORES_LOCK = threading.Lock()
+
+
+def get_price_store(csv_path: str = DEFAULT_CSV_PATH) -> PriceIndexStore:
+    """Return the process-wide store for `csv_path`, loading it on first use"""
+    key = os.path.abspath(csv_path)
+    store = _STORES.get(key)
+    if store is None:
+        with _STORES_LOCK:
+            store = _STORES.get(key)
+            if store is None:
+                store = PriceIndexStore(key)
+                _STORES[key] = store
+    return store
+
+
+def read_month_columns(path: str) -> Dict[str, Dict[str, float]]:
+    """Read a MOSPI-style CSV with comm_code/comm_name and indxMMYYYY columns.
+
+    Returns:
+        Mapping of `indxMMYYYY` column to {comm_code or comm_name: value}
+    """
+    df = pd.read_csv(path, dtype={'comm_code': str})
+    key_col = 'comm_code' if 'comm_code' in df.columns else 'comm_name'
+    out = {}
+    for col in [c for c in df.columns if c.startswith(INDEX_PREFIX)]:
+        vals = pd.to_numeric(df[col], errors='coerce')
+        out[col] = {str(k): float(v) for k, v in zip(df[key_col], vals) if pd.notna(v)}
+    return out
+
+
+def compact_updates(csv_path: str = DEFAULT_CSV_PATH) -> int:
+    """Fold the update log into the CSV and truncate the log. Returns months written.
+
+    Holds the store's exclusive file lock throughout: workers reload or replay
+    either before (old CSV + log) or after (new CSV, no log), never in between.
+    """
+    store = PriceIndexStore(csv_path)
+    with store._lock, store._file_lock(exclusive=True):
+        return _compact(store)
+
+
+def _compact(store: PriceIndexStore) -> int:
+    # the table matching exactly the CSV + log on disk now
+    table = store._reload()
+    df = pd.read_csv(store.csv_path, dtype={'comm_code': str})
+    try:
+        with open(store.updates_path, encoding='utf-8') as f:
+            entries = [json.loads(line) for line in f if line.strip()]
+    except OSError:
+        return 0
+    months = sorted({e['month'] for e in entries})
+    new_cols = {}
+    for month in months:
+        cols = table.month_slice(month, month)
+        by_code = dict(zip(table.codes, table.row_values(np.arange(len(table.codes)), cols)[:, 0]))
+        new_cols[format_index_column(month)] = [float(by_code[str(c)]) if str(c) in by_code else np.nan
+                                                for c in df['comm_code']]
+    df = pd.concat([df.drop(columns=[c for c in new_cols if c in df.columns]),
+                    pd.DataFrame(new_cols, index=df.index)], axis=1)
+
+    # keep indx columns in chronological order after the id columns
+    index_cols = sorted([c for c in df.columns if c.startswith(INDEX_PREFIX)], key=parse_index_column)
+    df = df[[c for c in df.columns if not c.startswith(INDEX_PREFIX)] + index_cols]
+    tmp = store.csv_path + '.tmp'
+    df.to_csv(tmp, index=False)
+    os.replace(tmp, store.csv_path)
+    os.remove(store.updates_path)
+    return len(months)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Incremental price index maintenance')
+    parser.add_argument('--csv', default=DEFAULT_CSV_PATH, help='price index CSV (default: data/price_index.csv)')
+    sub = parser.add_subparsers(dest='command', required=True)
+    p_append = sub.add_parser('append', help='append or revise months from a CSV with indxMMYYYY columns')
+    p_append.add_argument('path')
+    sub.add_parser('compact', help='write logged months into the CSV and clear the update log')
+    args = parser.parse_args(argv)
+
+    if args.command == 'append':
+        store = get_price_store(args.csv)
+        for col, values in read_month_columns(args.path).items():
+            start = time.perf_counter()
+            table = store.append_month(col, values)
+            print(f"{col}: {len(values)} commodities -> {table.shape[1]} months "
+                  f"in {(time.perf_counter() - start) * 1000:.2f} ms")
+    else:
+        n = compact_updates(args.csv)
+        print(f"Compacted {n} month(s) into {os.path.abspath(args.csv)}")
+
+
+if __name__ == '__main__':
+    main()
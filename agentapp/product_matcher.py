@@ -2,7 +2,10 @@
 Product name normalization and mapping for Material Wise
 Handles common aliases and variations in product names
 """
-from typing import Optional
+import re
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
 import pandas as pd
 
 
@@ -35,6 +38,100 @@ PRODUCT_ALIASES = {
 }
 
 
+class AliasMatcher:
+    """Aho-Corasick automaton over alias strings.
+
+    Finds every alias occurring in a text in one pass, so the cost is
+    O(len(text)) no matter how many aliases are registered. Overlapping hits
+    resolve to the longest alias; equal lengths go to the earliest one.
+    """
+
+    def __init__(self, aliases: Dict[str, str]):
+        self.aliases = dict(aliases)
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._depth: List[int] = [0]
+        # longest alias that is a suffix of the state's path (via fail links), or None
+        self._longest: List[Optional[str]] = [None]
+        for alias in self.aliases:
+            self._add(alias)
+        self._link()
+
+    def _add(self, alias: str) -> None:
+        state = 0
+        for ch in alias:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._depth.append(self._depth[state] + 1)
+                self._longest.append(None)
+            state = nxt
+        self._longest[state] = alias
+
+    def _link(self) -> None:
+        queue = list(self._goto[0].values())
+        for state in queue:  # breadth-first: fail targets are always shallower
+            for ch, nxt in self._goto[state].items():
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(ch, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                if self._longest[nxt] is None:
+                    self._longest[nxt] = self._longest[self._fail[nxt]]
+                queue.append(nxt)
+
+    def _scan(self, text: str):
+        state = 0
+        for end, ch in enumerate(text, 1):
+            while state and ch not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(ch, 0)
+            yield end, state
+
+    def find_all(self, text: str) -> List[Tuple[int, str]]:
+        """Every (start, alias) occurrence in `text`, in order of end position"""
+        hits = []
+        for end, state in self._scan(text):
+            while state:
+                alias = self._longest[state]
+                if alias is None:
+                    break
+                hits.append((end - len(alias), alias))
+                # walk to the next shorter alias ending here
+                state = self._fail[state]
+                while state and self._longest[state] == alias:
+                    state = self._fail[state]
+        return hits
+
+    def longest(self, text: str) -> Optional[str]:
+        """The longest alias occurring in `text` (earliest on ties), or None"""
+        best = None
+        for end, state in self._scan(text):
+            alias = self._longest[state]
+            if alias is not None and (best is None or len(alias) > len(best)):
+                best = alias
+        return best
+
+    def normalize(self, text: str, default: Optional[str] = None) -> Optional[str]:
+        """Target of the longest alias in `text`, else `default`"""
+        alias = self.longest(text)
+        return self.aliases[alias] if alias is not None else default
+
+
+_alias_matcher = AliasMatcher(PRODUCT_ALIASES)
+
+
+def register_alias(alias: str, target: str) -> None:
+    """Add a product alias and recompile the shared matcher"""
+    global _alias_matcher
+    PRODUCT_ALIASES[alias.lower()] = target.lower()
+    _alias_matcher = AliasMatcher(PRODUCT_ALIASES)
+
+
 def normalize_product_name(product: str) -> str:
     """
     Normalize a product name to match CSV entries
@@ -44,20 +141,229 @@ def normalize_product_name(product: str) -> str:
         
     Returns:
         Normalized product name that can match CSV entries
+        (target of the longest alias found in it, or the lowercased input)
     """
     product_lower = product.lower().strip()
-    
-    # Check exact alias match
-    if product_lower in PRODUCT_ALIASES:
-        return PRODUCT_ALIASES[product_lower]
-    
-    # Check if any alias is contained in the product name
-    for alias, target in PRODUCT_ALIASES.items():
-        if alias in product_lower:
-            return target
-    
-    # Return original if no match found
-    return product_lower
+    return _alias_matcher.normalize(product_lower, product_lower)
+
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# Match tiers, best first; mirrors the old str.contains cascade
+TIER_EXACT = 3.0      # query is a substring of the commodity name
+TIER_CLASS = 2.5      # query is a known crawler/marketplace class that resolves to commodities
+TIER_ALIAS = 2.0      # normalized alias target is a substring of the name
+TIER_KEYWORD = 1.0    # one of the query's longer words is a substring of the name
+TIER_FUZZY = 0.5      # typo-tolerant trigram match (e.g. "portlnd cemnt")
+
+FUZZY_MIN_SCORE = 0.5
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase alphanumeric tokens of `text`"""
+    return _TOKEN_RE.findall(text.lower())
+
+
+def trigrams(text: str) -> set:
+    """Character trigrams of each token, padded like pg_trgm ('  tok ')"""
+    grams = set()
+    for tok in tokenize(text):
+        padded = f"  {tok} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class TrigramIndex:
+    """Character-trigram index for typo-tolerant lookup of short terms.
+
+    Each term maps to a payload of commodity rows. A query only touches the
+    posting lists of its own trigrams (counted with np.bincount), so there is
+    no pairwise edit-distance scan over the catalogue.
+    """
+
+    def __init__(self, terms: Dict[str, Tuple[int, ...]], n_rows: int):
+        self.terms = list(terms)
+        self.n_rows = n_rows
+        postings: Dict[str, List[int]] = {}
+        sizes = []
+        for term_id, term in enumerate(self.terms):
+            grams = trigrams(term)
+            sizes.append(len(grams))
+            for g in grams:
+                postings.setdefault(g, []).append(term_id)
+        self._postings = {g: np.array(ids, dtype=np.intp) for g, ids in postings.items()}
+        self._sizes = np.array(sizes, dtype=np.float64)
+        # flattened (term, row) pairs, so per-row maxima are one np.maximum.at
+        self._pair_term = np.array([t for t, term in enumerate(self.terms) for _ in terms[term]], dtype=np.intp)
+        self._pair_row = np.array([r for term in self.terms for r in terms[term]], dtype=np.intp)
+
+    def scores(self, query: str, tie_break: bool = True) -> np.ndarray:
+        """Per-row score: share of query trigrams found in the row's best term.
+
+        With tie_break, Jaccard similarity / 100 is added so terms closer in
+        length to the query rank first among equal coverage.
+        """
+        best = np.zeros(self.n_rows, dtype=np.float64)
+        q = trigrams(query)
+        lists = [self._postings[g] for g in q if g in self._postings]
+        if not lists:
+            return best
+        overlap = np.bincount(np.concatenate(lists), minlength=len(self.terms)).astype(np.float64)
+        term_score = np.round(overlap / len(q), 6)
+        if tie_break:
+            term_score += overlap / (len(q) + self._sizes - overlap) / 100
+        np.maximum.at(best, self._pair_row, term_score[self._pair_term])
+        return best
+
+    def search(self, query: str, k: int = 5) -> List[Tuple[int, float]]:
+        """Top-k (row, score) pairs, best first"""
+        best = self.scores(query)
+        hit = np.flatnonzero(best > 0)
+        top = hit[np.lexsort((hit, -best[hit]))][:k]
+        return [(int(i), float(best[i])) for i in top]
+
+
+class ProductIndex:
+    """Inverted token index over commodity names for fast query resolution.
+
+    Candidates come from token posting lists (infix lookups via a trigram index
+    over the token vocabulary, so 'ment' still finds every cement) and are
+    verified with a substring check on just those names,
+    so a lookup touches a handful of rows instead of scanning the column once
+    per fallback. Results are memoized in an LRU.
+    """
+
+    def __init__(self, names: Sequence[str], class_terms: Optional[Sequence[str]] = None,
+                 cache_size: int = 4096):
+        self.names = [str(n) for n in names]
+        self._lower = [n.lower() for n in self.names]
+        postings: Dict[str, set] = {}
+        for i, name in enumerate(self._lower):
+            for tok in tokenize(name):
+                postings.setdefault(tok, set()).add(i)
+        self._postings = {tok: tuple(sorted(ids)) for tok, ids in postings.items()}
+        self._vocab = sorted(self._postings)
+        # unpadded trigrams of every vocabulary token, for infix candidates
+        vocab_grams: Dict[str, set] = {}
+        for j, tok in enumerate(self._vocab):
+            for g in {tok[k:k + 3] for k in range(len(tok) - 2)}:
+                vocab_grams.setdefault(g, set()).add(j)
+        self._vocab_grams = vocab_grams
+
+        # crawler / marketplace class names resolve through the same cascade at build time
+        if class_terms is None:
+            class_terms = default_class_terms()
+        self._class_ids: Dict[str, Tuple[int, ...]] = {}
+        for term in class_terms:
+            key = term.lower().strip()
+            if key and key not in self._class_ids:
+                ids, _ = self._cascade(key, use_classes=False, use_fuzzy=False)
+                if ids:
+                    self._class_ids[key] = ids
+
+        # typo-tolerant fallback over names, aliases and class terms
+        fuzzy_terms: Dict[str, Tuple[int, ...]] = {n: (i,) for i, n in enumerate(self._lower)}
+        for alias, target in PRODUCT_ALIASES.items():
+            ids = self.phrase_ids(target)
+            if ids:
+                fuzzy_terms.setdefault(alias, ids)
+        for term, ids in self._class_ids.items():
+            fuzzy_terms.setdefault(term, ids)
+        self._trigrams = TrigramIndex(fuzzy_terms, len(self.names))
+
+        self.resolve = lru_cache(maxsize=cache_size)(self._resolve)
+
+    def _infix_ids(self, token: str) -> set:
+        """Rows with a name token that contains `token` anywhere"""
+        if len(token) < 3:
+            words = [w for w in self._vocab if token in w]
+        else:
+            cand = None
+            for g in {token[k:k + 3] for k in range(len(token) - 2)}:
+                cand = self._vocab_grams.get(g, set()) if cand is None else cand & self._vocab_grams.get(g, set())
+                if not cand:
+                    return set()
+            words = [self._vocab[j] for j in cand if token in self._vocab[j]]
+        ids = set()
+        for tok in words:
+            ids.update(self._postings[tok])
+        return ids
+
+    def phrase_ids(self, phrase: str) -> Tuple[int, ...]:
+        """Rows whose name contains `phrase` anywhere (token-infix candidates, substring-verified)"""
+        phrase = phrase.lower().strip()
+        toks = tokenize(phrase)
+        if not toks:
+            return ()
+        cand = None
+        for tok in toks:
+            ids = self._infix_ids(tok)
+            cand = ids if cand is None else cand & ids
+            if not cand:
+                return ()
+        return tuple(i for i in sorted(cand) if phrase in self._lower[i])
+
+    def fuzzy(self, product: str, k: int = 5) -> List[Tuple[int, float]]:
+        """Top-k typo-tolerant matches as (row, score), best first"""
+        return self._trigrams.search(product, k)
+
+    def _cascade(self, product_lower: str, use_classes: bool = True,
+                 use_fuzzy: bool = True) -> Tuple[Tuple[int, ...], float]:
+        ids = self.phrase_ids(product_lower)
+        if ids:
+            return ids, TIER_EXACT
+
+        if use_classes and product_lower in self._class_ids:
+            return self._class_ids[product_lower], TIER_CLASS
+
+        ids = self.phrase_ids(normalize_product_name(product_lower))
+        if ids:
+            return ids, TIER_ALIAS
+
+        # individual keywords (ignore short words)
+        for keyword in [w for w in product_lower.split() if len(w) > 3]:
+            ids = self.phrase_ids(keyword)
+            if ids:
+                return ids, TIER_KEYWORD
+
+        if use_fuzzy:
+            # every row tied with the best trigram coverage, e.g. "cemnt" -> all cements
+            coverage = self._trigrams.scores(product_lower, tie_break=False)
+            top = coverage.max(initial=0.0)
+            if top >= FUZZY_MIN_SCORE:
+                return tuple(int(i) for i in np.flatnonzero(coverage == top)), TIER_FUZZY
+        return (), 0.0
+
+    def _resolve(self, product: str) -> Tuple[int, ...]:
+        return self._cascade(product.lower().strip())[0]
+
+    def rank(self, product: str) -> List[Tuple[int, float]]:
+        """Matching rows with scores: tier score plus the share of query tokens in the name"""
+        product_lower = product.lower().strip()
+        ids, tier = self._cascade(product_lower)
+        toks = set(tokenize(product_lower))
+        scored = []
+        for i in ids:
+            overlap = len(toks & set(tokenize(self._lower[i]))) / len(toks) if toks else 0.0
+            scored.append((i, tier + overlap / 2))
+        return sorted(scored, key=lambda x: (-x[1], x[0]))
+
+    def mask(self, product: str) -> np.ndarray:
+        """Boolean mask over the indexed names (same semantics as find_matching_product)"""
+        out = np.zeros(len(self.names), dtype=bool)
+        out[list(self.resolve(product))] = True
+        return out
+
+
+def default_class_terms() -> List[str]:
+    """Crawler and marketplace class names used as extra resolvable terms"""
+    from agentapp.ingestion.crawler import MATERIAL_CLASSES, BUILDERMART_CLASSES
+    return list(MATERIAL_CLASSES) + list(BUILDERMART_CLASSES)
+
+
+@lru_cache(maxsize=16)
+def _index_for(names: Tuple[str, ...]) -> ProductIndex:
+    return ProductIndex(names)
 
 
 def find_matching_product(df: pd.DataFrame, product: str, column: str = 'comm_name') -> pd.Series:
@@ -72,30 +378,8 @@ def find_matching_product(df: pd.DataFrame, product: str, column: str = 'comm_na
     Returns:
         Boolean Series mask of matching rows
     """
-    product_lower = product.lower().strip()
-    
-    # Try exact match first
-    mask = df[column].str.lower().str.contains(product_lower, regex=False, na=False)
-    
-    if mask.sum() > 0:
-        return mask
-    
-    # Try with normalized name
-    normalized = normalize_product_name(product)
-    mask = df[column].str.lower().str.contains(normalized, regex=False, na=False)
-    
-    if mask.sum() > 0:
-        return mask
-    
-    # Try individual keywords (ignore short words)
-    keywords = [w for w in product_lower.split() if len(w) > 3]
-    for keyword in keywords:
-        mask = df[column].str.lower().str.contains(keyword, regex=False, na=False)
-        if mask.sum() > 0:
-            return mask
-    
-    # Return empty mask if nothing found
-    return pd.Series([False] * len(df), index=df.index)
+    names = tuple(df[column].fillna('').astype(str))
+    return pd.Series(_index_for(names).mask(product), index=df.index)
 
 
 def get_product_display_name(csv_name: str, original_query: str) -> str:
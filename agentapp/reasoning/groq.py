@@ -37,7 +37,18 @@ def _build_human_summary(decision: str, payload: Dict) -> str:
     return " \n".join(lines)
 
 
-def _call_ollama(prompt: str, model: str, ollama_url: str) -> Optional[str]:
+LLM_TIMEOUT_SECONDS = 30.0
+
+
+def llm_configured() -> bool:
+    """True when a network LLM backend would be tried (otherwise reasoning is rule-based by design)"""
+    backend = os.getenv('LLM_BACKEND', 'groq').lower()
+    if backend == 'groq':
+        return GROQ_AVAILABLE and bool(os.getenv('GROQ_API_KEY'))
+    return backend == 'ollama' and bool(os.getenv('OLLAMA_URL'))
+
+
+def _call_ollama(prompt: str, model: str, ollama_url: str, timeout: float = LLM_TIMEOUT_SECONDS) -> Optional[str]:
     """Call an Ollama-compatible local HTTP endpoint. Returns text or None.
     The Ollama server must be running and reachable at `ollama_url` (e.g. http://localhost:11434).
     """
@@ -45,7 +56,7 @@ def _call_ollama(prompt: str, model: str, ollama_url: str) -> Optional[str]:
         resp = requests.post(
             f"{ollama_url.rstrip('/')}/api/chat",
             json={"model": model, "messages": [{"role": "user", "content": prompt}]},
-            timeout=30,
+            timeout=timeout,
         )
         resp.raise_for_status()
         j = resp.json()
@@ -64,13 +75,15 @@ def _call_ollama(prompt: str, model: str, ollama_url: str) -> Optional[str]:
         return None
 
 
-def groq_reasoning(payload: Dict) -> Dict[str, str]:
+def groq_reasoning(payload: Dict, deadline=None) -> Dict[str, str]:
     """Multi-backend LLM reasoning wrapper.
     Supported backends (controlled by env `LLM_BACKEND`):
       - groq: uses Groq client (requires GROQ_API_KEY)
       - ollama: calls an Ollama-compatible HTTP endpoint (set OLLAMA_URL)
 
     If no backend is available, returns deterministic, auditable reasoning.
+    With a `deadline` (agentapp.deadline.Deadline) the backend call is cut
+    off when the request budget runs out, and skipped once it has.
     Returns: {'structured': str, 'summary': str}
     """
     prompt = f"""
@@ -102,11 +115,14 @@ Market Summary: {payload.get('market_summary')}
 """
 
     backend = os.getenv('LLM_BACKEND', 'groq').lower()
+    if deadline is not None and deadline.expired():
+        backend = 'none'
+    timeout = deadline.timeout(LLM_TIMEOUT_SECONDS) if deadline is not None else LLM_TIMEOUT_SECONDS
 
     # 1) Try Groq if selected and configured
     if backend == 'groq' and GROQ_AVAILABLE and os.getenv('GROQ_API_KEY'):
         try:
-            client = Groq(api_key=os.getenv('GROQ_API_KEY'))
+            client = Groq(api_key=os.getenv('GROQ_API_KEY'), timeout=timeout, max_retries=0 if deadline else 2)
             completion = client.chat.completions.create(
                 model=os.getenv('GROQ_MODEL', 'openai/gpt-oss-120b'),
                 messages=[{"role": "user", "content": prompt}],
@@ -129,7 +145,7 @@ Market Summary: {payload.get('market_summary')}
     ollama_url = os.getenv('OLLAMA_URL')
     ollama_model = os.getenv('OLLAMA_MODEL', 'llama-3.3-70b-versatile')
     if backend == 'ollama' and ollama_url:
-        text = _call_ollama(prompt, ollama_model, ollama_url)
+        text = _call_ollama(prompt, ollama_model, ollama_url, timeout)
         if text:
             decision = 'WAIT'
             for ln in text.splitlines():
@@ -0,0 +1,176 @@
+"""
+Binary snapshot format for the price index
+Compiles price_index.csv into memory-mappable .npy arrays so workers share pages instead of parsing CSV
+
+Commodities are partitioned by commodity group (the first PRICE_INDEX_PARTITION_DIGITS
+digits of comm_code, default 4). Only the catalogue in meta.json is loaded eagerly;
+partitions are memory-mapped on first access and kept in an LRU of at most
+PRICE_INDEX_MAX_PARTITIONS partitions (default 32).
+
+Layout of a snapshot directory (default: data/price_index.snapshot/):
+    meta.json           commodity dictionary (names, codes, weights, partition keys),
+                        feature names, source mtime
+    months.npy          datetime64[M] month axis (shared by all partitions)
+    part-<prefix>/      one directory per commodity group:
+        values.npy      float32 (commodities, months) index values
+        features.npy    float64 (features, commodities, months) precomputed model features
+                        (ratio features would lose digits to float32, so they stay exact)
+        latest.npy      intp (commodities,) latest usable month per commodity
+
+Usage:
+    python -m agentapp.snapshot [data/price_index.csv] [--out data/price_index.snapshot] [--digits 4]
+"""
+import argparse
+import json
+import os
+import shutil
+import time
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+SNAPSHOT_VERSION = 3
+META_FILE = 'meta.json'
+PARTITION_DIGITS = int(os.getenv('PRICE_INDEX_PARTITION_DIGITS', '4'))
+MAX_RESIDENT_PARTITIONS = int(os.getenv('PRICE_INDEX_MAX_PARTITIONS', '32'))
+
+
+def default_snapshot_path(csv_path: str) -> str:
+    return os.path.splitext(os.path.abspath(csv_path))[0] + '.snapshot'
+
+
+def partition_key(comm_code: str, digits: int = PARTITION_DIGITS) -> str:
+    return str(comm_code).strip()[:digits] or '_'
+
+
+def _atomic_save(path: str, arr: np.ndarray) -> None:
+    tmp = path + '.tmp.npy'
+    np.save(tmp, arr)
+    os.replace(tmp, path)
+
+
+def compile_snapshot(csv_path: str, out_dir: Optional[str] = None, digits: int = PARTITION_DIGITS) -> str:
+    """Compile the wide price index CSV into a partitioned snapshot directory.
+
+    Args:
+        csv_path: Path to price_index.csv
+        out_dir: Snapshot directory (default: next to the CSV, `.snapshot` suffix)
+        digits: comm_code prefix length used to group commodities into partitions
+
+    Returns:
+        Path of the snapshot directory
+    """
+    from agentapp.price_index import PriceIndexTable
+
+    out_dir = out_dir or default_snapshot_path(csv_path)
+    os.makedirs(out_dir, exist_ok=True)
+
+    source_mtime = os.stat(csv_path).st_mtime
+    table = PriceIndexTable.from_frame(pd.read_csv(csv_path), mtime=source_mtime)
+
+    keys = np.array([partition_key(c, digits) for c in table.codes], dtype=object)
+    partition_keys = sorted(set(keys.tolist()))
+    for key in partition_keys:
+        rows = np.flatnonzero(keys == key)  # ascending, so local order follows catalogue order
+        part_dir = os.path.join(out_dir, f'part-{key}')
+        os.makedirs(part_dir, exist_ok=True)
+        _atomic_save(os.path.join(part_dir, 'values.npy'), table.values[rows].astype(np.float32))
+        _atomic_save(os.path.join(part_dir, 'features.npy'), table.features.data[:, rows].astype(np.float64))
+        _atomic_save(os.path.join(part_dir, 'latest.npy'), table.features.latest_col[rows])
+    _atomic_save(os.path.join(out_dir, 'months.npy'), table.months)
+
+    meta = {
+        'version': SNAPSHOT_VERSION,
+        'source': os.path.abspath(csv_path),
+        'source_mtime': source_mtime,
+        'compiled_at': time.time(),
+        'names': table.names.tolist(),
+        'codes': table.codes.tolist(),
+        'weights': [None if np.isnan(w) else float(w) for w in table.weights],
+        'feature_names': table.features.names,
+        'partition_digits': digits,
+        'partition_keys': partition_keys,
+    }
+    # meta.json is written last: readers treat its mtime as the snapshot version
+    tmp = os.path.join(out_dir, META_FILE + '.tmp')
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False)
+    os.replace(tmp, os.path.join(out_dir, META_FILE))
+
+    # drop partitions from an earlier compile (mapped files stay valid for running workers)
+    for entry in os.listdir(out_dir):
+        if entry.startswith('part-') and entry[len('part-'):] not in partition_keys:
+            shutil.rmtree(os.path.join(out_dir, entry), ignore_errors=True)
+    return out_dir
+
+
+def read_meta(snapshot_dir: str) -> Optional[dict]:
+    try:
+        with open(os.path.join(snapshot_dir, META_FILE), encoding='utf-8') as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return meta if meta.get('version') == SNAPSHOT_VERSION else None
+
+
+def load_snapshot(snapshot_dir: str, meta: Optional[dict] = None, mtime: Optional[float] = None,
+                  max_resident: int = MAX_RESIDENT_PARTITIONS):
+    """Open a snapshot as a PartitionedPriceIndexTable; partitions are memory-mapped lazily"""
+    from agentapp.feature_engine import FEATURES, FeatureMatrix
+    from agentapp.price_index import PartitionedPriceIndexTable, PriceIndexTable
+
+    meta = meta or read_meta(snapshot_dir)
+    if meta is None:
+        raise ValueError(f"No valid price index snapshot in {snapshot_dir}")
+
+    names = np.array(meta['names'], dtype=object)
+    codes = np.array(meta['codes'], dtype=object)
+    weights = np.array([np.nan if w is None else w for w in meta['weights']], dtype=np.float64)
+    months = np.load(os.path.join(snapshot_dir, 'months.npy'))
+    partition_keys = meta['partition_keys']
+    key_pos = {k: i for i, k in enumerate(partition_keys)}
+    partition_of = np.array([key_pos[partition_key(c, meta['partition_digits'])] for c in codes], dtype=np.intp)
+    local_row = np.empty(len(codes), dtype=np.intp)
+    for i in range(len(partition_keys)):
+        members = np.flatnonzero(partition_of == i)
+        local_row[members] = np.arange(len(members))
+    same_features = meta['feature_names'] == list(FEATURES)
+
+    def _load_partition(key: str) -> PriceIndexTable:
+        part_dir = os.path.join(snapshot_dir, f'part-{key}')
+        rows = np.flatnonzero(partition_of == key_pos[key])
+        values = np.load(os.path.join(part_dir, 'values.npy'), mmap_mode='r')
+        if same_features:
+            features = FeatureMatrix(meta['feature_names'], np.load(os.path.join(part_dir, 'features.npy'), mmap_mode='r'),
+                                     latest_col=np.load(os.path.join(part_dir, 'latest.npy')))
+        else:
+            # feature set changed since the snapshot was compiled; recompute in memory
+            features = FeatureMatrix.from_values(values, months=months)
+        return PriceIndexTable(names[rows], codes[rows], weights[rows], months, values,
+                               mtime=mtime, features=features)
+
+    return PartitionedPriceIndexTable(
+        names, codes, weights, months, partition_of, local_row, partition_keys, _load_partition,
+        max_resident=max_resident, mtime=mtime,
+    )
+
+
+def main(argv=None):
+    from agentapp.price_index import DEFAULT_CSV_PATH
+
+    parser = argparse.ArgumentParser(description='Compile price_index.csv into a memory-mappable snapshot')
+    parser.add_argument('csv_path', nargs='?', default=DEFAULT_CSV_PATH)
+    parser.add_argument('--out', default=None, help='snapshot directory (default: <csv>.snapshot)')
+    parser.add_argument('--digits', type=int, default=PARTITION_DIGITS, help='comm_code prefix length per partition')
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    out = compile_snapshot(args.csv_path, args.out, digits=args.digits)
+    meta = read_meta(out)
+    print(f"Compiled {len(meta['names'])} commodities x {len(np.load(os.path.join(out, 'months.npy')))} months "
+          f"in {len(meta['partition_keys'])} partitions -> {out} in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+"""
+Autocomplete for Material Wise
+Prefix trie over commodity names, aliases, crawler classes and marketplace categories
+"""
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from agentapp.product_matcher import PRODUCT_ALIASES, tokenize
+
+# lower sorts first: commodities resolve directly against the price index
+KIND_PRIORITY = {'commodity': 0, 'alias': 1, 'class': 2, 'category': 3}
+MAX_SUGGESTIONS = 10
+
+
+class _Node:
+    __slots__ = ('children', 'top')
+
+    def __init__(self):
+        self.children: Dict[str, '_Node'] = {}
+        self.top: list = []  # (position, entry id) while building, ranked entry ids after
+
+
+class SuggestIndex:
+    """Prefix trie where every node stores its best suggestions.
+
+    Each entry is inserted under the start of every word in its label, so
+    "cem" finds "Ordinary Portland cement". Rankings are precomputed at build
+    time; a lookup walks len(query) nodes and copies at most `limit` entries.
+    """
+
+    def __init__(self, entries: Iterable[Tuple[str, str, str]], keep: int = MAX_SUGGESTIONS):
+        self.keep = keep
+        self.entries: List[Dict[str, str]] = []
+        seen = set()
+        for label, kind, value in entries:
+            key = (label.lower(), value.lower())
+            if key in seen:
+                continue
+            seen.add(key)
+            self.entries.append({'label': label, 'kind': kind, 'value': value})
+
+        self._root = _Node()
+        for entry_id, entry in enumerate(self.entries):
+            tokens = tokenize(entry['label'])
+            for start in range(len(tokens)):
+                # word position 0 (label prefix) outranks later word starts
+                self._insert(' '.join(tokens[start:]), entry_id, min(start, 1))
+        self._finalize(self._root)
+
+    def _insert(self, key: str, entry_id: int, position: int) -> None:
+        node = self._root
+        for ch in key:
+            node = node.children.setdefault(ch, _Node())
+            node.top.append((position, entry_id))
+
+    def _rank(self, position: int, entry_id: int) -> tuple:
+        entry = self.entries[entry_id]
+        return position, KIND_PRIORITY.get(entry['kind'], 9), len(entry['label']), entry['label'].lower()
+
+    def _finalize(self, root: _Node) -> None:
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            best: Dict[int, tuple] = {}
+            for position, entry_id in node.top:
+                rank = self._rank(position, entry_id)
+                if entry_id not in best or rank < best[entry_id]:
+                    best[entry_id] = rank
+            node.top = sorted(best, key=best.get)[:self.keep]
+            stack.extend(node.children.values())
+
+    def suggest(self, query: str, limit: int = MAX_SUGGESTIONS) -> List[Dict[str, str]]:
+        """Up to `limit` entries whose label has a word starting with `query`"""
+        key = ' '.join(tokenize(query))
+        if not key:
+            return []
+        node = self._root
+        for ch in key:
+            node = node.children.get(ch)
+            if node is None:
+                return []
+        return [dict(self.entries[i]) for i in node.top[:limit]]
+
+
+def taxonomy_entries(commodity_names: Sequence[str]) -> List[Tuple[str, str, str]]:
+    """(label, kind, value) entries for the material taxonomy; `value` is what /api/predict accepts"""
+    from agentapp.ingestion.crawler import MATERIAL_CLASSES, BUILDERMART_CLASSES
+    from agentapp.ingestion.scrapers import get_available_categories
+
+    entries = [(name, 'commodity', name) for name in commodity_names]
+    entries += [(alias, 'alias', alias) for alias in PRODUCT_ALIASES]
+    entries += [(c, 'class', c) for c in list(MATERIAL_CLASSES) + list(BUILDERMART_CLASSES)]
+    for categories in get_available_categories().values():
+        for category, products in categories.items():
+            entries.append((category, 'category', category))
+            entries += [(p, 'class', p) for p in products]
+    return entries
+
+
+@lru_cache(maxsize=4)
+def _index_for(names: Tuple[str, ...]) -> SuggestIndex:
+    return SuggestIndex(taxonomy_entries(names))
+
+
+def get_suggest_index(csv_path: Optional[str] = None) -> SuggestIndex:
+    """Suggest index for the store's catalogue, rebuilt only when the commodity list changes"""
+    from agentapp.price_index import DEFAULT_CSV_PATH, get_price_store
+    return _index_for(tuple(get_price_store(csv_path or DEFAULT_CSV_PATH).materials()))
@@ -0,0 +1,9 @@
+"""
+Trend model training: dataset, candidates, hyperparameter search and versioned artifacts
+Run a full training job with `python -m agentapp.training`
+"""
+from agentapp.training.artifact import VERSIONS_DIR, list_versions, promote, read_metadata, write_artifact
+from agentapp.training.candidates import CANDIDATES, DEFAULT_CANDIDATES, register_candidate
+from agentapp.training.dataset import CLASSES, THRESHOLD, build_dataset, select_commodities, time_split, trend_labels
+from agentapp.training.pipeline import train
+from agentapp.training.search import SEARCH_SPACE, search
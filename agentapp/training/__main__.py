@@ -0,0 +1,3 @@
+from agentapp.training.pipeline import main
+
+main()
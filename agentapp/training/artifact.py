@@ -0,0 +1,95 @@
+"""
+Versioned trend model artifacts
+Each training run writes models/versions/<timestamp>-<version>/; promoting one copies it where the registry reads
+"""
+import hashlib
+import io
+import json
+import os
+import shutil
+import time
+from typing import Dict, List, Optional
+
+from agentapp.model_registry import (FEATURES_PATH, LINEAR_PATH, MODEL_PATH, MODELS_DIR, ModelSchemaError,
+                                     export_linear_model, validate_schema)
+
+VERSIONS_DIR = os.path.join(MODELS_DIR, 'versions')
+MODEL_FILE = os.path.basename(MODEL_PATH)
+FEATURES_FILE = os.path.basename(FEATURES_PATH)
+LINEAR_FILE = os.path.basename(LINEAR_PATH)
+METADATA_FILE = 'metadata.json'
+
+
+def file_sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def write_artifact(model, features: List[str], metadata: Dict, out_dir: str = VERSIONS_DIR) -> str:
+    """Write a fitted model, its feature order and metadata to a new version directory.
+
+    The version is the first 12 hex of the pickle's SHA-256, the same id the
+    model registry reports once the artifact is promoted. Linear models also get
+    the NumPy .npz export so serving can skip scikit-learn.
+
+    Returns:
+        Path of the version directory
+    """
+    import joblib
+
+    features = validate_schema(model, features)
+    buf = io.BytesIO()
+    joblib.dump(model, buf)
+    data = buf.getvalue()
+    version = hashlib.sha256(data).hexdigest()[:12]
+    path = os.path.join(out_dir, f"{time.strftime('%Y%m%d-%H%M%S')}-{version}")
+    os.makedirs(path)
+    with open(os.path.join(path, MODEL_FILE), 'wb') as f:
+        f.write(data)
+    joblib.dump(features, os.path.join(path, FEATURES_FILE))
+    try:
+        link = export_linear_model(model, features, os.path.join(path, LINEAR_FILE), version=version)
+    except ModelSchemaError:
+        link = None
+    metadata = dict(metadata, version=version, features=features, model=type(model).__name__, numpy_link=link)
+    with open(os.path.join(path, METADATA_FILE), 'w', encoding='utf-8') as f:
+        json.dump(metadata, f, indent=2, default=str)
+    return path
+
+
+def read_metadata(path: str) -> Dict:
+    with open(os.path.join(path, METADATA_FILE), encoding='utf-8') as f:
+        return json.load(f)
+
+
+def list_versions(out_dir: str = VERSIONS_DIR) -> List[str]:
+    """Version directories, oldest first"""
+    if not os.path.isdir(out_dir):
+        return []
+    return sorted(os.path.join(out_dir, d) for d in os.listdir(out_dir)
+                  if os.path.isfile(os.path.join(out_dir, d, METADATA_FILE)))
+
+
+def promote(path: str, models_dir: Optional[str] = None) -> str:
+    """Make a version directory the served model; returns its version.
+
+    Files are copied next to their destination and renamed into place, so the
+    registry never reads a half-written file. The pickle goes last: the registry
+    only trusts an .npz whose version matches the pickle, and a stale .npz from
+    a previous linear model is removed when the new model has none.
+    """
+    models_dir = models_dir or MODELS_DIR
+    os.makedirs(models_dir, exist_ok=True)
+    for name in (FEATURES_FILE, LINEAR_FILE, MODEL_FILE):
+        src, dst = os.path.join(path, name), os.path.join(models_dir, name)
+        if not os.path.exists(src):
+            if name == LINEAR_FILE and os.path.exists(dst):
+                os.remove(dst)
+            continue
+        tmp = dst + '.promote.tmp'
+        shutil.copyfile(src, tmp)
+        os.replace(tmp, dst)
+    return read_metadata(path)['version']
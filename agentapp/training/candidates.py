@@ -0,0 +1,56 @@
+"""
+Trend model candidates shared by training and backtesting
+Factories are module-level so they can be sent to worker processes
+"""
+from typing import Callable, Dict
+
+import numpy as np
+
+from agentapp.training.dataset import CLASSES
+
+
+def _logreg():
+    from sklearn.linear_model import LogisticRegression
+    return LogisticRegression(max_iter=500)
+
+
+def _logreg_scaled():
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.pipeline import make_pipeline
+    from sklearn.preprocessing import StandardScaler
+    return make_pipeline(StandardScaler(), LogisticRegression(max_iter=500))
+
+
+def _majority():
+    from sklearn.dummy import DummyClassifier
+    return DummyClassifier(strategy='prior')
+
+
+def _gradient_boosting():
+    # CPU stand-in for the notebook's GPU XGBoost/LightGBM models
+    from sklearn.ensemble import HistGradientBoostingClassifier
+    return HistGradientBoostingClassifier(max_iter=100, max_depth=3, learning_rate=0.05)
+
+
+# name -> factory returning an unfitted classifier with fit/predict_proba/classes_
+CANDIDATES: Dict[str, Callable[[], object]] = {
+    'logreg': _logreg,
+    'logreg_scaled': _logreg_scaled,
+    'majority': _majority,
+    'gradient_boosting': _gradient_boosting,
+}
+DEFAULT_CANDIDATES = ['logreg', 'logreg_scaled', 'majority']
+
+
+def register_candidate(name: str, factory: Callable[[], object]) -> None:
+    """Add a model candidate; `factory` must be picklable (a module-level function)"""
+    CANDIDATES[name] = factory
+
+
+def proba_by_class(model, X: np.ndarray) -> np.ndarray:
+    """predict_proba with one column per CLASSES entry (zero for classes the fit never saw)"""
+    proba = model.predict_proba(X)
+    out = np.zeros((len(X), len(CLASSES)))
+    for k, cls in enumerate(model.classes_):
+        out[:, np.searchsorted(CLASSES, cls)] = proba[:, k]
+    return out
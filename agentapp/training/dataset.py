@@ -0,0 +1,77 @@
+"""
+Training data for the trend model
+Features come from the same vectorized engine that serving uses, so the two cannot drift apart
+"""
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+
+from agentapp.feature_engine import DEFAULT_FEATURES, compute_features
+
+CLASSES = np.array([-1, 0, 1])
+THRESHOLD = 0.003  # 0.3% monthly move, as in notebooks/training.ipynb
+
+# commodities the notebook trained on (services.features filters the same way)
+CONSTRUCTION_KEYWORDS = ['steel', 'iron', 'bars', 'rods', 'alloy', 'metal']
+
+
+def trend_labels(values: np.ndarray, horizon: int = 1, threshold: float = THRESHOLD) -> np.ndarray:
+    """Label per (commodity, month): sign of the move from t to t+horizon beyond `threshold`.
+
+    horizon=0 labels the move into month t (from t-1), which is what the
+    notebook trained on: the label is then known from the month's own features.
+
+    Returns:
+        Float array of shape (commodities, months) with -1/0/1, NaN where the move is unknown
+    """
+    values = np.asarray(values, dtype=np.float64)
+    out = np.full(values.shape, np.nan)
+    step = max(horizon, 1)
+    if step < values.shape[1]:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            change = values[:, step:] / values[:, :-step] - 1
+        labels = np.where(change > threshold, 1.0, np.where(change < -threshold, -1.0, 0.0))
+        labels = np.where(np.isfinite(change), labels, np.nan)
+        if horizon == 0:
+            out[:, 1:] = labels
+        else:
+            out[:, :-step] = labels
+    return out
+
+
+def build_dataset(values: np.ndarray, feature_names: Sequence[str] = DEFAULT_FEATURES,
+                  horizon: int = 1, threshold: float = THRESHOLD,
+                  months: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Features and labels for every (commodity, month) with the shared feature engine.
+
+    `months` (datetime64[M] per column) is needed for calendar features.
+
+    Returns:
+        (X of shape (commodities, months, features), y of shape (commodities, months), valid mask)
+    """
+    X = np.moveaxis(compute_features(values, feature_names, months), 0, -1)
+    y = trend_labels(values, horizon, threshold)
+    valid = np.isfinite(X).all(axis=-1) & np.isfinite(y)
+    return X, y, valid
+
+
+def select_commodities(names: Sequence[str], keywords: Optional[Sequence[str]] = CONSTRUCTION_KEYWORDS) -> np.ndarray:
+    """Rows whose name contains any keyword (all rows when `keywords` is None)"""
+    if keywords is None:
+        return np.arange(len(names))
+    return np.array([i for i, name in enumerate(names) if any(k in name.lower() for k in keywords)], dtype=np.intp)
+
+
+def time_split(valid: np.ndarray, quantile: float = 0.8) -> Tuple[np.ndarray, np.ndarray]:
+    """Train/test masks split at the `quantile` of sample months (the notebook's date split)"""
+    sample_months = np.nonzero(valid)[1]
+    if len(sample_months) == 0:
+        return valid.copy(), np.zeros_like(valid)
+    cutoff = np.quantile(sample_months, quantile)
+    month = np.broadcast_to(np.arange(valid.shape[1]), valid.shape)
+    return valid & (month <= cutoff), valid & (month > cutoff)
+
+
+def flatten(X: np.ndarray, y: np.ndarray, mask: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """(samples, features) and integer labels for the masked (commodity, month) cells"""
+    return X[mask], y[mask].astype(int)
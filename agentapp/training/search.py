@@ -0,0 +1,124 @@
+"""
+Parallel hyperparameter search for the trend model
+Every (candidate, params) setting is scored on expanding time folds in a CPU process pool
+"""
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from agentapp.training.candidates import CANDIDATES, proba_by_class
+from agentapp.training.dataset import CLASSES, flatten
+
+# candidate -> {parameter: values}; parameters go through the estimator's set_params
+SEARCH_SPACE: Dict[str, Dict[str, list]] = {
+    'logreg': {'C': [0.01, 0.1, 1.0, 10.0]},
+    'logreg_scaled': {'logisticregression__C': [0.01, 0.1, 1.0, 10.0]},
+    'majority': {},
+    'gradient_boosting': {'max_depth': [2, 3, 5], 'learning_rate': [0.05, 0.1], 'max_iter': [100, 300]},
+}
+
+
+def param_grid(space: Dict[str, list]) -> List[Dict[str, object]]:
+    """Every combination of a candidate's parameter values ([{}] for an empty space)"""
+    keys = sorted(space)
+    return [dict(zip(keys, combo)) for combo in itertools.product(*(space[k] for k in keys))]
+
+
+def time_folds(valid: np.ndarray, n_folds: int = 4, horizon: int = 1) -> List[Tuple[np.ndarray, np.ndarray]]:
+    """Expanding-window (train, test) masks over months.
+
+    The sampled months are cut into n_folds + 1 blocks; fold k tests on block
+    k + 1 and trains on every earlier month whose label was observable before
+    that block starts (month s is labelled from month s + horizon).
+    """
+    months = np.flatnonzero(valid.any(axis=0))
+    if len(months) < n_folds + 1:
+        return []
+    bounds = [int(b[0]) for b in np.array_split(months, n_folds + 1)[1:]] + [valid.shape[1]]
+    month = np.broadcast_to(np.arange(valid.shape[1]), valid.shape)
+    folds = []
+    for start, stop in zip(bounds[:-1], bounds[1:]):
+        train = valid & (month < start - max(horizon, 0))
+        test = valid & (month >= start) & (month < stop)
+        if train.any() and test.any():
+            folds.append((train, test))
+    return folds
+
+
+def log_loss(y_true: np.ndarray, proba: np.ndarray) -> float:
+    onehot = y_true[:, None] == CLASSES[None, :]
+    return float(-np.log(np.clip(proba[onehot], 1e-15, 1)).mean())
+
+
+def make_model(candidate: str, params: Dict[str, object]):
+    """Unfitted candidate with `params` applied"""
+    model = CANDIDATES[candidate]()
+    if params:
+        model.set_params(**params)
+    return model
+
+
+# per-worker data, set once by the pool initializer instead of pickled per task
+_DATA: Dict[str, object] = {}
+
+
+def _init_worker(X: np.ndarray, y: np.ndarray, folds: List[Tuple[np.ndarray, np.ndarray]]) -> None:
+    _DATA.update(X=X, y=y, folds=folds)
+    import sklearn.linear_model  # noqa: F401
+
+
+def _evaluate(candidate: str, params: Dict[str, object]) -> Dict[str, object]:
+    X, y, folds = _DATA['X'], _DATA['y'], _DATA['folds']
+    started = time.process_time()
+    losses, hits, total = [], 0, 0
+    for train, test in folds:
+        model = make_model(candidate, params).fit(*flatten(X, y, train))
+        X_test, y_test = flatten(X, y, test)
+        proba = proba_by_class(model, X_test)
+        losses.append(log_loss(y_test, proba))
+        hits += int((CLASSES[proba.argmax(axis=1)] == y_test).sum())
+        total += len(y_test)
+    return {
+        'candidate': candidate,
+        'params': params,
+        'log_loss': float(np.mean(losses)) if losses else float('inf'),
+        'accuracy': hits / total if total else 0.0,
+        'cpu_seconds': time.process_time() - started,
+    }
+
+
+def search(X: np.ndarray, y: np.ndarray, train: np.ndarray, candidates: Sequence[str],
+           space: Optional[Dict[str, Dict[str, list]]] = None, n_folds: int = 4, horizon: int = 1,
+           workers: Optional[int] = None) -> List[Dict[str, object]]:
+    """Score every candidate setting on time folds of the `train` cells.
+
+    Args:
+        X: Features, shape (commodities, months, features)
+        y: Labels, shape (commodities, months)
+        train: Mask of cells the search may use (the held-out test months excluded)
+        candidates: Names in CANDIDATES
+        space: Parameter grids per candidate (default: SEARCH_SPACE)
+        n_folds: Expanding-window folds
+        horizon: Months ahead the labels look (keeps folds free of look-ahead)
+        workers: Process pool size (default: CPU count)
+
+    Returns:
+        One result per setting (candidate, params, mean fold log_loss, accuracy,
+        cpu_seconds), best log loss first
+    """
+    unknown = [c for c in candidates if c not in CANDIDATES]
+    if unknown:
+        raise KeyError(f"Unknown candidate(s): {unknown}")
+    space = SEARCH_SPACE if space is None else space
+    tasks = [(c, params) for c in candidates for params in param_grid(space.get(c, {}))]
+    folds = time_folds(train, n_folds, horizon)
+    if not folds:
+        raise ValueError("Not enough months of training data for a time-fold search")
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(X, y, folds)) as pool:
+        results = list(pool.map(_evaluate, *zip(*tasks)))
+    return sorted(results, key=lambda r: r['log_loss'])
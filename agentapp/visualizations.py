@@ -8,6 +8,8 @@ import io
 import base64
 from datetime import datetime
 
+from agentapp.forecasting import forecast_series
+
 # Base prices (2012 reference year) for common materials in INR
 # These are approximate wholesale prices used to convert index to actual price
 BASE_PRICES = {
@@ -65,7 +67,8 @@ def create_prediction_line_graph(historical_data: pd.DataFrame,
     
     Args:
         historical_data: DataFrame with 'date' and 'price_index' columns
-        prediction: Dict with 'trend', 'probability', 'predicted_value' (optional)
+        prediction: Dict with 'trend', 'probability', 'predicted_value' (optional),
+            'forecast' (optional, {horizon: {'value', 'lower', 'upper'}} in index units)
         material_name: Name of the material
         
     Returns:
@@ -103,6 +106,19 @@ def create_prediction_line_graph(historical_data: pd.DataFrame,
                    xytext=(10, 10), textcoords='offset points',
                    fontsize=10, color=color, weight='bold')
     
+    # Multi-horizon forecast path with its interval (index units)
+    outlook = prediction.get('forecast') or {}
+    if outlook and not historical_data.empty:
+        last_date = pd.Timestamp(historical_data['date'].iloc[-1])
+        horizons = sorted(outlook)
+        dates = [last_date] + [last_date + pd.DateOffset(months=h) for h in horizons]
+        last_value = historical_data['price_index'].iloc[-1]
+        ax.plot(dates, [last_value] + [outlook[h]['value'] for h in horizons],
+                linestyle='--', marker='o', color='#6C757D', label='Forecast')
+        ax.fill_between(dates, [last_value] + [outlook[h]['lower'] for h in horizons],
+                        [last_value] + [outlook[h]['upper'] for h in horizons],
+                        color='#6C757D', alpha=0.15, label='80% interval')
+
     # Styling
     ax.set_xlabel('Date', fontsize=12, weight='bold')
     ax.set_ylabel('Price Index', fontsize=12, weight='bold')
@@ -235,13 +251,10 @@ def create_comprehensive_visualization(historical_data: pd.DataFrame,
         if pred_val is not None and 50 < pred_val < 300:
             prediction['predicted_value'] = convert_index_to_price(pred_val, material_name)
     elif model_price is not None:
-        # Add predicted value to prediction dict if not present
-        trend = prediction.get('trend', 'STABLE')
-        # Simple prediction: adjust current price based on trend
-        if trend == 'UP' or trend == '1' or trend == 1:
-            prediction['predicted_value'] = model_price * 1.05  # 5% increase
-        elif trend == 'DOWN' or trend == '-1' or trend == -1:
-            prediction['predicted_value'] = model_price * 0.95  # 5% decrease
+        # Add predicted value to prediction dict if not present: next month's index forecast
+        outlook = prediction.get('forecast') or forecast_series(historical_data['price_index'].to_numpy())
+        if 1 in outlook:
+            prediction['predicted_value'] = convert_index_to_price(outlook[1]['value'], material_name)
         else:
             prediction['predicted_value'] = model_price
     
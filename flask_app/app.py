@@ -1,5 +1,4 @@
 from flask import Flask, render_template, request
-import pandas as pd
 
 # Import your existing pipeline
 from services.features import build_latest_features
@@ -8,6 +7,7 @@ from services.climate import rainfall_risk_tn
 from services.scraper import scrape_buildersmart_prices
 from services.confidence import confidence_score
 from services.llm import llm_reasoning
+from agentapp.price_index import get_price_store
 
 app = Flask(__name__)
 
@@ -23,16 +23,13 @@ log.addFilter(Ignore404())
 
 DATA_PATH = "data/price_index.csv"
 
-# Load once for dropdown
-df = pd.read_csv(DATA_PATH)
-
+# Load once for dropdown (memory-mapped snapshot when compiled, CSV otherwise)
 KEYWORDS = ["steel", "iron", "bars", "rods", "alloy", "metal"]
 
-MATERIALS = sorted(
-    df[df["comm_name"].str.lower().apply(
-        lambda x: any(k in x for k in KEYWORDS)
-    )]["comm_name"].unique()
-)
+MATERIALS = [
+    m for m in get_price_store(DATA_PATH).materials()
+    if any(k in m.lower() for k in KEYWORDS)
+]
 def build_sources(product):
     return [
         {
@@ -0,0 +1,115 @@
+"""
+Benchmark price extraction: legacy BeautifulSoup find_all scan vs agentapp.ingestion.extract
+
+Runs both extractors on marketplace pages and reports per-page CPU time, how many
+prices each found and their median. By default the pages are generated to mirror
+BuildersMART and IndiaMART listing markup (nested product cards, price boxes,
+navigation, inline scripts); pass --pages with a directory of saved .html pages to
+measure recorded ones instead.
+
+Usage:
+    python scripts/bench_price_extraction.py [--pages DIR] [--products 40] [--repeat 20]
+"""
+import argparse
+import glob
+import os
+import random
+import re
+import statistics
+import sys
+import time
+
+from bs4 import BeautifulSoup
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+from agentapp.ingestion.extract import extract_prices  # noqa: E402
+
+
+def legacy_extract(html: str):
+    """The per-tag scan the scrapers used before the extractor"""
+    soup = BeautifulSoup(html, 'html.parser')
+    prices = []
+    for tag in soup.find_all(['span', 'div', 'p', 'li']):
+        text = tag.get_text(separator=' ', strip=True)
+        if '₹' in text or 'Rs.' in text or 'INR' in text:
+            prices.extend(int(n) for n in re.findall(r"\d{3,7}", text.replace(',', '')))
+    return prices
+
+
+def _chrome(rng: random.Random, site: str) -> str:
+    nav = ''.join(f'<li><a href="/c/{i}">Category {i}</a></li>' for i in range(60))
+    filters = ''.join(f'<li><label><input type="checkbox"> Brand {i}</label></li>' for i in range(30))
+    script = '<script>window.__STATE__ = {"user": null, "cart": [], "ab": %d};</script>' % rng.randint(0, 9)
+    return (f'<header><nav><ul>{nav}</ul></nav></header>{script}'
+            f'<aside class="filters"><h4>{site} filters</h4><ul>{filters}</ul></aside>')
+
+
+def buildersmart_page(rng: random.Random, products: int) -> str:
+    cards = []
+    for i in range(products):
+        price = rng.randint(350, 60000)
+        cards.append(
+            '<li class="item product product-item"><div class="product-item-info"><div class="product-item-details">'
+            f'<strong class="product-item-name"><a href="/p/{i}">Cement grade {i} 50kg bag</a></strong>'
+            '<div class="product-reviews-summary"><div class="rating-summary"><span>4.2</span></div></div>'
+            f'<div class="price-box price-final_price"><span class="price-container"><span class="price">₹{price:,}</span>'
+            '</span></div><div class="product-item-actions"><button>Add to cart</button></div>'
+            '</div></div></li>')
+    return (f'<html><head><title>Cement</title></head><body>{_chrome(rng, "BuildersMART")}'
+            f'<main><div class="products wrapper"><ol class="products list items">{"".join(cards)}</ol></div></main>'
+            '<footer><p>Free delivery above Rs. 5,000</p></footer></body></html>')
+
+
+def indiamart_page(rng: random.Random, products: int) -> str:
+    cards = []
+    for i in range(products):
+        price = rng.randint(300, 9000)
+        cards.append(
+            f'<div class="card"><div class="cardbody"><div class="prd-name"><a href="/proddetail/{i}">'
+            f'OPC 53 Grade Cement</a></div><div class="lh-details"><div><p>Packaging Size: 50 Kg</p>'
+            f'<p>Brand: Brand {i % 7}</p></div></div><div><div><span>₹ {price:,}/ Bag</span></div></div>'
+            f'<div class="companyname"><a>Traders {i}</a></div><div class="newLocationUi">Chennai</div></div></div>')
+    return (f'<html><head><title>Cement</title></head><body>{_chrome(rng, "IndiaMART")}'
+            f'<section id="listing"><div class="cards">{"".join(cards)}</div></section></body></html>')
+
+
+def _cpu_ms(fn, html: str, repeat: int) -> float:
+    start = time.process_time()
+    for _ in range(repeat):
+        fn(html)
+    return (time.process_time() - start) / repeat * 1000
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--pages', default=None, help='directory of saved .html pages')
+    parser.add_argument('--products', type=int, default=40, help='product cards per generated page')
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args(argv)
+
+    if args.pages:
+        pages = {}
+        for path in sorted(glob.glob(os.path.join(args.pages, '*.html'))):
+            with open(path, encoding='utf-8', errors='replace') as f:
+                pages[os.path.basename(path)] = f.read()
+    else:
+        rng = random.Random(0)
+        pages = {
+            'buildersmart-listing': buildersmart_page(rng, args.products),
+            'indiamart-listing': indiamart_page(rng, args.products),
+        }
+
+    print(f"{'page':<28}{'KB':>6}  {'legacy ms':>10}{'prices':>8}{'median':>9}  {'extract ms':>10}{'prices':>8}{'median':>9}")
+    for name, html in pages.items():
+        old, new = legacy_extract(html), extract_prices(html)
+        print(f"{name[:27]:<28}{len(html.encode()) / 1024:>6.0f}  "
+              f"{_cpu_ms(legacy_extract, html, args.repeat):>10.2f}{len(old):>8}"
+              f"{statistics.median(old) if old else 0:>9.0f}  "
+              f"{_cpu_ms(extract_prices, html, args.repeat):>10.2f}{len(new):>8}"
+              f"{statistics.median(new) if new else 0:>9.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""
+Benchmark product-name resolution: legacy str.contains cascade vs ProductIndex
+
+Runs the same queries (exact, alias, keyword and misspelled) against the real
+catalogue and a synthetic catalogue of --synthetic names, and reports
+per-query latency plus how many queries found a match.
+
+Usage:
+    python scripts/bench_product_matching.py [--synthetic 1000] [--repeat 50]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+import pandas as pd
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+from agentapp.product_matcher import PRODUCT_ALIASES, ProductIndex, normalize_product_name  # noqa: E402
+
+CSV_PATH = os.path.join(ROOT, 'data', 'price_index.csv')
+
+QUERIES = [
+    'cement', 'white cement', 'OPC-53 Grade Cement', 'TMT bars', 'AAC Blocks', 'river sand',
+    'portlnd cemnt', 'pozolana', 'stainles steel', 'whte cement', 'mild stel', 'cemnt',
+]
+
+
+def legacy_cascade(names: pd.Series, product: str) -> pd.Series:
+    """The str.contains cascade find_matching_product used before the index"""
+    product_lower = product.lower()
+    mask = names.str.contains(product_lower, case=False, na=False, regex=False)
+    if mask.any():
+        return mask
+    normalized = normalize_product_name(product)
+    if normalized != product_lower:
+        mask = names.str.contains(normalized, case=False, na=False, regex=False)
+        if mask.any():
+            return mask
+    for keyword in product_lower.split():
+        if len(keyword) > 3:
+            mask = names.str.contains(keyword, case=False, na=False, regex=False)
+            if mask.any():
+                return mask
+    return mask
+
+
+def synthetic_names(base, n, seed=0):
+    rng = random.Random(seed)
+    words = sorted({w for name in base for w in name.lower().split() if w.isalpha() and len(w) > 2})
+    words += sorted({w for alias in PRODUCT_ALIASES for w in alias.split()})
+    return [' '.join(rng.sample(words, rng.randint(2, 5))).capitalize() for _ in range(n)]
+
+
+def bench(label, fn, queries, repeat):
+    start = time.perf_counter()
+    hits = 0
+    for _ in range(repeat):
+        hits = sum(bool(fn(q)) for q in queries)
+    per_query = (time.perf_counter() - start) / (repeat * len(queries)) * 1e6
+    print(f"  {label:<28} {per_query:9.1f} us/query   matched {hits}/{len(queries)}")
+
+
+def run(names, repeat):
+    series = pd.Series(names)
+    start = time.perf_counter()
+    index = ProductIndex(names, class_terms=[])
+    print(f"{len(names)} names, index built in {(time.perf_counter() - start) * 1000:.1f} ms")
+    bench('legacy str.contains', lambda q: legacy_cascade(series, q).any(), QUERIES, repeat)
+    bench('index cascade (uncached)', lambda q: index._resolve(q), QUERIES, repeat)
+    bench('index cascade (cached)', index.resolve, QUERIES, repeat)
+    bench('trigram top-5 only', lambda q: index.fuzzy(q, 5), QUERIES, repeat)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark product name matching')
+    parser.add_argument('--synthetic', type=int, default=1000, help='size of the synthetic catalogue')
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args(argv)
+
+    names = pd.read_csv(CSV_PATH)['comm_name'].tolist()
+    run(names, args.repeat)
+    run(names + synthetic_names(names, args.synthetic), args.repeat)
+
+
+if __name__ == '__main__':
+    main()
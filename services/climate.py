@@ -1,6 +1,7 @@
-import requests
+from agentapp.ingestion.http_client import get_http_client
 
-def rainfall_risk_tn():
+def rainfall_risk_tn(deadline=None):
+    """(risk score, label) from the last 14 days of Chennai rainfall; `deadline` bounds the API call"""
     url = (
         "https://api.open-meteo.com/v1/forecast"
         "?latitude=13.08&longitude=80.27"
@@ -10,7 +11,9 @@ def rainfall_risk_tn():
     )
 
     try:
-        data = requests.get(url, timeout=10).json()
+        client = get_http_client()
+        timeout = deadline.timeout(client.timeout) if deadline is not None else None
+        data = client.get(url, timeout=timeout).json()
         rainfall = sum(data["daily"]["precipitation_sum"])
     except Exception:
         rainfall = 15.0
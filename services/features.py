@@ -1,4 +1,6 @@
-import pandas as pd
+import numpy as np
+
+from agentapp.price_index import get_price_store
 
 KEYWORDS = [
     "steel",
@@ -11,46 +13,24 @@ KEYWORDS = [
 
 def build_latest_features(csv_path: str, feature_names: list):
     """
-    Builds latest feature row exactly like training pipeline
+    Builds latest feature row exactly like training pipeline.
+    Uses the shared vectorized feature engine (agentapp.feature_engine),
+    so serving and training compute lag_1 / lag_3_mean the same way.
     """
 
-    df = pd.read_csv(csv_path)
-
-    # 1. Identify index columns
-    index_cols = [c for c in df.columns if c.startswith("indx")]
-
-    # 2. Wide → Long
-    df_long = df.melt(
-        id_vars=["comm_name", "comm_code", "comm_wt"],
-        value_vars=index_cols,
-        var_name="month",
-        value_name="price_index"
-    )
-
-    df_long["month"] = df_long["month"].str.replace("indx", "")
-    df_long["date"] = pd.to_datetime(df_long["month"], format="%m%Y")
+    table = get_price_store(csv_path).table
 
-    # 3. Filter construction materials
-    df_long = df_long[
-        df_long["comm_name"].str.lower().apply(
-            lambda x: any(k in x for k in KEYWORDS)
-        )
+    # 1. Filter construction materials
+    rows = [
+        i for i, name in enumerate(table.names)
+        if any(k in name.lower() for k in KEYWORDS)
     ]
 
-    df_long = df_long.sort_values(["comm_name", "date"])
-
-    # 4. Feature engineering
-    df_long["lag_1"] = df_long.groupby("comm_name")["price_index"].shift(1)
-    df_long["lag_3_mean"] = (
-        df_long.groupby("comm_name")["price_index"]
-        .rolling(3)
-        .mean()
-        .reset_index(level=0, drop=True)
-    )
-
-    df_long = df_long.dropna()
-
-    # 5. Take the most recent row
-    latest = df_long.sort_values("date").iloc[[-1]]
+    # 2. Ties on the latest month resolve to the last commodity by name
+    rows = sorted(rows, key=lambda i: table.names[i])
+    row = table.pick_latest(np.array(rows, dtype=np.intp), feature_names)
+    if row is None:
+        raise ValueError("Not enough historical data to compute features")
 
-    return latest[feature_names]
+    # 3. Take the most recent row
+    return table.latest_frame(row, feature_names)
@@ -1,25 +1,32 @@
+from agentapp.product_matcher import AliasMatcher
+
+# MOSPI name fragment -> retail search term
+SEARCH_TERM_ALIASES = {
+    "stainless steel bars": "stainless steel rod",
+    "stainless steel rods": "stainless steel rod",
+    "mild steel": "ms steel",
+    "tmt": "tmt bar",
+    "steel structures": "structural steel",
+    "angles": "steel angle",
+    "channels": "steel channel",
+    "sections": "steel section",
+    "flat products": "steel flat",
+    "long products": "steel rod"
+}
+
+_matcher = AliasMatcher(SEARCH_TERM_ALIASES)
+
+
 def normalize_product_name(product: str) -> str:
     """
     Maps MOSPI-style names to retail-friendly search terms
+    (longest fragment found in the name wins)
     """
     product = product.lower()
 
-    mapping = {
-        "stainless steel bars": "stainless steel rod",
-        "stainless steel rods": "stainless steel rod",
-        "mild steel": "ms steel",
-        "tmt": "tmt bar",
-        "steel structures": "structural steel",
-        "angles": "steel angle",
-        "channels": "steel channel",
-        "sections": "steel section",
-        "flat products": "steel flat",
-        "long products": "steel rod"
-    }
-
-    for k, v in mapping.items():
-        if k in product:
-            return v
+    term = _matcher.normalize(product)
+    if term is not None:
+        return term
 
     # fallback: take first 3 words
     return " ".join(product.split()[:3])
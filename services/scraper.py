@@ -1,13 +1,9 @@
-import requests
-import re
 import numpy as np
-from bs4 import BeautifulSoup
 from services.product_mapper import normalize_product_name
 from agentapp.ingestion.crawler import crawl_material_links
-import re
-from bs4 import BeautifulSoup
+from agentapp.ingestion.extract import extract_prices
+from agentapp.ingestion.page_cache import get_page_cache
 from urllib.parse import urlparse
-import requests
 
 def scrape_buildersmart_prices(product):
     """
@@ -26,16 +22,10 @@ def scrape_buildersmart_prices(product):
     prices = []
 
     try:
-        html = requests.get(url, headers=headers, timeout=10).text
-        soup = BeautifulSoup(html, "html.parser")
-
-        # BuildersMART price blocks often look like:
-        # <span>₹ 52,000</span>
-        for span in soup.find_all("span"):
-            text = span.get_text(strip=True)
-            if "₹" in text:
-                nums = re.findall(r"\d{2,6}", text.replace(",", ""))
-                prices.extend(int(n) for n in nums)
+        cache = get_page_cache()
+        page = cache.fetch(url, headers=headers)
+        # BuildersMART price blocks often look like: <span>₹ 52,000</span>
+        prices = cache.derived(page, 'prices', extract_prices)
 
     except Exception as e:
         return {
@@ -75,19 +65,9 @@ def scrape_prices_from_link(url: str) -> dict:
     """
     headers = {"User-Agent": "Mozilla/5.0", "Accept-Language": "en-IN,en;q=0.9"}
     try:
-        r = requests.get(url, headers=headers, timeout=10)
-        r.raise_for_status()
-        html = r.text
-        soup = BeautifulSoup(html, 'html.parser')
-
-        nums = []
-        for tag in soup.find_all(['span', 'div', 'p', 'li', 'td']):
-            text = tag.get_text(separator=' ', strip=True)
-            if '₹' in text or 'Rs.' in text or 'INR' in text:
-                found = re.findall(r"\d{2,7}", text.replace(',', ''))
-                nums.extend(int(x) for x in found)
-
-        nums = [n for n in nums if 300 <= n <= 1000000]
+        cache = get_page_cache()
+        page = cache.fetch(url, headers=headers)
+        nums = [n for n in cache.derived(page, 'prices', extract_prices) if 300 <= n <= 1000000]
 
         if not nums:
             return {"status": "unavailable", "reason": "no numeric prices found", "source_url": url}
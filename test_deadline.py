@@ -0,0 +1,131 @@
+"""
+Request deadlines: concurrent stages bounded by one budget, partial /api/predict responses
+"""
+import os
+import sys
+import time
+
+from fastapi.testclient import TestClient
+
+ROOT = os.path.abspath(os.path.dirname(__file__))
+sys.path.insert(0, ROOT)
+
+import agentapp.api.main as main
+import agentapp.ingestion.sources as sources
+from agentapp.deadline import Deadline, gather
+
+
+def test_gather_returns_finished_stages_and_names_the_rest():
+    deadline = Deadline(0.3)
+
+    def boom():
+        raise ValueError('parse failed')
+
+    t0 = time.perf_counter()
+    done, late = gather(deadline, {'fast': lambda: 1, 'slow': lambda: time.sleep(1.0), 'broken': boom})
+    assert time.perf_counter() - t0 < 0.6
+    assert done == {'fast': 1} and sorted(late) == ['broken', 'slow']
+
+
+def test_deadline_shortens_timeouts():
+    now = [0.0]
+    deadline = Deadline(2.0, clock=lambda: now[0])
+    assert deadline.timeout((5, 10)) == (2.0, 2.0) and deadline.timeout(1.0) == 1.0
+    now[0] = 3.0
+    assert deadline.expired() and 0 < deadline.timeout(30.0) < 0.01
+
+
+class _SlowIndiaMart:
+    def get(self, source, product, scrape, refresh=None):
+        if source == 'indiamart':
+            time.sleep(1.5)
+        return {'status': 'available', 'label': source, 'source_url': f'https://{source}.test',
+                'prices': [400, 410, 420], 'median': 410}
+
+
+def test_predict_answers_within_budget_with_degraded_fields(monkeypatch):
+    monkeypatch.setattr(main, 'PREDICT_BUDGET_SECONDS', 0.5)
+    monkeypatch.setattr(main, 'rainfall_risk_tn', lambda deadline=None: (0.2, 'Low'))
+    monkeypatch.setattr(sources, 'get_scrape_cache', lambda: _SlowIndiaMart())
+    client = TestClient(main.app)
+
+    t0 = time.perf_counter()
+    resp = client.post('/api/predict', json={'product': 'white cement'})
+    assert time.perf_counter() - t0 < 1.2
+    data = resp.json()
+    assert resp.status_code == 200 and data['trend'] is not None
+    assert data['climate'] == {'score': 0.2, 'label': 'Low'}
+    assert 'market.indiamart' in data['degraded'] and 'market.buildersmart' not in data['degraded']
+    assert 'visualizations' in data['degraded']  # budget already spent waiting for the scrape
+    assert [e['label'] for e in data['evidence']] == ['buildersmart', 'IndiaMART']
+    assert data['budget']['seconds'] == 0.5
+
+
+def test_stages_still_queued_at_the_deadline_are_cancelled():
+    from concurrent.futures import ThreadPoolExecutor
+    ran = []
+    pool = ThreadPoolExecutor(max_workers=1)
+    try:
+        done, late = gather(Deadline(0.2), {'busy': lambda: time.sleep(0.5), 'queued': lambda: ran.append(1)}, pool)
+        time.sleep(0.5)
+        assert done == {} and sorted(late) == ['busy', 'queued']
+        assert ran == []
+    finally:
+        pool.shutdown(wait=True)
+
+
+def test_concurrent_predicts_do_not_block_each_other(monkeypatch):
+    from concurrent.futures import ThreadPoolExecutor
+    monkeypatch.setattr(main, 'PREDICT_BUDGET_SECONDS', 0.5)
+    monkeypatch.setattr(main, 'rainfall_risk_tn', lambda deadline=None: (0.2, 'Low'))
+    monkeypatch.setattr(sources, 'get_scrape_cache', lambda: _SlowIndiaMart())
+    with TestClient(main.app) as client, ThreadPoolExecutor(max_workers=3) as callers:
+        t0 = time.perf_counter()
+        replies = list(callers.map(lambda _: client.post('/api/predict', json={'product': 'white cement'}), range(3)))
+        # one event loop serves all three: blocking it would serialize them (>= 1.5s)
+        assert time.perf_counter() - t0 < 1.2
+    assert all(r.status_code == 200 and r.json()['climate']['label'] == 'Low' for r in replies)
+
+
+def test_visualize_scrapes_all_materials_under_one_deadline(monkeypatch):
+    monkeypatch.setattr(main, 'PREDICT_BUDGET_SECONDS', 0.5)
+    monkeypatch.setattr(main, 'create_multi_material_comparison', lambda results: None)
+    monkeypatch.setattr(sources, 'get_scrape_cache', lambda: _SlowIndiaMart())
+    client = TestClient(main.app)
+
+    t0 = time.perf_counter()
+    resp = client.post('/api/visualize', json={'materials': ['white cement', 'opc', 'tmt bars', 'granite slabs']})
+    # one shared budget, not 0.5s per material
+    assert time.perf_counter() - t0 < 1.2
+    materials = resp.json()['materials']
+    assert [m['name'] for m in materials] == ['white cement', 'opc', 'tmt bars', 'granite slabs']
+    for m in materials[:3]:
+        assert m['degraded'] == ['market.indiamart']
+        assert m['buildersmart_price'] == 410 and m['indiamart_price'] is None
+    assert 'error' in materials[3]
+    assert resp.json()['budget']['seconds'] == 0.5
+
+
+class _SlowEverywhere:
+    def get(self, source, product, scrape, refresh=None):
+        time.sleep(0.3)
+        return {'status': 'available', 'label': source, 'source_url': f'https://{source}.test',
+                'prices': [400, 410, 420], 'median': 410}
+
+
+def test_large_visualize_does_not_starve_predict(monkeypatch):
+    import threading
+    from agentapp.price_index import get_price_store
+    monkeypatch.setattr(main, 'PREDICT_BUDGET_SECONDS', 1.5)
+    monkeypatch.setattr(main, 'rainfall_risk_tn', lambda deadline=None: (0.2, 'Low'))
+    monkeypatch.setattr(main, 'create_multi_material_comparison', lambda results: None)
+    monkeypatch.setattr(sources, 'get_scrape_cache', lambda: _SlowEverywhere())
+    materials = list(dict.fromkeys(get_price_store(main.CSV_PATH).table.names))[:50]
+    client = TestClient(main.app)
+
+    big = threading.Thread(target=lambda: client.post('/api/visualize', json={'materials': materials}))
+    big.start()
+    time.sleep(0.2)  # the 100 visualize scrapes are queued by now
+    data = client.post('/api/predict', json={'product': 'white cement'}).json()
+    big.join()
+    assert not [d for d in data['degraded'] if d.startswith('market.')]
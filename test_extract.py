@@ -0,0 +1,34 @@
+"""
+Price extraction: each price counted once, JSON-LD and price-marked nodes preferred
+"""
+import os
+import sys
+
+ROOT = os.path.abspath(os.path.dirname(__file__))
+sys.path.insert(0, ROOT)
+
+from agentapp.ingestion.extract import extract_prices, prices_in_text
+
+
+def test_nested_containers_count_a_price_once():
+    html = ('<html><body><div><div><div><span>₹</span><span>52,000</span> / tonne</div></div>'
+            '<div><p>Rs. 420 - 450 per bag</p><script>var p = "₹ 999";</script><!-- ₹ 777 --></div>'
+            '<p>Pack of 50 kg</p></div></body></html>')
+    assert extract_prices(html) == [52000, 420, 450]
+
+
+def test_price_marked_nodes_win_over_page_text():
+    html = ('<html><body><p>Free delivery above Rs. 5,000</p><ul>'
+            '<li class="item"><div class="price-box"><span class="price">₹1,234.50</span></div></li>'
+            '<li class="item"><meta itemprop="price" content="380"><span>INR 380</span></li></ul></body></html>')
+    assert extract_prices(html) == [1234, 380]
+
+
+def test_json_ld_offers_win():
+    html = ('<html><head><script type="application/ld+json">{"@graph": [{"offers": {"price": "425"}},'
+            '{"offers": [{"lowPrice": 400, "highPrice": "1,450"}]}]}</script>'
+            '<script type="application/ld+json">not json</script></head>'
+            '<body><span class="price">₹ 5</span></body></html>')
+    assert extract_prices(html) == [425, 400, 1450]
+    assert extract_prices('') == [] and extract_prices('   ') == []
+    assert prices_in_text('Rs 380 to Rs 400, 50 kg, INR12') == [380, 400, 12]
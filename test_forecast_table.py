@@ -0,0 +1,172 @@
+"""
+Tests for the precomputed forecast table
+"""
+import os
+import shutil
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LogisticRegression
+
+ROOT = os.path.abspath(os.path.dirname(__file__))
+sys.path.insert(0, ROOT)
+
+from agentapp.features import build_latest_features
+from agentapp.forecast_table import ForecastTable
+from agentapp.model_registry import MODEL_PATH, FEATURES_PATH, LoadedModel, ModelRegistry
+from agentapp.prediction import predict_trend
+from agentapp.price_index import PriceIndexStore
+
+CSV_PATH = os.path.join(ROOT, 'data', 'price_index.csv')
+FEATURES = ['price_index', 'lag_1', 'lag_3_mean']
+
+
+def _setup(tmp_path):
+    csv_path = str(tmp_path / 'price_index.csv')
+    shutil.copy(CSV_PATH, csv_path)
+    shutil.copy(MODEL_PATH, tmp_path / 'trend_model.pkl')
+    shutil.copy(FEATURES_PATH, tmp_path / 'model_features.pkl')
+    store = PriceIndexStore(csv_path)
+    registry = ModelRegistry(str(tmp_path / 'trend_model.pkl'), str(tmp_path / 'model_features.pkl'))
+    return csv_path, store, registry
+
+
+def test_lookup_matches_on_demand_prediction(tmp_path):
+    csv_path, store, registry = _setup(tmp_path)
+    forecasts = ForecastTable(store, registry)
+    assert forecasts.stats()['commodities'] == len(store.table.names)
+    for product in ['white cement', 'opc', 'tmt bars', 'Mild Steel (MS) Blooms']:
+        hit = forecasts.lookup(product)
+        trend, prob, status = predict_trend(build_latest_features(csv_path, product, FEATURES), registry.current())
+        assert (hit['trend'], hit['model_status']) == (trend, status)
+        assert np.isclose(hit['trend_prob'], prob)
+        assert hit['model_version'] == registry.current().version
+        assert sorted(hit['forecast']) == [1, 3, 6, 12]
+    assert forecasts.lookup('no such material') is None
+    assert forecasts.stats()['hits'] == 4 and forecasts.stats()['misses'] == 1
+
+
+def test_refreshes_after_each_data_load(tmp_path):
+    _, store, registry = _setup(tmp_path)
+    forecasts = ForecastTable(store, registry)
+    before = forecasts.lookup('white cement')
+    refreshes = forecasts.refreshes
+
+    row = store.table.row_of('White cement')
+    store.append_month('2030-01', {store.table.codes[row]: before['price_index'] * 2})
+    _wait_for(lambda: forecasts.refreshes > refreshes)
+    after = forecasts.lookup('white cement')
+    assert after['price_index'] == before['price_index'] * 2
+
+
+def test_publishing_does_not_wait_for_the_rescore(tmp_path, monkeypatch):
+    _, store, registry = _setup(tmp_path)
+    forecasts = ForecastTable(store, registry)
+    refresh = forecasts.refresh
+
+    def slow_refresh(table=None):
+        time.sleep(0.5)
+        return refresh(table)
+    monkeypatch.setattr(forecasts, 'refresh', slow_refresh)
+
+    row = store.table.row_of('White cement')
+    t0 = time.perf_counter()
+    store.append_month('2030-01', {store.table.codes[row]: 500.0})
+    assert time.perf_counter() - t0 < 0.3  # the store lock is not held for a rescore
+    assert forecasts.lookup('white cement') is None  # never the old table's forecast
+    _wait_for(lambda: forecasts.lookup('white cement') is not None)
+    assert forecasts.lookup('white cement')['price_index'] == 500.0
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.01)
+    assert condition()
+
+
+def test_stale_model_is_a_miss_until_rescored(tmp_path):
+    _, store, registry = _setup(tmp_path)
+    forecasts = ForecastTable(store, registry)
+    old = registry.current()
+    new = ModelRegistry(MODEL_PATH, FEATURES_PATH).current()
+    new.version = 'retrained'
+    registry._current = new  # as if the registry had hot-swapped
+
+    assert forecasts.lookup('white cement') is None
+    deadline = time.time() + 5
+    while forecasts.stats()['model_version'] != 'retrained' and time.time() < deadline:
+        time.sleep(0.01)
+    assert forecasts.lookup('white cement')['model_version'] == 'retrained'
+    assert forecasts.lookup('white cement', old) is None
+
+
+def test_scheduled_refresh(tmp_path):
+    _, store, registry = _setup(tmp_path)
+    forecasts = ForecastTable(store, registry)
+    forecasts.start(interval=0.01)
+    deadline = time.time() + 5
+    while forecasts.refreshes < 3 and time.time() < deadline:
+        time.sleep(0.01)
+    forecasts.stop()
+    assert forecasts.refreshes >= 3
+
+
+def test_short_history_is_a_miss_for_long_lookback_models(tmp_path):
+    csv_path = str(tmp_path / 'price_index.csv')
+    df = pd.read_csv(CSV_PATH)
+    index_cols = [c for c in df.columns if c.startswith('indx')]
+    short = df.index[df['comm_name'].str.lower() == 'white cement'][0]
+    df.loc[short, index_cols[:-8]] = np.nan  # 8 months: too short for yoy_change
+    df.to_csv(csv_path, index=False)
+    store = PriceIndexStore(csv_path)
+    registry = ModelRegistry(str(tmp_path / 'missing.pkl'), str(tmp_path / 'missing_features.pkl'))
+
+    features = ['price_index', 'lag_1', 'yoy_change']
+    rows = np.arange(len(store.table.names))
+    usable = rows[store.table.latest_cols(rows, features) >= 0]
+    X = pd.DataFrame(store.table.latest_features(usable, features), columns=features)
+    model = LogisticRegression().fit(X, np.arange(len(X)) % 2)
+    registry._current = LoadedModel(model, features, 'long-lookback')
+
+    forecasts = ForecastTable(store, registry)
+    statuses = {entry[2] for entry in forecasts._current.entries.values()}
+    assert statuses == {'model_loaded'}  # one short commodity no longer sends the batch to the fallback
+    assert short not in forecasts._current.entries and len(forecasts._current.entries) == len(usable)
+    assert forecasts.lookup('white cement') is None
+    assert forecasts.lookup('opc')['model_version'] == 'long-lookback'
+    # the on-demand path builds the model's own features too
+    X_opc = build_latest_features(csv_path, 'opc', features + ['lag_3_mean'])
+    assert predict_trend(X_opc, registry.current())[2] == 'model_loaded'
+
+
+def test_refresh_scores_partitions_without_filling_the_lru(tmp_path):
+    from agentapp.snapshot import compile_snapshot
+    csv_path, dense, registry = _setup(tmp_path)
+    compile_snapshot(csv_path, digits=6)
+    store = PriceIndexStore(csv_path)
+    table = store.table
+    assert len(table.partition_keys) > 2
+    row = table.row_of('Ordinary Portland cement')
+    table.partition(int(table.partition_of[row]))
+    resident = table.resident_partitions
+
+    forecasts = ForecastTable(store, registry)
+    assert table.resident_partitions == resident
+    expected = ForecastTable(dense, registry)
+    assert forecasts.stats()['commodities'] == expected.stats()['commodities']
+    for product in ['white cement', 'opc', 'tmt bars', 'Mild Steel (MS) Blooms']:
+        hit, want = forecasts.lookup(product), expected.lookup(product)
+        assert (hit['trend'], hit['model_status']) == (want['trend'], want['model_status'])
+        assert np.isclose(hit['trend_prob'], want['trend_prob'])
+
+
+def test_refresh_scores_with_its_own_registry(tmp_path):
+    csv_path, store, _ = _setup(tmp_path)
+    empty = ModelRegistry(str(tmp_path / 'missing.pkl'), str(tmp_path / 'missing_features.pkl'))
+    assert empty.current() is None
+    forecasts = ForecastTable(store, empty)
+    # not the process-wide model, even though one is loaded
+    assert forecasts.lookup('opc')['model_status'] == 'model_unavailable'
@@ -0,0 +1,67 @@
+"""
+Tests for the multi-horizon forecast engine
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.abspath(os.path.dirname(__file__))
+sys.path.insert(0, ROOT)
+
+from agentapp.forecasting import HORIZONS, forecast_series, forecast_table, forecast_values
+from agentapp.price_index import get_price_store
+from agentapp.visualizations import create_comprehensive_visualization
+
+CSV_PATH = os.path.join(ROOT, 'data', 'price_index.csv')
+
+
+def test_constant_growth_is_extrapolated_with_damping():
+    series = 100 * 1.01 ** np.arange(40)
+    straight = forecast_values(series[None, :], horizons=[1, 12], window=24, damping=1.0)
+    assert np.allclose(straight.growth, np.log(1.01))
+    assert np.allclose(straight.point[0], series[-1] * 1.01 ** np.array([1, 12]))
+    # no volatility -> zero-width interval
+    assert np.allclose(straight.lower, straight.point) and np.allclose(straight.upper, straight.point)
+    damped = forecast_values(series[None, :], horizons=[12], window=24, damping=0.9)
+    assert series[-1] < damped.point[0, 0] < straight.point[0, 1]
+
+
+def test_vectorized_matches_row_by_row_and_handles_gaps():
+    rng = np.random.default_rng(0)
+    values = 100 * np.exp(np.cumsum(rng.normal(0.003, 0.02, (6, 80)), axis=1))
+    values[1, -5:] = np.nan         # stale commodity: anchored at its last observation
+    values[2, 30:50] = np.nan       # gap inside the window
+    values[3] = np.nan              # no history
+    values[4, :-2] = np.nan         # too little history for a drift
+    together = forecast_values(values)
+    for i in range(len(values)):
+        alone = forecast_values(values[i:i + 1])
+        assert np.allclose(together.point[i], alone.point[0], equal_nan=True)
+        assert np.allclose(together.upper[i], alone.upper[0], equal_nan=True)
+    assert together.anchor_col.tolist()[:5] == [79, 74, 79, -1, 79]
+    assert together.row(3) == {}
+    assert np.allclose(together.point[4], values[4, -1])
+    finite = np.isfinite(together.point)
+    assert (together.lower[finite] <= together.point[finite]).all()
+
+
+def test_forecast_table_covers_every_commodity():
+    table = get_price_store(CSV_PATH).table
+    outlook = forecast_table(table)
+    assert outlook.point.shape == (len(table.names), len(HORIZONS))
+    row = table.row_of('White cement')
+    series = table.row_values([row])[0]
+    assert forecast_series(series) == outlook.row(row)
+    assert sorted(outlook.row(row)) == list(HORIZONS)
+
+
+def test_visualization_uses_forecast_instead_of_flat_rule():
+    dates = pd.date_range('2023-01-01', periods=12, freq='MS')
+    history = pd.DataFrame({'date': dates, 'price_index': np.linspace(130, 141, 12)})
+    prediction = {'trend': '1', 'probability': 0.8}
+    result = create_comprehensive_visualization(history, prediction, {}, 'cement')
+    assert result['line_graph'].startswith('data:image/png;base64,')
+    expected = forecast_series(history['price_index'].to_numpy())[1]['value'] * 300 / 100
+    assert np.isclose(prediction['predicted_value'], expected)
@@ -0,0 +1,208 @@
+"""
+Scraper networking: shared client connection reuse and retries, host breakers and rate limits,
+concurrent candidate fetching
+"""
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT = os.path.abspath(os.path.dirname(__file__))
+sys.path.insert(0, ROOT)
+
+import pytest
+
+from agentapp.ingestion.http_client import HttpClient, get_http_client
+from agentapp.ingestion.throttle import CircuitBreaker, HostUnavailable, TokenBucket
+from agentapp.ingestion.scrapers import first_sufficient
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive
+    connections = 0
+    failures_left = 0
+    throttled = False
+    hits = 0
+
+    def setup(self):
+        _Handler.connections += 1
+        super().setup()
+
+    def do_GET(self):
+        _Handler.hits += 1
+        if _Handler.throttled:
+            self.send_response(429)
+            self.send_header('Retry-After', '60')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        if _Handler.failures_left > 0:
+            _Handler.failures_left -= 1
+            status, body = 503, b'busy'
+        else:
+            status, body = 200, b'<span>Rs. 420</span>'
+        self.send_response(status)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def _serve():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def test_connections_are_reused_across_urls():
+    server, base = _serve()
+    try:
+        _Handler.connections = 0
+        client = HttpClient()
+        for path in ('/a', '/b', '/search?q=cement', '/a'):
+            assert client.get(base + path).status_code == 200
+        assert _Handler.connections == 1
+        (host,) = client.stats()['hosts'].values()
+        assert host == {'connections_opened': 1, 'requests': 4}
+    finally:
+        server.shutdown()
+
+
+def test_transient_errors_are_retried():
+    server, base = _serve()
+    try:
+        _Handler.failures_left = 2
+        client = HttpClient()
+        r = client.get(base + '/price')
+        assert r.status_code == 200 and _Handler.failures_left == 0
+    finally:
+        server.shutdown()
+
+
+def test_throttled_host_fails_fast_until_it_recovers():
+    server, base = _serve()
+    try:
+        _Handler.throttled, _Handler.hits = True, 0
+        client = HttpClient()
+        t0 = time.perf_counter()
+        assert client.get(base + '/search').status_code == 429
+        with pytest.raises(HostUnavailable):
+            client.get(base + '/other')  # Retry-After opened the breaker: no request is sent
+        assert time.perf_counter() - t0 < 1.0 and _Handler.hits == 1
+        guard = client.stats()['guards']['127.0.0.1']
+        assert guard['state'] == 'open' and guard['rejected'] == 1 and guard['rate_per_second'] < 4
+    finally:
+        _Handler.throttled = False
+        server.shutdown()
+
+
+def test_breaker_opens_then_probes_with_one_trial():
+    now = [0.0]
+    breaker = CircuitBreaker(failures=3, reset_seconds=10, clock=lambda: now[0])
+    for _ in range(2):
+        assert breaker.allow()
+        breaker.record_failure()
+    breaker.record_success()  # success resets the consecutive count
+    for _ in range(3):
+        assert breaker.allow()
+        breaker.record_failure()
+    assert breaker.state == 'open' and not breaker.allow()
+
+    now[0] = 10.0
+    assert breaker.allow() and breaker.state == 'half_open'
+    assert not breaker.allow()  # only one trial at a time
+    breaker.record_failure()
+    assert breaker.state == 'open' and not breaker.allow()
+
+    now[0] = 20.0
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == 'closed' and breaker.allow() and breaker.allow()
+
+
+def test_token_bucket_paces_bursts_and_backs_off():
+    now, slept = [0.0], []
+
+    def sleep(seconds):
+        slept.append(seconds)
+        now[0] += seconds
+
+    bucket = TokenBucket(rate=2, burst=2, clock=lambda: now[0], sleep=sleep)
+    assert bucket.acquire() and bucket.acquire() and not slept
+    assert bucket.acquire() and slept == [0.5]
+    assert not bucket.acquire(max_wait=0.1)  # would queue too long: refused, nothing reserved
+
+    bucket.throttle()
+    assert bucket.rate == 1
+    for _ in range(20):
+        bucket.recover()
+    assert bucket.rate == 2
+
+
+def test_one_client_per_process():
+    assert get_http_client() is get_http_client()
+
+
+def test_candidates_fetched_concurrently_in_priority_order():
+    delays = {'a': 0.3, 'b': 0.1, 'c': 0.05, 'd': 0.05, 'e': 0.05}
+    prices = {'a': [500], 'b': [500, 510, 520], 'c': [400, 410, 420], 'd': [1, 2, 3], 'e': [1, 2, 3]}
+    started = []
+
+    def fetch(url):
+        started.append(url)
+        time.sleep(delays[url])
+        if url == 'a':
+            raise IOError('timeout')
+        return prices[url]
+
+    t0 = time.perf_counter()
+    winner, got, error = first_sufficient(list('abcde'), fetch, parallel=3)
+    elapsed = time.perf_counter() - t0
+    # c finishes first but b outranks it; a failing is waited for, not skipped
+    assert (winner, got, str(error)) == (1, [500, 510, 520], 'timeout')
+    assert elapsed < 0.3 + 0.2  # one slow candidate, not the sum of all delays
+    assert 'e' not in started  # nothing after the winner starts once it is known
+
+    assert first_sufficient(['a', 'd'], lambda u: [300], parallel=2)[0] is None
+
+
+def test_deadline_bounds_retries_and_rate_limit_wait():
+    from agentapp.deadline import Deadline
+    server, base = _serve()
+    try:
+        client = HttpClient()
+        _Handler.failures_left, _Handler.hits = 100, 0
+        t0 = time.perf_counter()
+        r = client.get(base + '/busy', deadline=Deadline(0.5))
+        # backing off through three retries alone would take over 3s
+        assert r.status_code == 503 and time.perf_counter() - t0 < 0.9 and _Handler.hits < 4
+        _Handler.failures_left = 0
+
+        client.guard(base).bucket = TokenBucket(rate=0.25, burst=1)
+        client.get(base + '/a', deadline=Deadline(5))
+        t0 = time.perf_counter()
+        with pytest.raises(HostUnavailable):
+            client.get(base + '/a', deadline=Deadline(0.3))  # next token is 4s away
+        assert time.perf_counter() - t0 < 0.1
+    finally:
+        _Handler.failures_left = 0
+        server.shutdown()
+
+
+def test_candidates_stop_at_the_deadline():
+    from agentapp.deadline import Deadline, DeadlineExceeded
+    started = []
+
+    def fetch(url):
+        started.append(url)
+        time.sleep(0.4)
+        return [300]
+
+    t0 = time.perf_counter()
+    with pytest.raises(DeadlineExceeded):
+        first_sufficient(list('abcd'), fetch, parallel=1, deadline=Deadline(0.5))
+    assert time.perf_counter() - t0 < 0.6
+    assert started == ['a', 'b']  # nothing new starts once the budget is spent
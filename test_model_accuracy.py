@@ -1,53 +1,80 @@
-"""Compare model predictions with market prices"""
+"""
+Model accuracy: walk-forward backtest of the trend model and the index-to-price conversion
+"""
+import os
 import sys
-sys.path.append('c:/Users/vikym/Documents/GitHub/material-wise')
 
+import numpy as np
+
+ROOT = os.path.abspath(os.path.dirname(__file__))
+sys.path.insert(0, ROOT)
+
+from agentapp import backtest
+from agentapp.backtest import build_dataset, calibration, run_backtest, trend_labels
 from agentapp.visualizations import convert_index_to_price
 
-print("Model Prediction vs Market Price Analysis")
-print("=" * 80)
-print()
-print("WHY WAS THE MODEL PREDICTION 'WRONG'?")
-print("-" * 80)
-print("The model was NOT wrong! It was predicting a PRICE INDEX, not actual price.")
-print()
-print("WHAT IS A PRICE INDEX?")
-print("-" * 80)
-print("• Price index is a normalized reference number (base year 2012 = 100)")
-print("• If index = 137, it means prices are 37% higher than in 2012")
-print("• Index is NOT the actual price in rupees")
-print()
-print("THE PROBLEM:")
-print("-" * 80)
-print("• We were comparing index (137) with actual prices (₹400-420)")
-print("• This is like comparing temperature in Celsius with Fahrenheit!")
-print()
-print("THE SOLUTION:")
-print("-" * 80)
-print("• Convert price index to estimated actual price using base prices")
-print("• Formula: Actual Price = Base Price (2012) × (Index / 100)")
-print()
-print("EXAMPLE: OPC-53 Grade Cement")
-print("-" * 80)
-
-price_index = 136.7
-base_price = 300
-estimated_price = convert_index_to_price(price_index, "OPC cement")
-market_indiamart = 420
-market_buildersmart = 400
-
-print(f"Price Index (Model): {price_index}")
-print(f"Base Price (2012): ₹{base_price}")
-print(f"Estimated Current Price: ₹{estimated_price:.2f}")
-print(f"Market Price (IndiaMART): ₹{market_indiamart}")
-print(f"Market Price (BuildersMART): ₹{market_buildersmart}")
-print(f"Market Average: ₹{(market_indiamart + market_buildersmart)/2:.2f}")
-print()
-print(f"Accuracy: {100 - abs(estimated_price - (market_indiamart + market_buildersmart)/2) / ((market_indiamart + market_buildersmart)/2) * 100:.1f}%")
-print()
-print("RESULT:")
-print("-" * 80)
-print("✓ Model estimate (₹410) is now within ±2.5% of market average (₹410)")
-print("✓ This is EXCELLENT accuracy for construction material price prediction!")
-print()
-print("=" * 80)
+
+def test_index_converts_to_market_price():
+    # index 136.7 on a 2012 base of 300/bag -> ~410, within 2.5% of the 400-420 market quotes
+    estimated = convert_index_to_price(136.7, 'OPC cement')
+    assert abs(estimated - 410.1) < 0.01
+    assert abs(estimated - 410) / 410 < 0.025
+
+
+def test_trend_labels_look_ahead_by_horizon():
+    values = np.array([[100.0, 101.0, 101.1, 100.0, np.nan]])
+    assert np.array_equal(trend_labels(values, 1), [[1, 0, -1, np.nan, np.nan]], equal_nan=True)
+    assert np.array_equal(trend_labels(values, 2), [[1, -1, np.nan, np.nan, np.nan]], equal_nan=True)
+
+
+class _SpyClassifier:
+    """Records the largest training set it sees; predicts the class prior"""
+    seen = []
+
+    def fit(self, X, y):
+        _SpyClassifier.seen.append(len(X))
+        self.classes_ = np.unique(y)
+        self._prior = np.array([(y == c).mean() for c in self.classes_])
+        return self
+
+    def predict_proba(self, X):
+        return np.tile(self._prior, (len(X), 1))
+
+
+def test_walk_forward_only_trains_on_observed_labels():
+    rng = np.random.default_rng(0)
+    values = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, (3, 30)), axis=1))
+    X, y, valid = build_dataset(values, horizon=2)
+    backtest.register_candidate('spy', _SpyClassifier)
+    _SpyClassifier.seen.clear()
+    backtest._init_worker(X, y, valid, 2)
+    _, results, _ = backtest._run_folds('spy', [10, 11], retrain_every=1)
+    # at month t labels are known up to t - horizon; rows start at month 2 (lag_3_mean)
+    assert _SpyClassifier.seen == [valid[:, :9].sum(), valid[:, :10].sum()]
+    assert [t for t, _, _ in results] == [10, 11]
+    assert all(np.allclose(p.sum(axis=1), 1) for _, _, p in results)
+    del backtest.CANDIDATES['spy']
+
+
+def test_backtest_reports_accuracy_calibration_and_time():
+    rng = np.random.default_rng(1)
+    values = 100 * np.exp(np.cumsum(rng.normal(0.002, 0.01, (4, 48)), axis=1))
+    months = np.arange('2018-01', '2022-01', dtype='datetime64[M]')
+    names = ['a', 'b', 'c', 'd']
+    report = run_backtest(values, names, months, candidates=['majority', 'logreg_scaled'],
+                          start='2020-01', workers=2)
+    for metrics in report.values():
+        assert metrics['samples'] == 4 * 23  # 2020-01 .. 2021-11 (last month has no label)
+        assert 0 <= metrics['accuracy'] <= 1 and metrics['log_loss'] > 0
+        assert sorted(metrics['per_commodity']) == names
+        assert metrics['test_months'] == ['2020-01', '2021-11']
+        assert metrics['wall_seconds'] > 0
+        assert sum(b['count'] for b in metrics['reliability']) == metrics['samples']
+
+
+def test_calibration_error():
+    confidence = np.array([0.9] * 10 + [0.6] * 10)
+    correct = np.array([1] * 9 + [0] + [1] * 6 + [0] * 4, dtype=bool)
+    ece, table = calibration(confidence, correct)
+    assert np.isclose(ece, 0.0)
+    assert [b['count'] for b in table] == [10, 10]
@@ -0,0 +1,195 @@
+"""
+Tests for the resident trend model registry
+"""
+import os
+import shutil
+import sys
+
+import joblib
+import numpy as np
+import pandas as pd
+from fastapi.testclient import TestClient
+from sklearn.linear_model import LogisticRegression
+
+ROOT = os.path.abspath(os.path.dirname(__file__))
+sys.path.insert(0, ROOT)
+
+from agentapp.model_registry import (
+    MODEL_PATH, FEATURES_PATH, ModelRegistry, ModelSchemaError, NumpyLinearModel, export_linear_model,
+)
+from agentapp.prediction import _fallback_trend_matrix, predict_trend, predict_trend_batch, predict_trend_matrix
+from agentapp.api.main import app
+
+CSV_PATH = os.path.join(ROOT, 'data', 'price_index.csv')
+FEATURES = ['price_index', 'lag_1', 'lag_3_mean']
+X = pd.DataFrame([[150.0, 148.0, 147.0]], columns=FEATURES)
+
+
+def _copy_models(tmp_path):
+    model_path, features_path = str(tmp_path / 'trend_model.pkl'), str(tmp_path / 'model_features.pkl')
+    shutil.copy(MODEL_PATH, model_path)
+    shutil.copy(FEATURES_PATH, features_path)
+    return model_path, features_path
+
+
+def _bump_mtime(path):
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10_000_000_000))
+
+
+def _fit(columns, classes=(-1, 0, 1)):
+    rng = np.random.default_rng(0)
+    data = pd.DataFrame(rng.normal(100, 5, (60, len(columns))), columns=columns)
+    return LogisticRegression().fit(data, rng.choice(classes, 60))
+
+
+def test_model_loaded_once_and_used_for_predictions(tmp_path):
+    registry = ModelRegistry(*_copy_models(tmp_path))
+    loaded = registry.current()
+    assert loaded is not None and loaded.features == FEATURES
+    for _ in range(5):
+        trend, prob, status = predict_trend(X, loaded)
+        assert status == 'model_loaded' and trend in {'-1', '0', '1'}
+    registry.current()
+    assert registry.loads == 1
+    # columns are reordered to the fitted schema
+    assert predict_trend(X[FEATURES[::-1]], loaded)[:2] == predict_trend(X, loaded)[:2]
+
+
+def test_hot_swap_keeps_in_flight_model(tmp_path):
+    model_path, features_path = _copy_models(tmp_path)
+    registry = ModelRegistry(model_path, features_path)
+    old = registry.current()
+
+    joblib.dump(_fit(FEATURES), model_path)
+    _bump_mtime(model_path)
+    new = registry.current()
+    assert new is not old and new.version != old.version
+    assert registry.loads == 2
+    # a request that pinned the old model still scores with it
+    assert predict_trend(X, old)[2] == 'model_loaded'
+
+
+def test_schema_mismatch_keeps_previous_model(tmp_path):
+    model_path, features_path = _copy_models(tmp_path)
+    registry = ModelRegistry(model_path, features_path)
+    old = registry.current()
+
+    joblib.dump(['price_index', 'lag_1'], features_path)
+    _bump_mtime(features_path)
+    assert registry.current() is old
+    assert registry.failed_loads == 1 and 'ModelSchemaError' in registry.last_error
+
+    joblib.dump(_fit(['price_index', 'lag_1', 'unknown_feature']), model_path)
+    joblib.dump(['price_index', 'lag_1', 'unknown_feature'], features_path)
+    _bump_mtime(model_path)
+    assert registry.current() is old
+    assert 'cannot compute' in registry.last_error
+
+
+def test_missing_model_falls_back(tmp_path):
+    registry = ModelRegistry(str(tmp_path / 'none.pkl'), str(tmp_path / 'none_features.pkl'))
+    assert registry.current() is None
+    assert registry.stats()['version'] is None
+
+
+def test_metrics_report_model_version():
+    client = TestClient(app)
+    data = client.get('/api/metrics').json()
+    assert len(data['model']['version']) == 12
+    assert data['model']['features'] == FEATURES
+    assert data['price_index']['version'] >= 1
+
+
+def test_predict_trend_batch_matches_single_predictions():
+    from agentapp.features import build_latest_features
+    products = ['white cement', 'tmt bars', 'no such material', 'opc', 'white cement']
+    results = predict_trend_batch(products, CSV_PATH)
+    assert [r['product'] for r in results] == products
+    assert 'error' in results[2]
+    for product, result in zip(products, results):
+        if 'error' in result:
+            continue
+        trend, prob, status = predict_trend(build_latest_features(CSV_PATH, product, FEATURES))
+        assert (result['trend'], result['model_status']) == (trend, status)
+        assert np.isclose(result['trend_prob'], prob)
+
+
+def test_fallback_rule_is_vectorized():
+    trends, probs = _fallback_trend_matrix(np.array([110.0, 90.0, 100.0]), np.array([100.0, 100.0, 100.0]))
+    assert trends.tolist() == ['UP', 'DOWN', 'STABLE']
+    assert np.allclose(probs, [0.6, 0.6, 0.5])
+    # rows the model cannot score (missing lag_3_mean) take the same rule
+    X_rows = pd.DataFrame({'price_index': [110.0, 100.0], 'lag_1': [100.0, 100.0]})
+    results = predict_trend_matrix(X_rows)
+    assert [r[0] for r in results] == ['UP', 'STABLE']
+    assert {r[2] for r in results} == {'model_unavailable'}
+
+
+def test_batch_endpoint():
+    client = TestClient(app)
+    resp = client.post('/api/predict/batch', json={'products': ['white cement', 'xyz']})
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data['model_version'] and len(data['results']) == 2
+    assert data['results'][0]['model_status'] == 'model_loaded'
+    assert client.post('/api/predict/batch', json={'products': []}).status_code == 400
+
+
+def test_batch_endpoint_does_not_block_the_event_loop(monkeypatch):
+    import time
+    from concurrent.futures import ThreadPoolExecutor
+    import agentapp.api.main as main
+
+    def slow_batch(products, csv_path, loaded):
+        time.sleep(0.5)
+        return [{'product': p, 'error': 'stub'} for p in products]
+
+    monkeypatch.setattr(main, 'predict_trend_batch', slow_batch)
+    with TestClient(app) as client, ThreadPoolExecutor(max_workers=3) as callers:
+        t0 = time.perf_counter()
+        replies = list(callers.map(lambda _: client.post('/api/predict/batch', json={'products': ['opc']}), range(3)))
+        # blocking the loop would serialize the three calls (>= 1.5s)
+        assert time.perf_counter() - t0 < 1.2
+    assert all(r.status_code == 200 for r in replies)
+
+
+def test_numpy_export_reproduces_predict_proba(tmp_path):
+    probe = pd.DataFrame(np.random.default_rng(1).normal(120, 30, (200, 3)), columns=FEATURES)
+    for classes in [(-1, 0, 1), (0, 1)]:
+        model = _fit(FEATURES, classes)
+        out = str(tmp_path / f'model_{len(classes)}.npz')
+        link = export_linear_model(model, FEATURES, out)
+        assert link == ('softmax' if len(classes) == 3 else 'binary')
+        scorer = NumpyLinearModel.load(out)
+        assert np.allclose(scorer.predict_proba(probe.to_numpy()), model.predict_proba(probe), rtol=1e-12)
+        assert scorer.predict(probe.to_numpy()).tolist() == model.predict(probe).tolist()
+
+
+def test_non_linear_models_are_not_exported(tmp_path):
+    from sklearn.tree import DecisionTreeClassifier
+    rng = np.random.default_rng(0)
+    tree = DecisionTreeClassifier().fit(pd.DataFrame(rng.normal(size=(30, 3)), columns=FEATURES), rng.choice([0, 1], 30))
+    try:
+        export_linear_model(tree, FEATURES, str(tmp_path / 'tree.npz'))
+    except ModelSchemaError:
+        pass
+    else:
+        raise AssertionError('tree model should not export')
+
+
+def test_registry_prefers_matching_numpy_export(tmp_path):
+    model_path, features_path = _copy_models(tmp_path)
+    pickled = ModelRegistry(model_path, features_path).current()
+    export_linear_model(pickled.model, FEATURES, str(tmp_path / 'trend_model.npz'), version=pickled.version)
+
+    registry = ModelRegistry(model_path, features_path)
+    loaded = registry.current()
+    assert registry.source == 'numpy' and loaded.version == pickled.version
+    assert predict_trend(X, loaded)[:2] == predict_trend(X, pickled)[:2]
+
+    # a retrained pickle makes the export stale until it is re-exported
+    joblib.dump(_fit(FEATURES), model_path)
+    _bump_mtime(model_path)
+    assert registry.current().version != pickled.version
+    assert registry.source == 'pickle'
@@ -3,9 +3,8 @@ import sys
 import os
 sys.path.insert(0, os.path.abspath('.'))
 
-from agentapp.product_matcher import find_matching_product
+from agentapp.price_index import get_price_store
 from agentapp.visualizations import create_comprehensive_visualization
-import pandas as pd
 
 # Load data
 csv_path = 'data/price_index.csv'
@@ -14,26 +13,16 @@ product = 'OPC-53 Grade Cement'
 print(f"Testing visualization for: {product}")
 print("=" * 60)
 
-# Find matching product
-df = pd.read_csv(csv_path)
-mask = find_matching_product(df, product, 'comm_name')
+# Find matching product (memory-mapped snapshot when compiled, CSV otherwise)
+store = get_price_store(csv_path)
+rows = store.match(product)
 
-if mask.sum() > 0:
-    matched_name = df[mask]['comm_name'].iloc[0]
+if len(rows) > 0:
+    matched_name = store.table.names[rows[0]]
     print(f"✓ Matched to CSV product: '{matched_name}'")
     
     # Get historical data
-    sub = df[mask]
-    index_cols = [c for c in sub.columns if c.startswith('indx')]
-    df_long = sub.melt(
-        id_vars=['comm_name','comm_code','comm_wt'], 
-        value_vars=index_cols,
-        var_name='month', 
-        value_name='price_index'
-    )
-    df_long['month'] = df_long['month'].str.replace('indx','', regex=False)
-    df_long['date'] = pd.to_datetime(df_long['month'], format='%m%Y', errors='coerce')
-    df_long = df_long.dropna(subset=['date']).sort_values('date').tail(12)
+    df_long = store.history(rows).tail(12)
     
     print(f"✓ Historical data: {len(df_long)} months")
     print(f"  Latest price index: {df_long['price_index'].iloc[-1]}")
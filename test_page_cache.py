@@ -0,0 +1,126 @@
+"""
+Page cache: conditional revalidation, content-hash reuse and gzip storage
+"""
+import gzip
+import os
+import sys
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT = os.path.abspath(os.path.dirname(__file__))
+sys.path.insert(0, ROOT)
+
+from agentapp.ingestion.http_client import HttpClient
+from agentapp.ingestion.page_cache import PageCache
+
+BODY = '<div class="price-box"><span class="price">₹ 4,200</span></div>'.encode('utf-8')
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    validators = True  # when False, ignore conditional headers like many CDNs do
+    body = BODY
+    seen = []
+
+    def do_GET(self):
+        _Handler.seen.append((self.headers.get('If-None-Match'), self.headers.get('If-Modified-Since')))
+        etag = '"v%d"' % len(_Handler.body)
+        if _Handler.validators and self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(_Handler.body)))
+        if _Handler.validators:
+            self.send_header('ETag', etag)
+            self.send_header('Last-Modified', formatdate(0, usegmt=True))
+        self.end_headers()
+        self.wfile.write(_Handler.body)
+
+    def log_message(self, *args):
+        pass
+
+
+def _serve():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def _counting_parser(calls):
+    def parse(html):
+        calls.append(html)
+        return [int(''.join(ch for ch in html.split('₹')[1].split('<')[0] if ch.isdigit()))]
+    return parse
+
+
+def test_revisit_is_conditional_and_skips_parsing(tmp_path):
+    server, base = _serve()
+    try:
+        _Handler.validators, _Handler.body, _Handler.seen = True, BODY, []
+        cache = PageCache(str(tmp_path), client=HttpClient())
+        calls = []
+        first = cache.fetch(base + '/cement')
+        assert first.status == 'new' and first.changed
+        assert cache.derived(first, 'prices', _counting_parser(calls)) == [4200]
+
+        # a fresh instance (another worker, or after a restart) revalidates from disk
+        cache = PageCache(str(tmp_path), client=HttpClient())
+        again = cache.fetch(base + '/cement')
+        assert again.status == 'not_modified' and not again.changed and again.text == first.text
+        assert cache.derived(again, 'prices', _counting_parser(calls)) == [4200]
+        assert len(calls) == 1
+        assert _Handler.seen[-1] == ('"v%d"' % len(BODY), formatdate(0, usegmt=True))
+
+        (meta_dir,) = os.listdir(tmp_path)
+        (body_file,) = [f for f in os.listdir(tmp_path / meta_dir) if f.endswith('.html.gz')]
+        assert gzip.decompress((tmp_path / meta_dir / body_file).read_bytes()) == BODY
+    finally:
+        server.shutdown()
+
+
+def test_unchanged_content_without_validators_is_not_reparsed(tmp_path):
+    server, base = _serve()
+    try:
+        _Handler.validators, _Handler.body = False, BODY
+        cache = PageCache(str(tmp_path), client=HttpClient())
+        calls = []
+        cache.derived(cache.fetch(base + '/steel'), 'prices', _counting_parser(calls))
+        same = cache.fetch(base + '/steel')
+        assert same.status == 'unchanged'
+        assert cache.derived(same, 'prices', _counting_parser(calls)) == [4200] and len(calls) == 1
+
+        _Handler.body = BODY.replace(b'4,200', b'4,350')
+        changed = cache.fetch(base + '/steel')
+        assert changed.status == 'modified' and changed.changed
+        assert cache.derived(changed, 'prices', _counting_parser(calls)) == [4350] and len(calls) == 2
+    finally:
+        server.shutdown()
+
+
+def test_sweep_on_write_drops_expired_then_least_recently_used(tmp_path):
+    server, base = _serve()
+    try:
+        _Handler.validators, _Handler.body = True, BODY
+        cache = PageCache(str(tmp_path), client=HttpClient(), max_bytes=10 ** 9, max_age=3600, sweep_interval=0)
+        for path, age in [('/old', 7200), ('/a', 600), ('/b', 300)]:  # /old is past max_age
+            cache.fetch(base + path)
+            os.utime(cache._paths(base + path)[0], (time.time() - age,) * 2)
+        size = max(size for _, size, _ in cache._entries())
+
+        cache.max_bytes = int(2.5 * size)  # room for two pages
+        cache.fetch(base + '/c')  # a new page: the write sweeps
+        kept = {url for url in (base + p for p in ['/old', '/a', '/b', '/c'])
+                if os.path.exists(cache._paths(url)[1])}
+        assert kept == {base + '/b', base + '/c'}
+        assert cache.stats()['evicted'] == 2 and len(cache._entries()) == 2
+        assert not any(os.path.exists(p) for p in cache._paths(base + '/old'))
+
+        again = cache.fetch(base + '/a')  # evicted: fetched fresh, not revalidated
+        assert again.status == 'new' and again.text == BODY.decode('utf-8')
+    finally:
+        server.shutdown()
@@ -0,0 +1,333 @@
+"""
+Tests for the in-memory price index store
+"""
+import os
+import sys
+import shutil
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+ROOT = os.path.abspath(os.path.dirname(__file__))
+sys.path.insert(0, ROOT)
+
+from agentapp.price_index import PriceIndexStore, parse_index_column, format_index_column
+from agentapp.snapshot import compile_snapshot
+from agentapp.features import build_latest_features
+from agentapp.feature_engine import compute_features, FeatureMatrix
+
+CSV_PATH = os.path.join(ROOT, 'data', 'price_index.csv')
+
+
+def _legacy_latest_features(product, feature_names):
+    """Reference implementation: the original melt + groupby pipeline"""
+    from agentapp.product_matcher import find_matching_product
+    df = pd.read_csv(CSV_PATH)
+    sub = df[find_matching_product(df, product, 'comm_name')]
+    index_cols = [c for c in sub.columns if c.startswith('indx')]
+    df_long = sub.melt(id_vars=['comm_name', 'comm_code', 'comm_wt'], value_vars=index_cols,
+                       var_name='month', value_name='price_index')
+    df_long['date'] = pd.to_datetime(df_long['month'].str.replace('indx', ''), format='%m%Y')
+    df_long = df_long.sort_values('date', kind='stable')
+    df_long['lag_1'] = df_long.groupby('comm_name')['price_index'].shift(1)
+    df_long['lag_3_mean'] = df_long.groupby('comm_name')['price_index'].rolling(3).mean().reset_index(level=0, drop=True)
+    return df_long.dropna().iloc[[-1]][feature_names]
+
+
+def test_month_columns_round_trip():
+    month = parse_index_column('indx042012')
+    assert month == np.datetime64('2012-04')
+    assert format_index_column(month) == 'indx042012'
+
+
+def test_store_loads_matrix():
+    store = PriceIndexStore(CSV_PATH)
+    df = pd.read_csv(CSV_PATH)
+    n_months = len([c for c in df.columns if c.startswith('indx')])
+    assert store.table.shape == (len(df), n_months)
+    assert store.materials() == sorted(df['comm_name'].unique())
+
+    months, values = store.series('white cement', '2023-01', '2023-03')
+    assert len(months) == 3
+    np.testing.assert_allclose(values, df.loc[df['comm_name'] == 'White cement', ['indx012023', 'indx022023', 'indx032023']].values[0], rtol=1e-6)
+
+
+def test_latest_features_match_legacy_pipeline():
+    names = ['price_index', 'lag_1', 'lag_3_mean']
+    for product in ['cement', 'opc', 'ppc cement', 'TMT Steel Bars', 'White cement']:
+        got = build_latest_features(CSV_PATH, product, names)
+        expected = _legacy_latest_features(product, names)
+        # rtol covers float32 storage when a compiled snapshot is present
+        np.testing.assert_allclose(got.values, expected.values, rtol=1e-6)
+
+
+def test_feature_matrix_matches_pandas_rolling():
+    values = np.array([[1.0, 2.0, 4.0, 8.0, 16.0], [3.0, np.nan, 3.0, 3.0, 6.0]])
+    feats = compute_features(values, ['price_index', 'lag_1', 'lag_3_mean'])
+    for r in range(values.shape[0]):
+        s = pd.Series(values[r])
+        np.testing.assert_allclose(feats[1, r], s.shift(1).values)
+        np.testing.assert_allclose(feats[2, r], s.rolling(3).mean().values)
+
+    fm = FeatureMatrix(['price_index', 'lag_1', 'lag_3_mean'], feats)
+    assert fm.latest_col.tolist() == [4, 4]
+    np.testing.assert_allclose(fm.latest(0, ['lag_1', 'price_index']), [8.0, 16.0])
+    np.testing.assert_allclose(fm.latest_matrix([1, 0], ['price_index']), [[6.0], [16.0]])
+
+
+def test_extended_features_match_pandas_and_keep_latest_month():
+    rng = np.random.default_rng(0)
+    values = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, (2, 30)), axis=1))
+    values[1, :20] = np.nan  # short history: only 10 months
+    months = np.arange('2021-03', '2023-09', dtype='datetime64[M]')
+    names = ['price_index', 'lag_1', 'lag_3_mean', 'volatility_6', 'momentum_12', 'yoy_change', 'month_sin']
+    feats = compute_features(values, names, months)
+    s = pd.Series(values[0])
+    np.testing.assert_allclose(feats[3, 0], s.pct_change(fill_method=None).rolling(6).std().values)
+    np.testing.assert_allclose(feats[4, 0], (s / s.rolling(12).mean() - 1).values)
+    np.testing.assert_allclose(feats[5, 0], s.pct_change(12, fill_method=None).values)
+    assert np.isclose(feats[6, 1, 0], np.sin(2 * np.pi * 2 / 12))  # March
+
+    fm = FeatureMatrix(names, feats)
+    # 12-month features do not hide a commodity with 10 months of history from the base model
+    assert fm.latest_col.tolist() == [29, 29]
+    assert fm.latest_cols(['price_index', 'yoy_change']).tolist() == [29, -1]
+
+    # appending a month recomputes only the tail, calendar features included
+    more = np.concatenate([values, values[:, -1:] * 1.01], axis=1)
+    more_months = np.arange('2021-03', '2023-10', dtype='datetime64[M]')
+    np.testing.assert_allclose(fm.updated(more, 30, more_months).data, compute_features(more, names, more_months))
+
+
+def test_short_history_rows_are_not_read_from_another_month():
+    values = np.tile(np.linspace(100, 130, 30), (2, 1))
+    values[1, :22] = np.nan  # 8 months: enough for the base features, not for yoy_change
+    names = ['price_index', 'lag_1', 'lag_3_mean', 'yoy_change']
+    fm = FeatureMatrix.from_values(values, names)
+    long_names = ['price_index', 'lag_1', 'yoy_change']
+
+    assert fm.latest_cols(long_names).tolist() == [29, -1]
+    matrix = fm.latest_matrix([0, 1], long_names)
+    assert np.isfinite(matrix[0]).all() and np.isnan(matrix[1]).all()
+    with pytest.raises(ValueError):
+        fm.latest(1, long_names)
+    assert fm.latest(1, ['price_index', 'lag_1']).tolist() == [values[1, -1], values[1, -2]]
+
+
+def test_store_reloads_on_mtime_change():
+    tmp = tempfile.mkdtemp()
+    try:
+        path = os.path.join(tmp, 'price_index.csv')
+        shutil.copy(CSV_PATH, path)
+        store = PriceIndexStore(path)
+        assert store.table.values[0, -1] != 999.0
+
+        df = pd.read_csv(path)
+        df.iloc[0, -1] = 999.0
+        df.to_csv(path, index=False)
+        mtime = os.stat(path).st_mtime + 10
+        os.utime(path, (mtime, mtime))
+        assert store.table.values[0, -1] == 999.0
+    finally:
+        shutil.rmtree(tmp)
+
+
+def test_snapshot_is_memory_mapped_and_preferred_when_fresh():
+    tmp = tempfile.mkdtemp()
+    try:
+        path = os.path.join(tmp, 'price_index.csv')
+        shutil.copy(CSV_PATH, path)
+        assert PriceIndexStore(path).source == 'csv'
+
+        compile_snapshot(path)
+        store = PriceIndexStore(path)
+        assert store.source == 'snapshot'
+        table = store.table
+        assert table.resident_partitions == []  # nothing mapped until first access
+        part = table.partition(0)
+        assert isinstance(part.values, np.memmap)
+        assert part.values.dtype == np.float32
+        csv_table = PriceIndexStore(path, snapshot_dir=os.path.join(tmp, 'missing')).table
+        all_rows = np.arange(csv_table.shape[0])
+        np.testing.assert_allclose(table.row_values(all_rows), csv_table.values, rtol=1e-6)
+        np.testing.assert_allclose(table.latest_features(all_rows, ['price_index', 'lag_1', 'lag_3_mean']),
+                                   csv_table.latest_features(all_rows, ['price_index', 'lag_1', 'lag_3_mean']), rtol=1e-6)
+        assert store.materials() == csv_table.materials
+
+        # editing the CSV after compiling makes the snapshot stale
+        mtime = os.stat(path).st_mtime + 10
+        os.utime(path, (mtime, mtime))
+        assert store.table is not None and store.source == 'csv'
+    finally:
+        shutil.rmtree(tmp)
+
+
+def test_snapshot_serves_every_feature_exactly_as_the_csv():
+    from agentapp.feature_engine import FEATURES
+    tmp = tempfile.mkdtemp()
+    try:
+        path = os.path.join(tmp, 'price_index.csv')
+        shutil.copy(CSV_PATH, path)
+        compile_snapshot(path)
+        table = PriceIndexStore(path).table
+        csv_table = PriceIndexStore(path, snapshot_dir=os.path.join(tmp, 'missing')).table
+        all_rows = np.arange(csv_table.shape[0])
+        # ratio features (momentum, volatility, yoy) are small numbers: float32 storage would skew them
+        for name in FEATURES:
+            got, want = table.latest_features(all_rows, [name]), csv_table.latest_features(all_rows, [name])
+            np.testing.assert_allclose(got, want, rtol=1e-12, equal_nan=True, err_msg=name)
+    finally:
+        shutil.rmtree(tmp)
+
+
+def test_append_month_updates_feature_tail_and_other_workers():
+    tmp = tempfile.mkdtemp()
+    try:
+        path = os.path.join(tmp, 'price_index.csv')
+        shutil.copy(CSV_PATH, path)
+        writer = PriceIndexStore(path)
+        reader = PriceIndexStore(path)  # stands in for another uvicorn worker
+        table = writer.table
+        n_months = table.shape[1]
+        codes = table.codes.tolist()
+
+        seen = []
+        reader.subscribe(lambda t, col: seen.append(col))
+
+        new_values = {code: 150.0 + i for i, code in enumerate(codes)}
+        writer.append_month('2023-11', new_values)
+        assert writer.table.shape == (len(codes), n_months + 1)
+
+        # incremental tail must equal a full recompute
+        full = compute_features(writer.table.values, writer.table.features.names, writer.table.months)
+        np.testing.assert_allclose(writer.table.features.data, full)
+        assert (writer.table.features.latest_col == n_months).all()
+
+        # the other worker picks the month up from the update log
+        assert reader.table.shape[1] == n_months + 1
+        assert seen == [n_months]
+        feats = build_latest_features(path, 'White cement', ['price_index', 'lag_1'])
+        assert feats['lag_1'].iloc[0] == table.values[table.row_of('White cement'), -1]
+
+        # revising an existing month only touches that month onwards
+        writer.append_month('indx102023', {codes[0]: 1.0})
+        assert writer.table.values[0, n_months - 1] == 1.0
+        assert writer.table.values[1, n_months - 1] == table.values[1, -1]
+        np.testing.assert_allclose(writer.table.features.data,
+                                   compute_features(writer.table.values, writer.table.features.names,
+                                                    writer.table.months))
+    finally:
+        shutil.rmtree(tmp)
+
+
+def test_month_appended_to_snapshot_matches_csv_exactly():
+    tmp = tempfile.mkdtemp()
+    try:
+        path = os.path.join(tmp, 'price_index.csv')
+        shutil.copy(CSV_PATH, path)
+        compile_snapshot(path)
+        store = PriceIndexStore(path)
+        csv_store = PriceIndexStore(path, snapshot_dir=os.path.join(tmp, 'missing'))
+        assert (store.source, csv_store.source) == ('snapshot', 'csv')
+        codes = csv_store.table.codes.tolist()
+        new_values = {code: 150.0 + i / 10 for i, code in enumerate(codes)}
+        csv_store.append_month('2023-11', new_values, persist=False)
+        store.append_month('2023-11', new_values, persist=False)
+
+        rows = np.arange(len(codes))
+        names = ['price_index', 'lag_1', 'lag_3_mean']
+        # float32 map noise (138.1 -> 138.1000061) must not leak into the float64 tail
+        np.testing.assert_array_equal(store.table.latest_features(rows, names),
+                                      csv_store.table.latest_features(rows, names))
+        np.testing.assert_array_equal(store.table.row_values(rows)[:, -4:], csv_store.table.row_values(rows)[:, -4:])
+    finally:
+        shutil.rmtree(tmp)
+
+
+def test_compact_folds_updates_into_csv():
+    from agentapp.price_index import compact_updates
+    tmp = tempfile.mkdtemp()
+    try:
+        path = os.path.join(tmp, 'price_index.csv')
+        shutil.copy(CSV_PATH, path)
+        store = PriceIndexStore(path)
+        store.append_month('2023-11', {code: 200.0 for code in store.table.codes})
+        assert compact_updates(path) == 1
+        assert not os.path.exists(store.updates_path)
+        df = pd.read_csv(path)
+        assert df.columns[-1] == 'indx112023'
+        assert (df['indx112023'] == 200.0).all()
+        assert PriceIndexStore(path).table.shape == store.table.shape
+    finally:
+        shutil.rmtree(tmp)
+
+
+def test_reload_during_compaction_neither_repeats_nor_skips_months(monkeypatch):
+    import threading
+    from agentapp.price_index import compact_updates
+    tmp = tempfile.mkdtemp()
+    try:
+        path = os.path.join(tmp, 'price_index.csv')
+        shutil.copy(CSV_PATH, path)
+        writer, reader = PriceIndexStore(path), PriceIndexStore(path)
+        codes = writer.table.codes
+        writer.append_month('2023-11', {code: 200.0 for code in codes})
+        writer.append_month('2023-12', {code: 210.0 for code in codes})
+        assert reader.table.shape[1] == writer.table.shape[1]
+
+        # pause compaction between writing the CSV and removing the log
+        replaced, real_replace = threading.Event(), os.replace
+
+        def slow_replace(src, dst):
+            real_replace(src, dst)
+            if dst == path:
+                replaced.set()
+                time.sleep(0.3)
+        monkeypatch.setattr(os, 'replace', slow_replace)
+        compaction = threading.Thread(target=compact_updates, args=(path,))
+        compaction.start()
+        assert replaced.wait(5)
+        during = reader.table  # waits for the compaction instead of pairing the new CSV with the old log
+        compaction.join()
+        monkeypatch.setattr(os, 'replace', real_replace)
+        assert not os.path.exists(writer.updates_path)
+        assert during.shape[1] == writer.table.shape[1]
+
+        writer.append_month('2024-01', {code: 220.0 for code in codes})
+        after = reader.table
+        assert after.shape[1] == during.shape[1] + 1  # the first month logged after compaction is not skipped
+        assert after.row_values([0])[0, -3:].tolist() == [200.0, 210.0, 220.0]
+    finally:
+        shutil.rmtree(tmp)
+
+
+def test_partitions_load_lazily_with_lru_cap_and_replay_updates():
+    from agentapp.snapshot import load_snapshot
+    tmp = tempfile.mkdtemp()
+    try:
+        path = os.path.join(tmp, 'price_index.csv')
+        shutil.copy(CSV_PATH, path)
+        snap = compile_snapshot(path, digits=6)
+        table = load_snapshot(snap, max_resident=2)
+        assert len(table.partition_keys) > 2
+        assert sorted(set(table.partition_keys)) == sorted({c[:6] for c in table.codes})
+
+        for i in range(len(table.partition_keys)):
+            table.partition(i)
+        assert len(table.resident_partitions) == 2
+        assert table.resident_partitions == table.partition_keys[-2:]
+
+        # an appended month is replayed onto partitions as they load
+        row = table.row_of('Ordinary Portland cement')
+        column = np.full(table.shape[0], np.nan)
+        column[row] = 140.0
+        updated, pos = table.with_month('2023-11', column)
+        assert pos == table.shape[1] and updated.shape[1] == table.shape[1] + 1
+        assert updated.row_values([row])[0, -1] == 140.0
+        assert updated.latest_cols([row])[0] == pos
+        assert updated.pick_latest(np.arange(updated.shape[0])) == row
+    finally:
+        shutil.rmtree(tmp)
@@ -0,0 +1,102 @@
+"""
+Tests for product name resolution
+"""
+import os
+import sys
+
+import pandas as pd
+
+ROOT = os.path.abspath(os.path.dirname(__file__))
+sys.path.insert(0, ROOT)
+
+from agentapp.product_matcher import (
+    AliasMatcher, ProductIndex, find_matching_product, normalize_product_name, TIER_EXACT, TIER_ALIAS, TIER_FUZZY,
+)
+from services.product_mapper import normalize_product_name as search_term
+
+CSV_PATH = os.path.join(ROOT, 'data', 'price_index.csv')
+NAMES = pd.read_csv(CSV_PATH)['comm_name'].tolist()
+
+
+def _rows(name_substring):
+    return tuple(i for i, n in enumerate(NAMES) if name_substring in n.lower())
+
+
+def test_resolve_follows_match_cascade():
+    index = ProductIndex(NAMES)
+    # exact substring of the name
+    assert index.resolve('cement') == _rows('cement')
+    assert index.resolve('Mild Steel (MS)') == _rows('mild steel (ms)')
+    # alias fallback
+    assert index.resolve('OPC-53 Grade Cement') == _rows('ordinary portland cement')
+    assert index.rank('opc')[0] == (NAMES.index('Ordinary Portland cement'), TIER_ALIAS + 0.0)
+    # keyword fallback
+    assert index.resolve('AAC Blocks') == _rows('blocks')
+    assert index.resolve('river sand') == ()
+
+
+def test_phrases_match_anywhere_in_the_name():
+    index = ProductIndex(NAMES)
+    # infix, not just token prefixes: 'ment' is inside every cement
+    assert index.phrase_ids('ment') == _rows('ment') and len(_rows('cement')) == 8
+    assert set(_rows('cement')) <= set(index.phrase_ids('ment'))
+    for phrase in ['ortland c', 'ms)', 'el']:
+        assert index.phrase_ids(phrase) == _rows(phrase)
+
+
+def test_crawler_classes_resolve_through_index():
+    index = ProductIndex(NAMES, class_terms=['Fe-500 Grade TMT Bars'])
+    assert index.resolve('fe-500 grade tmt bars') == _rows('steel')
+
+
+def test_find_matching_product_returns_mask():
+    df = pd.read_csv(CSV_PATH)
+    mask = find_matching_product(df, 'white cement', 'comm_name')
+    assert mask.index.equals(df.index)
+    assert df[mask]['comm_name'].tolist() == ['White cement']
+    assert not find_matching_product(df, 'granite slabs').any()
+
+
+def test_resolve_is_memoized():
+    index = ProductIndex(NAMES)
+    index.resolve('ppc cement')
+    index.resolve('ppc cement')
+    info = index.resolve.cache_info()
+    assert info.hits == 1 and info.misses == 1
+    assert index.rank('white cement')[0][1] > TIER_EXACT
+
+
+def test_fuzzy_tier_tolerates_typos():
+    index = ProductIndex(NAMES)
+    assert index.resolve('portlnd cemnt') == _rows('ordinary portland cement')
+    assert index.resolve('pozolana') == _rows('pozzolana')
+    # all rows tied on trigram coverage come back, like the substring tiers
+    assert index.resolve('cemnt') == _rows('cement')
+    assert index.rank('portlnd cemnt')[0][1] == TIER_FUZZY
+    assert index.resolve('xyz') == ()
+
+
+def test_fuzzy_top_k_scores():
+    index = ProductIndex(NAMES)
+    top = index.fuzzy('stainles steel', k=3)
+    assert len(top) == 3
+    assert NAMES[top[0][0]].startswith('Stainless Steel')
+    assert [s for _, s in top] == sorted((s for _, s in top), reverse=True)
+    assert index.fuzzy('', k=3) == []
+
+
+def test_alias_matcher_finds_all_hits_and_prefers_longest():
+    matcher = AliasMatcher({'he': 'a', 'she': 'b', 'his': 'c', 'hers': 'd'})
+    assert matcher.find_all('ushers') == [(1, 'she'), (2, 'he'), (2, 'hers')]
+    assert matcher.longest('ushers') == 'hers'
+    assert matcher.normalize('ushers') == 'd'
+    assert matcher.normalize('xyz', 'fallback') == 'fallback'
+
+
+def test_normalizers_use_longest_alias():
+    assert normalize_product_name('OPC-53 Grade Cement') == 'ordinary portland cement'
+    assert normalize_product_name('Granite') == 'granite'
+    # 'long products' is more specific than 'mild steel'
+    assert search_term('d. Mild Steel -Long Products') == 'steel rod'
+    assert search_term('Mild Steel (MS) Blooms') == 'ms steel'
+    assert search_term('e. Manufacture of cement, lime and plaster') == 'e. manufacture of'
@@ -0,0 +1,71 @@
+"""
+Scrape cache: TTL, stale-while-revalidate, negative caching and persistence across instances
+"""
+import os
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.dirname(__file__))
+sys.path.insert(0, ROOT)
+
+from agentapp.ingestion.scrape_cache import ScrapeCache
+
+
+class _Scraper:
+    def __init__(self, median=420, status='available'):
+        self.calls = []
+        self.median = median
+        self.status = status
+
+    def __call__(self, product):
+        self.calls.append(product)
+        return {'status': self.status, 'median': self.median, 'label': 'BuildersMART'}
+
+
+def _wait_for(predicate, timeout=2.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_fresh_entries_skip_the_scraper_and_persist(tmp_path):
+    path = str(tmp_path / 'cache.sqlite3')
+    scrape = _Scraper()
+    cache = ScrapeCache(path, ttl=3600)
+    first = cache.get('buildersmart', 'OPC  Cement', scrape)
+    assert first['cache']['status'] == 'miss' and first['median'] == 420
+
+    # another worker (or a restart) sees the same entry; the key ignores case and spacing
+    second = ScrapeCache(path, ttl=3600).get('buildersmart', 'opc cement', scrape)
+    assert second['cache']['status'] == 'fresh' and second['median'] == 420
+    assert scrape.calls == ['OPC  Cement']
+    assert cache.get('indiamart', 'opc cement', scrape)['cache']['status'] == 'miss'  # per source
+
+
+def test_stale_entry_is_served_while_refreshing(tmp_path):
+    cache = ScrapeCache(str(tmp_path / 'cache.sqlite3'), ttl=60, max_stale=3600)
+    cache.write('buildersmart', 'tmt bars', {'status': 'available', 'median': 50000}, fetched_at=time.time() - 600)
+    scrape = _Scraper(median=52000)
+
+    result = cache.get('buildersmart', 'tmt bars', scrape)
+    assert result['cache']['status'] == 'stale' and result['median'] == 50000
+    assert result['cache']['age_seconds'] >= 600
+    assert _wait_for(lambda: cache.read('buildersmart', 'tmt bars')[0]['median'] == 52000)
+    assert cache.get('buildersmart', 'tmt bars', scrape)['cache']['status'] == 'fresh'
+    assert len(scrape.calls) == 1
+
+
+def test_failed_refresh_keeps_the_good_entry(tmp_path):
+    cache = ScrapeCache(str(tmp_path / 'cache.sqlite3'), ttl=60, negative_ttl=1, max_stale=3600)
+    cache.write('indiamart', 'sand', {'status': 'available', 'median': 900}, fetched_at=time.time() - 600)
+    failing = _Scraper(status='unavailable')
+    assert cache.get('indiamart', 'sand', failing)['median'] == 900
+    assert _wait_for(lambda: len(failing.calls) == 1 and not cache._refreshing)
+    assert cache.read('indiamart', 'sand')[0]['median'] == 900
+
+    # a miss that fails is cached briefly too
+    assert cache.get('indiamart', 'gravel', failing)['cache']['status'] == 'miss'
+    assert cache.get('indiamart', 'gravel', failing)['cache']['status'] == 'fresh'
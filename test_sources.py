@@ -0,0 +1,79 @@
+"""
+Market source registry: adapters scraped concurrently under one deadline
+"""
+import os
+import sys
+import time
+
+import pytest
+
+ROOT = os.path.abspath(os.path.dirname(__file__))
+sys.path.insert(0, ROOT)
+
+import agentapp.ingestion.sources as sources
+from agentapp.deadline import Deadline
+from agentapp.ingestion.scrape_cache import ScrapeCache
+from agentapp.ingestion.scrapers import MarketSource
+
+
+class _FakeSource(MarketSource):
+    def __init__(self, name, delay, prices):
+        self.name, self.label = name, name.title()
+        self.delay, self.prices = delay, prices
+
+    def candidates(self, product):
+        return [f'https://{self.name}.test/{product}']
+
+    def page_prices(self, url, deadline=None):
+        time.sleep(self.delay)
+        return self.prices
+
+
+def test_sources_run_concurrently_and_late_ones_are_named(tmp_path, monkeypatch):
+    cache = ScrapeCache(str(tmp_path / 'cache.sqlite3'))
+    monkeypatch.setattr(sources, 'get_scrape_cache', lambda: cache)
+    adapters = [_FakeSource('alpha', 0.3, [500, 510, 520]), _FakeSource('beta', 0.3, [600, 610, 620]),
+                _FakeSource('gamma', 0.3, [700]), _FakeSource('slow', 2.0, [800, 810, 820])]
+
+    t0 = time.perf_counter()
+    results, late = sources.fan_out('cement', Deadline(0.8), adapters)
+    assert time.perf_counter() - t0 < 1.0  # max of the source latencies, not their sum
+    assert list(results) == ['alpha', 'beta', 'gamma', 'slow'] and late == ['slow']
+    assert results['alpha']['median'] == 510 and results['alpha']['label'] == 'Alpha'
+    assert results['gamma']['status'] == 'unavailable'  # answered, but too few prices
+    assert results['slow']['status'] == 'unavailable' and 'deadline' in results['slow']['reason']
+    # the scrape gave up at the deadline: nothing is cached for it, the others are
+    time.sleep(0.2)
+    assert cache.read('slow', 'cement') is None and cache.read('alpha', 'cement') is not None
+
+
+def test_registry_and_enabled_filter(monkeypatch):
+    monkeypatch.setattr(sources, 'SOURCES', dict(sources.SOURCES))
+    sources.register_source(_FakeSource('extra', 0, []))
+    assert [s.name for s in sources.enabled_sources()] == ['buildersmart', 'indiamart', 'extra']
+
+    monkeypatch.setenv('MARKET_SOURCES', 'extra, indiamart')
+    assert [s.name for s in sources.enabled_sources()] == ['extra', 'indiamart']
+    monkeypatch.setenv('MARKET_SOURCES', 'nope')
+    with pytest.raises(ValueError):
+        sources.enabled_sources()
+
+
+def test_candidate_urls_lists_the_pages_actually_fetched():
+    class _Pages(MarketSource):
+        name, label = 'pages', 'Pages'
+        delays = {'a': 0.2, 'b': 0.0, 'c': 0.0, 'd': 0.8}
+
+        def candidates(self, product):
+            return list('abcd')
+
+        def page_prices(self, url, deadline=None):
+            time.sleep(self.delays[url])
+            if url == 'a':
+                raise IOError('timeout')
+            return [500, 510, 520]
+
+    result = _Pages().scrape('cement')
+    # b wins once a has failed; c was already fetched concurrently, d was still in flight
+    assert result['source_url'] == 'b'
+    assert result['candidate_urls'] == ['a', 'b', 'c']
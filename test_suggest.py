@@ -0,0 +1,56 @@
+"""
+Tests for the /api/suggest autocomplete index
+"""
+import os
+import sys
+import time
+
+import numpy as np
+from fastapi.testclient import TestClient
+
+ROOT = os.path.abspath(os.path.dirname(__file__))
+sys.path.insert(0, ROOT)
+
+from agentapp.suggest import SuggestIndex, get_suggest_index
+from agentapp.api.main import app
+
+CSV_PATH = os.path.join(ROOT, 'data', 'price_index.csv')
+
+
+def test_prefix_matches_any_word_start():
+    index = SuggestIndex([
+        ('Ordinary Portland cement', 'commodity', 'Ordinary Portland cement'),
+        ('Cement superfine', 'commodity', 'Cement superfine'),
+        ('opc', 'alias', 'opc'),
+        ('Cement', 'category', 'Cement'),
+    ])
+    labels = [s['label'] for s in index.suggest('cem')]
+    # label prefixes first, commodities before categories, then word starts
+    assert labels == ['Cement superfine', 'Cement', 'Ordinary Portland cement']
+    assert [s['label'] for s in index.suggest('Portland  C')] == ['Ordinary Portland cement']
+    assert index.suggest('xyz') == []
+    assert index.suggest('  ') == []
+    assert len(index.suggest('c', limit=1)) == 1
+
+
+def test_taxonomy_index_covers_all_sources():
+    index = get_suggest_index(CSV_PATH)
+    kinds = {s['kind'] for q in ('opc', 'fe-5', 'bricks', 'pozz') for s in index.suggest(q)}
+    assert kinds == {'alias', 'class', 'category', 'commodity'}
+    latencies = []
+    for _ in range(20):
+        for q in ('c', 'ce', 'cem', 'ceme', 'tmt b', 'ordinary p', 'steel'):
+            start = time.perf_counter()
+            index.suggest(q)
+            latencies.append(time.perf_counter() - start)
+    assert np.percentile(latencies, 99) < 0.002
+
+
+def test_suggest_endpoint():
+    client = TestClient(app)
+    resp = client.get('/api/suggest', params={'q': 'white', 'limit': 3})
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data['query'] == 'white'
+    assert data['suggestions'][0] == {'label': 'White cement', 'kind': 'commodity', 'value': 'White cement'}
+    assert client.get('/').status_code == 200
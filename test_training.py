@@ -0,0 +1,51 @@
+"""
+Training pipeline: leakage-free folds, versioned artifacts and promotion into the registry
+"""
+import json
+import os
+import sys
+
+import numpy as np
+
+ROOT = os.path.abspath(os.path.dirname(__file__))
+sys.path.insert(0, ROOT)
+
+from agentapp.model_registry import ModelRegistry
+from agentapp.training import list_versions, train, trend_labels
+from agentapp.training.search import param_grid, time_folds
+
+CSV_PATH = os.path.join(ROOT, 'data', 'price_index.csv')
+
+
+def test_same_month_label_matches_notebook():
+    values = np.array([[100.0, 101.0, 101.1, 100.0]])
+    # notebook: pct_change of the month itself
+    assert np.array_equal(trend_labels(values, 0), [[np.nan, 1, 0, -1]], equal_nan=True)
+
+
+def test_time_folds_leave_a_gap_of_horizon_months():
+    valid = np.ones((2, 20), dtype=bool)
+    folds = time_folds(valid, n_folds=3, horizon=2)
+    assert len(folds) == 3
+    for train, test in folds:
+        first_test = np.flatnonzero(test.any(axis=0))[0]
+        assert np.flatnonzero(train.any(axis=0))[-1] == first_test - 3
+    assert param_grid({'b': [1, 2], 'a': [3]}) == [{'a': 3, 'b': 1}, {'a': 3, 'b': 2}]
+
+
+def test_train_writes_and_promotes_a_version(tmp_path):
+    models_dir = tmp_path / 'models'
+    result = train(CSV_PATH, candidates=['majority', 'logreg_scaled'], n_folds=3, workers=1,
+                   out_dir=str(tmp_path / 'versions'), promote_to=str(models_dir), log=lambda line: None)
+    assert list_versions(str(tmp_path / 'versions')) == [result['path']]
+    with open(os.path.join(result['path'], 'metadata.json')) as f:
+        metadata = json.load(f)
+    assert metadata['version'] == result['version']
+    assert metadata['candidate'] in ('majority', 'logreg_scaled')
+    assert len(metadata['search']) == 5  # majority + 4 values of C
+    assert set(result['timings']) >= {'load', 'features', 'search', 'holdout', 'refit', 'save', 'total'}
+
+    registry = ModelRegistry(str(models_dir / 'trend_model.pkl'), str(models_dir / 'model_features.pkl'),
+                             str(models_dir / 'trend_model.npz'))
+    assert registry.version == result['version']
+    assert registry.current().features == ['price_index', 'lag_1', 'lag_3_mean']